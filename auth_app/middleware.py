@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+
+
+CHAVE_RENOVACAO = "_renovada_em"
+
+
+class RenovacaoSessaoMiddleware:
+    """
+    Expiração deslizante da sessão sem gravar a cada requisição.
+
+    Substitui SESSION_SAVE_EVERY_REQUEST: a sessão só é regravada (novo
+    expire_date no storage e novo cookie) quando a última renovação tem mais
+    de SESSION_RENOVACAO_INTERVALO segundos. Polls como o de horários passam a
+    apenas ler a sessão (do cache, com cached_db). A sessão inativa expira
+    entre SESSION_COOKIE_AGE - intervalo e SESSION_COOKIE_AGE segundos.
+
+    Deve ficar logo depois de SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.intervalo = getattr(
+            settings, "SESSION_RENOVACAO_INTERVALO", settings.SESSION_COOKIE_AGE // 10
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, "session", None)
+        # Sessão vazia: anônimo ou logout (flush) -- não cria nada
+        if session is None or session.is_empty():
+            return response
+
+        agora = int(time.time())
+        if session.modified or agora - session.get(CHAVE_RENOVACAO, 0) >= self.intervalo:
+            # Marca como modificada; o SessionMiddleware grava e reenvia o cookie
+            session[CHAVE_RENOVACAO] = agora
+        return response
@@ -1,8 +1,16 @@
 import json
+import time
+from datetime import timedelta
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 
 class AuthTests(TestCase):
@@ -80,3 +88,61 @@ class AuthTests(TestCase):
         resp = self.client.get(reverse("gerenciar_salas"))
         self.assertEqual(resp.status_code, 302)
         self.assertIn(reverse("login_page"), resp.url)
+
+
+class RenovacaoSessaoTests(TestCase):
+    def setUp(self):
+        from salas.models import Sala
+
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="aluno@example.com", email="aluno@example.com", password="password123"
+        )
+        self.sala = Sala.objects.create(nome="Sala Sessao", capacidade=4, tipo="Individual")
+        self.url = reverse("api_horarios_disponiveis", args=[self.sala.id]) + "?data=" + timezone.localdate().isoformat()
+        self.client = Client()
+
+    def escritas_de_sessao(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        escritas = [
+            q["sql"] for q in ctx.captured_queries
+            if "django_session" in q["sql"] and not q["sql"].lstrip().upper().startswith("SELECT")
+        ]
+        return resp, escritas
+
+    # CT6.8 – Requisições seguidas dentro do intervalo não gravam a sessão
+    def test_poll_nao_grava_sessao_dentro_do_intervalo(self):
+        self.client.force_login(self.user)
+        resp, escritas = self.escritas_de_sessao(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(settings.SESSION_COOKIE_NAME, resp.cookies)  # primeira renovação
+
+        for _ in range(3):
+            resp, escritas = self.escritas_de_sessao(self.url)
+            self.assertEqual(escritas, [])
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, resp.cookies)
+        self.assertIn("_auth_user_id", self.client.session)
+
+    # CT6.9 – Depois do intervalo a sessão é renovada (expiração deslizante)
+    def test_sessao_renovada_apos_intervalo(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        expira_antes = Session.objects.get(session_key=self.client.session.session_key).expire_date
+
+        futuro = time.time() + settings.SESSION_RENOVACAO_INTERVALO + 1
+        with mock.patch("auth_app.middleware.time.time", return_value=futuro), \
+                mock.patch("django.contrib.sessions.backends.base.timezone.now",
+                           return_value=timezone.now() + timedelta(seconds=settings.SESSION_RENOVACAO_INTERVALO + 1)):
+            resp, escritas = self.escritas_de_sessao(self.url)
+
+        self.assertNotEqual(escritas, [])
+        self.assertIn(settings.SESSION_COOKIE_NAME, resp.cookies)
+        expira_depois = Session.objects.get(session_key=self.client.session.session_key).expire_date
+        self.assertGreater(expira_depois, expira_antes)
+
+    # CT6.10 – Visitante anônimo não ganha sessão
+    def test_anonimo_nao_cria_sessao(self):
+        resp, escritas = self.escritas_de_sessao(self.url)
+        self.assertEqual(escritas, [])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, resp.cookies)
@@ -0,0 +1,36 @@
+"""
+Configuração do gunicorn para o perfil de produção.
+
+    gunicorn -c gunicorn.conf.py ifteca_project.wsgi:application
+
+Para servir via ASGI (necessário para endpoints assíncronos/streaming):
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c gunicorn.conf.py ifteca_project.asgi:application
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ifteca_project.settings_production")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Padrão clássico (2 x CPUs + 1); ajuste com WEB_CONCURRENCY
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Carrega a aplicação antes do fork: workers compartilham memória e falhas de import aparecem cedo
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes", "on")
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
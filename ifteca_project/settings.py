@@ -7,6 +7,7 @@ Generated by 'django-admin startproject' using Django 5.2.8.
 import os
 import sys
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from django.template import context as _dj_context
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -62,11 +63,16 @@ INSTALLED_APPS = [
 # M I D D L E W A R E
 # --------------------------
 MIDDLEWARE = [
+    # Primeiro da lista: mede a requisição inteira (Server-Timing + métricas por rota)
+    'reservas.instrumentacao.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'auth_app.middleware.RenovacaoSessaoMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Só atua com PERFIL_ATIVO=true (reservas/perfilador.py)
+    'reservas.perfilador.PerfilamentoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # Injeta o script de LiveReload apenas em modo dev
@@ -101,13 +107,139 @@ WSGI_APPLICATION = 'ifteca_project.wsgi.application'
 # --------------------------
 # DATABASE
 # --------------------------
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        # Database in repo-root/data/
-        'NAME': BASE_DIR / 'data' / 'db.sqlite3',
+# DJANGO_DB_ENGINE escolhe o banco: "sqlite" (padrão, arquivo em data/) ou
+# "postgresql" (POSTGRES_*). Os testes rodam em SQLite, a menos que
+# DJANGO_TEST_DB_ENGINE peça outro backend (ex.: CI com PostgreSQL).
+DB_ENGINE = os.getenv('DJANGO_DB_ENGINE', 'sqlite').strip().lower()
+if 'test' in sys.argv:
+    DB_ENGINE = os.getenv('DJANGO_TEST_DB_ENGINE', 'sqlite').strip().lower()
+
+# Conexões persistentes por thread/worker (0 = abre uma por requisição)
+CONN_MAX_AGE = int(os.getenv('DJANGO_CONN_MAX_AGE', '60'))
+
+# Ajustes do SQLite aplicados a cada nova conexão (init_command):
+# - WAL: leitores não bloqueiam o escritor (e vice-versa);
+# - synchronous=NORMAL: seguro com WAL e bem mais barato que FULL;
+# - busy_timeout: espera pelo lock de escrita em vez de "database is locked";
+# - mmap_size: leituras direto da memória mapeada.
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '20000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))
+
+# PostgreSQL: com POSTGRES_POOL=true cada worker mantém um pool do psycopg
+# (o Django exige CONN_MAX_AGE=0 nesse caso). Atrás de um PgBouncer em modo
+# transaction, defina POSTGRES_PGBOUNCER=true (sem cursores no servidor).
+POSTGRES_POOL = _env_bool(os.getenv('POSTGRES_POOL'), False)
+POSTGRES_POOL_MIN_SIZE = int(os.getenv('POSTGRES_POOL_MIN_SIZE', '2'))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10'))
+POSTGRES_POOL_TIMEOUT = int(os.getenv('POSTGRES_POOL_TIMEOUT', '10'))
+POSTGRES_PGBOUNCER = _env_bool(os.getenv('POSTGRES_PGBOUNCER'), False)
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    _pg_options = {}
+    if POSTGRES_POOL:
+        _pg_options['pool'] = {
+            'min_size': POSTGRES_POOL_MIN_SIZE,
+            'max_size': POSTGRES_POOL_MAX_SIZE,
+            'timeout': POSTGRES_POOL_TIMEOUT,
+        }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'ifteca'),
+            'USER': os.getenv('POSTGRES_USER', 'ifteca'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': not POSTGRES_POOL,
+            'DISABLE_SERVER_SIDE_CURSORS': POSTGRES_PGBOUNCER,
+            'OPTIONS': _pg_options,
+        }
     }
-}
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # Database in repo-root/data/
+            'NAME': BASE_DIR / 'data' / 'db.sqlite3',
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # BEGIN IMMEDIATE: blocos atomic obtêm o lock de escrita logo no
+                # início, serializando verificação + criação de reservas.
+                'transaction_mode': 'IMMEDIATE',
+                # Timeout do driver (segundos) para obter o lock; mesmo valor do busy_timeout
+                'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+                'init_command': ';'.join([
+                    f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}',
+                    f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}',
+                    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+                    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+                    f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',
+                    'PRAGMA temp_store=MEMORY',
+                ]),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"DJANGO_DB_ENGINE inválido: {DB_ENGINE!r}. Use 'sqlite' ou 'postgresql'."
+    )
+
+
+# --------------------------
+# CACHE
+# --------------------------
+# Com vários workers o cache precisa ser compartilhado para que a invalidação
+# (reservas/versoes.py) valha para todos: use "redis" (REDIS_URL) ou "file".
+_cache_backend = os.getenv('DJANGO_CACHE_BACKEND', 'locmem').strip().lower()
+if _cache_backend == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif _cache_backend == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('DJANGO_CACHE_DIR', str(BASE_DIR / 'data' / 'cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ifteca',
+        }
+    }
+
+# Tempo máximo (segundos) das métricas do dashboard em cache; escritas em
+# reservas/salas/usuários invalidam antes disso.
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))
+
+# Grades de horários compiladas em memória (reservas/grades.py): além da
+# invalidação por versão, cada worker as recarrega após este tempo (segundos).
+GRADES_TTL = int(os.getenv('GRADES_TTL', '60'))
+
+# Eventos em tempo real dos horários (reservas/eventos.py, exige ASGI).
+# Com vários workers use o broker do Redis para todos receberem os eventos.
+EVENTOS_BROKER = os.getenv('EVENTOS_BROKER', 'reservas.eventos.BrokerEmMemoria')
+EVENTOS_REDIS_URL = os.getenv('EVENTOS_REDIS_URL', os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/2'))
+EVENTOS_HEARTBEAT = int(os.getenv('EVENTOS_HEARTBEAT', '15'))  # segundos entre pings
+EVENTOS_DURACAO_MAX = int(os.getenv('EVENTOS_DURACAO_MAX', '300'))  # o navegador reconecta depois disso
+
+# Feed público de salas (reservas/feed_salas.py): páginas serializadas ficam em
+# cache até uma sala mudar; SALAS_PUBLICAS_MAX_AGE é o Cache-Control enviado
+# aos clientes (0 = revalidar sempre com ETag/Last-Modified).
+SALAS_PUBLICAS_CACHE_TTL = int(os.getenv('SALAS_PUBLICAS_CACHE_TTL', '300'))
+SALAS_PUBLICAS_MAX_AGE = int(os.getenv('SALAS_PUBLICAS_MAX_AGE', '0'))
+SALAS_PUBLICAS_POR_PAGINA = 100  # só quando o cliente manda page ou page_size
+SALAS_PUBLICAS_POR_PAGINA_MAX = 500
 
 
 # --------------------------
@@ -151,8 +283,15 @@ USE_TZ = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 # Expira sessão por tempo (30 minutos) como fallback mesmo que o navegador restaure abas
 SESSION_COOKIE_AGE = 30 * 60  # 30 minutos
-# Opcional: renova o prazo a cada requisição autenticada
-SESSION_SAVE_EVERY_REQUEST = True
+# Renovação do prazo (expiração deslizante) feita por
+# auth_app.middleware.RenovacaoSessaoMiddleware: grava a sessão no máximo uma
+# vez a cada SESSION_RENOVACAO_INTERVALO segundos, em vez de a cada requisição.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_RENOVACAO_INTERVALO = int(os.getenv('SESSION_RENOVACAO_INTERVALO', str(SESSION_COOKIE_AGE // 10)))
+# Armazenamento: cached_db (padrão) lê do cache e só escreve no banco ao
+# gravar; também aceita db, cache, file ou signed_cookies.
+_session_backend = os.getenv('DJANGO_SESSION_ENGINE', 'cached_db').strip().lower()
+SESSION_ENGINE = f'django.contrib.sessions.backends.{_session_backend}'
 
 
 # --------------------------
@@ -178,6 +317,22 @@ AUTHENTICATION_BACKENDS = [
 # --------------------------
 # LOGGING BÁSICO PARA DEBUG
 # --------------------------
+# Instrumentação por requisição (reservas/instrumentacao.py)
+INSTRUMENTACAO_ATIVA = _env_bool(os.getenv('INSTRUMENTACAO_ATIVA'), True)
+INSTRUMENTACAO_JANELA = int(os.getenv('INSTRUMENTACAO_JANELA', '500'))
+# Nos testes as linhas por requisição só poluiriam a saída
+INSTRUMENTACAO_LOG_LEVEL = os.getenv(
+    'INSTRUMENTACAO_LOG_LEVEL', 'WARNING' if 'test' in sys.argv else 'INFO'
+)
+
+# Perfilamento cProfile de requisições lentas (reservas/perfilador.py)
+PERFIL_ATIVO = _env_bool(os.getenv('PERFIL_ATIVO'), False)
+PERFIL_LIMIAR_MS = float(os.getenv('PERFIL_LIMIAR_MS', '1000'))
+# Fração das requisições perfiladas; as lentas fora da amostra vão para o log
+PERFIL_AMOSTRAGEM = float(os.getenv('PERFIL_AMOSTRAGEM', '0.05'))
+PERFIL_DIRETORIO = os.getenv('PERFIL_DIRETORIO', str(BASE_DIR / 'data' / 'profiles'))
+PERFIL_MAX_ARQUIVOS = int(os.getenv('PERFIL_MAX_ARQUIVOS', '50'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -192,6 +347,12 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'INFO',
         },
+        # Uma linha JSON por requisição (reservas.instrumentacao)
+        'ifteca.requisicoes': {
+            'handlers': ['console'],
+            'level': INSTRUMENTACAO_LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
 
@@ -212,6 +373,13 @@ RESERVA_EMAIL_DESTINO = os.getenv(
     "coelho.danillo@academico.ifpb.edu.br",
 )
 
+# Outbox de e-mails (enviada pelo comando `python manage.py processar_emails`)
+EMAIL_OUTBOX_MAX_TENTATIVAS = int(os.getenv("EMAIL_OUTBOX_MAX_TENTATIVAS", "5"))
+EMAIL_OUTBOX_BACKOFF_BASE = int(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE", "60"))  # segundos
+EMAIL_OUTBOX_BACKOFF_MAX = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX", "3600"))  # segundos
+# Tempo em que um lote fica reservado para o worker que o pegou
+EMAIL_OUTBOX_CONCESSAO = int(os.getenv("EMAIL_OUTBOX_CONCESSAO", "300"))  # segundos
+
 # Durante execuÃ§Ã£o de testes, evita enviar emails reais
 if "test" in sys.argv:
     EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
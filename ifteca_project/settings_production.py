@@ -0,0 +1,79 @@
+"""
+Perfil de produção: DJANGO_SETTINGS_MODULE=ifteca_project.settings_production
+
+Parte das configurações de `settings.py` e ajusta o que importa para servir
+com vários workers (gunicorn, ver gunicorn.conf.py):
+- DEBUG desligado por padrão e sem host curinga;
+- LiveReload removido (não injeta script nem abre porta extra);
+- arquivos estáticos servidos pelo WhiteNoise, comprimidos e com hash no nome;
+- cache obrigatoriamente compartilhado entre os workers;
+- broker de eventos compartilhado quando há mais de um worker.
+"""
+
+import multiprocessing
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES, EVENTOS_BROKER, INSTALLED_APPS, MIDDLEWARE, _env_bool, os
+
+DEBUG = _env_bool(os.getenv('DJANGO_DEBUG'), False)
+
+if not os.getenv('DJANGO_SECRET_KEY'):
+    raise ImproperlyConfigured('Defina DJANGO_SECRET_KEY para o perfil de produção.')
+
+# As versões de reservas/versoes.py (ETags, grades compiladas, caches
+# derivados) vivem no cache: com locmem cada worker teria as suas e uma
+# escrita feita em um worker não invalidaria os demais.
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'O perfil de produção exige um cache compartilhado entre os workers: '
+        'defina DJANGO_CACHE_BACKEND=redis (com REDIS_URL) ou file.'
+    )
+
+# Com o broker em memória, um evento publicado em um worker só chega aos
+# streams abertos nele; os demais mostrariam horários vencidos até reconectar.
+# Mesmo padrão de workers do gunicorn.conf.py.
+_workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+if EVENTOS_BROKER.endswith('BrokerEmMemoria') and _workers > 1:
+    raise ImproperlyConfigured(
+        f'Com {_workers} workers (WEB_CONCURRENCY) o broker de eventos precisa ser '
+        'compartilhado: defina EVENTOS_BROKER=reservas.eventos.BrokerRedis '
+        '(com EVENTOS_REDIS_URL) ou WEB_CONCURRENCY=1.'
+    )
+
+_allowed_hosts_raw = os.getenv('DJANGO_ALLOWED_HOSTS')
+if _allowed_hosts_raw:
+    ALLOWED_HOSTS = [h.strip() for h in _allowed_hosts_raw.split(',') if h.strip()]
+else:
+    ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+
+# --------------------------
+# A P P S / MIDDLEWARE
+# --------------------------
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'livereload']
+
+MIDDLEWARE = [m for m in MIDDLEWARE if not m.startswith('livereload.')]
+# WhiteNoise logo após o SecurityMiddleware, antes de sessão/autenticação
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+)
+
+
+# --------------------------
+# STATIC FILES
+# --------------------------
+STATIC_ROOT = os.getenv('DJANGO_STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Arquivos com hash no nome podem ficar em cache no navegador indefinidamente
+WHITENOISE_MAX_AGE = int(os.getenv('WHITENOISE_MAX_AGE', str(365 * 24 * 60 * 60)))
+
@@ -23,6 +23,8 @@ urlpatterns = [
     
     # APIs públicas (sem prefixo /reservas/)
     path("api/salas/<int:sala_id>/horarios/", reservas_views.api_horarios_disponiveis, name="api_horarios_disponiveis"),
+    path("api/salas/<int:sala_id>/horarios/eventos/", reservas_views.eventos_horarios, name="eventos_horarios"),
+    path("api/salas/disponibilidade/", reservas_views.api_matriz_disponibilidade, name="api_matriz_disponibilidade"),
     path("api/reservas/criar/", reservas_views.api_criar_reserva, name="api_criar_reserva"),
     # Atalho para interface administrativa de reservas (compatibilidade /admin/reserva)
     path("admin/reserva/", lambda request: redirect('/reservas/admin/reserva/')),
@@ -1,9 +1,34 @@
 from django.contrib import admin
-from .models import Reserva
+from .models import EmailPendente, Fechamento, GradeHorario, Reserva
 
 
 @admin.register(Reserva)
 class ReservaAdmin(admin.ModelAdmin):
     list_display = ("sala", "usuario", "inicio", "fim")
     search_fields = ("usuario", "sala__nome")
-    list_filter = ("sala", "inicio")
\ No newline at end of file
+    list_filter = ("sala", "inicio")
+    list_select_related = ("sala",)
+    raw_id_fields = ("conta",)
+
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = ("assunto", "destinatario", "status", "tentativas", "proxima_tentativa", "enviado_em")
+    search_fields = ("assunto", "destinatario")
+    list_filter = ("status",)
+
+
+@admin.register(GradeHorario)
+class GradeHorarioAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "sala", "tipo", "dia_semana", "abertura", "encerramento", "duracao_minutos", "ativo")
+    list_filter = ("tipo", "dia_semana", "ativo")
+    list_select_related = ("sala",)
+    raw_id_fields = ("sala",)
+
+
+@admin.register(Fechamento)
+class FechamentoAdmin(admin.ModelAdmin):
+    list_display = ("data", "sala", "motivo")
+    list_filter = ("data",)
+    list_select_related = ("sala",)
+    raw_id_fields = ("sala",)
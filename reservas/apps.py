@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReservasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reservas'
+
+    def ready(self):
+        # Conecta os receivers que invalidam caches derivados
+        from . import signals  # noqa: F401
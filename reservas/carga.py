@@ -0,0 +1,278 @@
+"""
+Gerador de dados em escala de campus para benchmarks e testes de carga.
+
+Tudo é inserido com `bulk_create` em lotes e derivado de um `random.Random`
+com semente fixa: a mesma semente e a mesma data de referência produzem
+exatamente os mesmos registros. As reservas ocupam a grade padrão de
+horários sem sobreposição, nem por sala nem por usuário.
+
+Os registros gerados são identificáveis (salas com nome iniciado em
+PREFIXO_SALA, usuários com e-mail em DOMINIO_EMAIL) para que possam ser
+removidos sem tocar nos dados reais.
+"""
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from salas.models import Sala
+
+from . import grades, versoes
+from .disponibilidade import HORARIOS_PADRAO
+from .models import Reserva
+
+PREFIXO_SALA = "Carga "
+DOMINIO_EMAIL = "@carga.ifteca.test"
+SENHA_PADRAO = "senha123"
+DIAS_POR_SEMESTRE = 182
+
+BLOCOS = ["Bloco A", "Bloco B", "Bloco C", "Bloco D", "Biblioteca", "Anexo"]
+EQUIPAMENTOS = [
+    ["Projetor", "Ar condicionado"],
+    ["Computadores", "Ar condicionado"],
+    ["Quadro branco", "Projetor"],
+    ["TV", "Ar condicionado", "Webcam"],
+    ["Lousa digital", "Projetor"],
+    [],
+]
+NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor",
+    "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael",
+    "Sofia", "Thiago", "Vitória", "Wesley",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Ferreira",
+    "Almeida", "Ribeiro", "Carvalho", "Gomes", "Martins", "Araújo", "Barbosa", "Rocha",
+]
+# Peso relativo de cada faixa de HORARIOS_PADRAO (manhã e tarde mais procuradas)
+PESOS_FAIXA = (0.8, 1.2, 0.7, 1.2, 1.1, 0.8, 0.4)
+PROPORCAO_PROFESSORES = 0.08
+PROPORCAO_CANCELADAS = 0.08
+
+
+def _em_lotes(registros, modelo, tamanho_lote):
+    """Insere o iterável `registros` com bulk_create, uma transação por lote."""
+    lote = []
+    total = 0
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            with transaction.atomic():
+                modelo.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        with transaction.atomic():
+            modelo.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def existem_dados_de_carga():
+    return (
+        Sala.objects.filter(nome__startswith=PREFIXO_SALA).exists()
+        or User.objects.filter(email__endswith=DOMINIO_EMAIL).exists()
+    )
+
+
+def _apagar(modelo, campo, ids):
+    """DELETE direto (sem Collector nem sinais) das linhas de `modelo` com `campo` em `ids`."""
+    tabela = connection.ops.quote_name(modelo._meta.db_table)
+    coluna = connection.ops.quote_name(modelo._meta.get_field(campo).column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} IN ({', '.join(['%s'] * len(ids))})", ids)
+        return cursor.rowcount
+
+
+def _lotes_de_ids(queryset, tamanho_lote):
+    """Ids do queryset em lotes crescentes, sem carregar todos de uma vez."""
+    ultimo = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=ultimo).order_by("pk").values_list("pk", flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def _apagar_com_dependentes(modelo, ids):
+    """Apaga `ids` de `modelo` com as linhas que o CASCADE apagaria (M2M e FKs)."""
+    for m2m in modelo._meta.many_to_many:
+        through = m2m.remote_field.through
+        _apagar(through, m2m.m2m_field_name(), ids)
+    for relacao in modelo._meta.related_objects:
+        if relacao.on_delete is models.CASCADE:
+            _apagar(relacao.related_model, relacao.field.name, ids)
+        elif relacao.on_delete is models.SET_NULL:
+            relacao.related_model._base_manager.filter(**{f"{relacao.field.name}__in": ids}).update(
+                **{relacao.field.name: None}
+            )
+    return _apagar(modelo, modelo._meta.pk.name, ids)
+
+
+def limpar_dados_de_carga(tamanho_lote=1000):
+    """
+    Remove salas, usuários e reservas gerados por `gerar_dados_carga`.
+
+    Apaga em lotes de ids, cada um em sua transação, com DELETE direto: o
+    `delete()` do ORM carregaria cada linha na memória (há receivers de
+    post_delete) e agendaria um incremento de versão por linha. As versões
+    são incrementadas uma única vez no final.
+    """
+    removidos = {"reservas": 0, "usuarios": 0, "salas": 0}
+    alvos = (
+        # As reservas antes das salas, que as protegem (PROTECT)
+        ("reservas", Reserva, Reserva._base_manager.filter(sala__nome__startswith=PREFIXO_SALA)),
+        ("usuarios", User, User._base_manager.filter(email__endswith=DOMINIO_EMAIL)),
+        ("salas", Sala, Sala._base_manager.filter(nome__startswith=PREFIXO_SALA)),
+    )
+    for chave, modelo, queryset in alvos:
+        for ids in _lotes_de_ids(queryset, tamanho_lote):
+            with transaction.atomic():
+                removidos[chave] += _apagar_com_dependentes(modelo, ids)
+    # As grades e fechamentos das salas removidas saem junto (CASCADE)
+    versoes.incrementar("reservas", "salas", "usuarios", grades.ESCOPO)
+    return removidos
+
+
+def _gerar_salas(rnd, quantidade):
+    for n in range(quantidade):
+        bloco = BLOCOS[n % len(BLOCOS)]
+        auditorio = rnd.random() < 0.1
+        yield Sala(
+            nome=f"{PREFIXO_SALA}{bloco} {n + 1:05d}",
+            tipo="Auditorio" if auditorio else "Coletiva",
+            capacidade=rnd.choice((60, 80, 120)) if auditorio else rnd.choice((4, 6, 8, 10, 12, 20)),
+            localizacao=bloco,
+            equipamentos=rnd.choice(EQUIPAMENTOS),
+            descricao=f"Sala gerada para teste de carga ({bloco}).",
+            status="Em Manutencao" if rnd.random() < 0.05 else "Disponivel",
+            ativo=True,
+        )
+
+
+def _gerar_usuarios(rnd, quantidade, senha_hash, agora):
+    for n in range(quantidade):
+        professor = rnd.random() < PROPORCAO_PROFESSORES
+        username = f"SIAPE{n + 1:07d}" if professor else f"2099{n + 1:07d}"
+        yield User(
+            username=username,
+            email=f"{username.lower()}{DOMINIO_EMAIL}",
+            password=senha_hash,
+            first_name=rnd.choice(NOMES),
+            last_name=rnd.choice(SOBRENOMES),
+            is_active=rnd.random() > 0.02,
+            date_joined=agora,
+        )
+
+
+def _dias_uteis(inicio, fim):
+    """Dias de segunda a sábado no intervalo [inicio, fim)."""
+    dia = inicio
+    while dia < fim:
+        if dia.weekday() != 6:
+            yield dia
+        dia += timedelta(days=1)
+
+
+def _distribuir(rnd, total, pesos):
+    """Reparte `total` entre as células proporcionalmente a `pesos` (soma exata)."""
+    soma = sum(pesos)
+    cotas = [total * p / soma for p in pesos]
+    contagens = [int(c) for c in cotas]
+    restante = total - sum(contagens)
+    # Sobras vão para as células com maior parte fracionária (desempate pela semente)
+    ordem = sorted(range(len(cotas)), key=lambda i: (contagens[i] - cotas[i], rnd.random()))
+    for i in ordem[:restante]:
+        contagens[i] += 1
+    return contagens
+
+
+def _gerar_reservas(rnd, celulas, contagens, salas, usuarios):
+    for (inicio, fim), quantidade in zip(celulas, contagens):
+        if not quantidade:
+            continue
+        # Amostras sem repetição: nenhuma sala nem usuário aparece duas vezes
+        # na mesma faixa, logo não há sobreposição
+        for sala_id, (conta_id, username) in zip(
+            rnd.sample(salas, quantidade), rnd.sample(usuarios, quantidade)
+        ):
+            yield Reserva(
+                sala_id=sala_id,
+                usuario=username,
+                conta_id=conta_id,
+                inicio=inicio,
+                fim=fim,
+                cancelada=rnd.random() < PROPORCAO_CANCELADAS,
+            )
+
+
+def gerar_dados_carga(
+    salas=2000,
+    usuarios=100_000,
+    reservas=2_000_000,
+    semestres=4,
+    dias_futuros=30,
+    seed=42,
+    data_referencia=None,
+    tamanho_lote=5000,
+    log=None,
+):
+    """
+    Gera salas, usuários e reservas de carga. Retorna as contagens inseridas.
+
+    As reservas cobrem `semestres` semestres terminando `dias_futuros` dias
+    depois de `data_referencia` (hoje, por padrão). Levanta ValueError se a
+    grade não comportar `reservas` sem sobreposição.
+    """
+    log = log or (lambda msg: None)
+    rnd = random.Random(seed)
+    agora = timezone.now()
+    hoje = data_referencia or timezone.localdate()
+
+    fim_periodo = hoje + timedelta(days=dias_futuros)
+    inicio_periodo = fim_periodo - timedelta(days=DIAS_POR_SEMESTRE * semestres)
+    celulas = []
+    pesos = []
+    for dia in _dias_uteis(inicio_periodo, fim_periodo):
+        for faixa, peso in zip(HORARIOS_PADRAO, PESOS_FAIXA):
+            celulas.append((
+                timezone.make_aware(datetime.combine(dia, faixa.inicio)),
+                timezone.make_aware(datetime.combine(dia, faixa.fim)),
+            ))
+            pesos.append(peso)
+    contagens = _distribuir(rnd, reservas, pesos) if celulas else []
+    limite = min(salas, usuarios)
+    if reservas and (not celulas or max(contagens) > limite):
+        raise ValueError(
+            f"{reservas} reservas não cabem em {len(celulas)} faixas de horário "
+            f"com {salas} salas e {usuarios} usuários sem sobreposição."
+        )
+
+    log(f"Criando {salas} salas...")
+    total_salas = _em_lotes(_gerar_salas(rnd, salas), Sala, tamanho_lote)
+
+    log(f"Criando {usuarios} usuários...")
+    senha_hash = make_password(SENHA_PADRAO)  # um único hash para todos
+    total_usuarios = _em_lotes(_gerar_usuarios(rnd, usuarios, senha_hash, agora), User, tamanho_lote)
+
+    sala_ids = list(
+        Sala.objects.filter(nome__startswith=PREFIXO_SALA).order_by("id").values_list("id", flat=True)
+    )
+    contas = list(
+        User.objects.filter(email__endswith=DOMINIO_EMAIL).order_by("id").values_list("id", "username")
+    )
+
+    log(f"Criando {reservas} reservas em {len(celulas)} faixas de horário...")
+    total_reservas = _em_lotes(
+        _gerar_reservas(rnd, celulas, contagens, sala_ids, contas), Reserva, tamanho_lote
+    )
+
+    # bulk_create não dispara sinais: invalida caches derivados manualmente
+    versoes.incrementar("reservas", "salas", "usuarios")
+    return {"salas": total_salas, "usuarios": total_usuarios, "reservas": total_reservas}
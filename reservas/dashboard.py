@@ -0,0 +1,159 @@
+"""
+Métricas do dashboard administrativo.
+
+Todos os KPIs são calculados com poucos aggregates condicionais e o resultado
+fica em cache por `DASHBOARD_CACHE_TTL` segundos. A chave inclui as versões de
+reservas, salas e usuários, então qualquer escrita nessas tabelas invalida o
+cache imediatamente (ver `signals.py`).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from salas.models import Sala
+
+from . import versoes
+from .disponibilidade import limites_do_dia
+from .models import Reserva
+
+MESES_BR = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+ESCOPOS = ("reservas", "salas", "usuarios")
+
+
+def calcular_metricas(agora=None):
+    """Calcula todos os KPIs e séries do dashboard (sem cache)."""
+    agora = agora or timezone.now()
+
+    # Reservas do mês atual vs mês anterior
+    inicio_mes_atual = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    inicio_mes_anterior = (inicio_mes_atual - timedelta(days=1)).replace(day=1)
+    # Taxa de ocupação: últimas 4 semanas
+    inicio_periodo = agora - timedelta(days=28)
+    inicio_hoje, fim_hoje = limites_do_dia(timezone.localdate(agora))
+
+    reservas = Reserva.objects.aggregate(
+        total=Count('id'),
+        mes_atual=Count('id', filter=Q(inicio__gte=inicio_mes_atual)),
+        mes_anterior=Count('id', filter=Q(inicio__gte=inicio_mes_anterior, inicio__lt=inicio_mes_atual)),
+        periodo=Count('id', filter=Q(inicio__gte=inicio_periodo, cancelada=False)),
+        # Reservas sem comparecimento (reservas de hoje já encerradas - simplificado)
+        sem_comparecimento=Count(
+            'id',
+            filter=Q(inicio__gte=inicio_hoje, inicio__lt=fim_hoje, fim__lt=agora, cancelada=False),
+        ),
+    )
+
+    salas = Sala.objects.filter(ativo=True).aggregate(
+        total=Count('id'),
+        disponiveis=Count('id', filter=Q(status='Disponivel')),
+        manutencao=Count('id', filter=Q(status='Em Manutencao')),
+    )
+    salas_manutencao_list = list(
+        Sala.objects.filter(ativo=True, status='Em Manutencao')
+        .order_by('nome')
+        .values_list('nome', flat=True)
+    )
+
+    usuarios = User.objects.filter(is_active=True).aggregate(
+        total=Count('id'),
+        estudantes=Count('id', filter=Q(is_staff=False, is_superuser=False)),
+        professores=Count('id', filter=Q(is_staff=True, is_superuser=False)),
+    )
+
+    # Calcular variação percentual
+    if reservas['mes_anterior'] > 0:
+        variacao_reservas = round(((reservas['mes_atual'] - reservas['mes_anterior']) / reservas['mes_anterior']) * 100)
+    else:
+        variacao_reservas = 100 if reservas['mes_atual'] > 0 else 0
+
+    # Assumindo 10 horários por dia por sala, 5 dias por semana, 4 semanas
+    capacidade_teorica = salas['total'] * 10 * 5 * 4 if salas['total'] > 0 else 1
+    taxa_ocupacao = min(round((reservas['periodo'] / capacidade_teorica) * 100), 100)
+
+    # Reservas por mês (últimos 6 meses)
+    reservas_por_mes = (
+        Reserva.objects.filter(inicio__gte=agora - timedelta(days=180))
+        .annotate(mes=TruncMonth('inicio'))
+        .values('mes')
+        .annotate(total=Count('id'))
+        .order_by('mes')
+    )
+    dados_mensais = [
+        {'month': MESES_BR[item['mes'].month - 1], 'total': item['total']}
+        for item in reservas_por_mes
+        if item['mes']
+    ]
+
+    # Taxa de uso por sala (top 5 salas mais usadas), relativa à mais usada
+    uso_por_sala = list(
+        Reserva.objects.filter(cancelada=False)
+        .values('sala__nome')
+        .annotate(total=Count('id'))
+        .order_by('-total')[:5]
+    )
+    max_reservas = max([s['total'] for s in uso_por_sala]) if uso_por_sala else 1
+    dados_salas = [
+        {
+            'name': item['sala__nome'],
+            'usage': round((item['total'] / max_reservas) * 100) if max_reservas > 0 else 0,
+        }
+        for item in uso_por_sala
+    ]
+
+    # Próximas reservas
+    proximas_reservas = (
+        Reserva.objects.filter(inicio__gte=agora, cancelada=False)
+        .select_related('sala', 'conta')
+        .order_by('inicio')[:5]
+    )
+    proximas_lista = []
+    for r in proximas_reservas:
+        usuario_obj = r.conta
+        nome = usuario_obj.get_full_name() if usuario_obj and usuario_obj.first_name else r.usuario
+        proximas_lista.append({
+            'sala': r.sala.nome,
+            'horario': r.inicio.strftime('%H:%M'),
+            'usuario': nome,
+        })
+
+    return {
+        # KPIs
+        'total_reservas': reservas['total'],
+        'variacao_reservas': variacao_reservas,
+        'total_salas': salas['total'],
+        'salas_disponiveis': salas['disponiveis'],
+        'salas_manutencao': salas['manutencao'],
+        'total_usuarios': usuarios['total'],
+        'total_estudantes': usuarios['estudantes'],
+        'total_professores': usuarios['professores'],
+        'taxa_ocupacao': taxa_ocupacao,
+        # Gráficos
+        'dados_mensais': dados_mensais,
+        'dados_salas': dados_salas,
+        'salas_manutencao_list': salas_manutencao_list,
+        # Alertas
+        'reservas_sem_comparecimento': reservas['sem_comparecimento'],
+        # Próximas reservas
+        'proximas_reservas': proximas_lista,
+    }
+
+
+def _chave_cache():
+    return "dashboard:metricas:" + ":".join(str(v) for v in versoes.versoes(*ESCOPOS))
+
+
+def obter_metricas():
+    """Métricas do dashboard, servidas do cache enquanto nada mudar (ou até o TTL)."""
+    ttl = getattr(settings, 'DASHBOARD_CACHE_TTL', 60)
+    chave = _chave_cache()
+    metricas = cache.get(chave)
+    if metricas is None:
+        metricas = calcular_metricas()
+        cache.set(chave, metricas, ttl)
+    return metricas
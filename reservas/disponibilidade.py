@@ -0,0 +1,156 @@
+"""
+Motor de disponibilidade de horarios das salas.
+
+Carrega os intervalos reservados (nao cancelados) de uma sala em um dia com
+uma unica query e cruza esses intervalos com a grade de horarios em memoria,
+em vez de executar um `exists()` por faixa de horario. A grade de cada sala
+vem de `grades.py` (compilada em memoria).
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from . import grades
+from .grades import HORARIOS_PADRAO, Faixa  # noqa: F401  (reexportados)
+from .models import Reserva
+
+
+def limites_do_dia(data):
+    """Retorna (inicio, fim) timezone-aware cobrindo o dia local `data`."""
+    inicio = timezone.make_aware(datetime.combine(data, time.min))
+    fim = timezone.make_aware(datetime.combine(data + timedelta(days=1), time.min))
+    return inicio, fim
+
+
+def intervalos_reservados(sala_id, data):
+    """Lista ordenada de (inicio, fim) das reservas ativas da sala no dia (1 query)."""
+    inicio_dia, fim_dia = limites_do_dia(data)
+    return list(
+        Reserva.objects.filter(
+            sala_id=sala_id,
+            cancelada=False,
+            inicio__lt=fim_dia,
+            fim__gt=inicio_dia,
+        )
+        .order_by("inicio")
+        .values_list("inicio", "fim")
+    )
+
+
+def calcular_horarios(data, intervalos, grade=HORARIOS_PADRAO, agora=None):
+    """
+    Varre a grade de horarios contra os intervalos reservados, sem queries.
+
+    `intervalos` deve estar ordenado por inicio (como em `intervalos_reservados`).
+    Retorna a lista no mesmo formato JSON de `api_horarios_disponiveis`.
+    """
+    agora = agora or timezone.now()
+    horarios = []
+    primeiro = 0
+    for faixa in sorted(grade, key=lambda f: f.inicio):
+        inicio_dt = timezone.make_aware(datetime.combine(data, faixa.inicio))
+        fim_dt = timezone.make_aware(datetime.combine(data, faixa.fim))
+
+        # Intervalos que terminam antes desta faixa nao conflitam com as proximas
+        while primeiro < len(intervalos) and intervalos[primeiro][1] <= inicio_dt:
+            primeiro += 1
+
+        conflito = False
+        for reserva_inicio, reserva_fim in intervalos[primeiro:]:
+            if reserva_inicio >= fim_dt:
+                break
+            if reserva_fim > inicio_dt:
+                conflito = True
+                break
+
+        horarios.append({
+            "inicio": faixa.rotulo_inicio,
+            "fim": faixa.rotulo_fim,
+            "range": f"{faixa.rotulo_inicio} - {faixa.rotulo_fim}",
+            "disponivel": not conflito and not inicio_dt < agora,
+        })
+    return horarios
+
+
+def faixas_iniciadas(data, grade=HORARIOS_PADRAO, agora=None):
+    """
+    Quantas faixas do dia ja comecaram (e por isso aparecem indisponiveis).
+
+    Sem queries: junto com a versao da sala identifica a resposta de
+    `horarios_da_sala`, que tambem muda com o passar do tempo.
+    """
+    agora = agora or timezone.now()
+    hoje = timezone.localdate(agora)
+    if data < hoje:
+        return len(grade)
+    if data > hoje:
+        return 0
+    return sum(1 for faixa in grade if timezone.make_aware(datetime.combine(data, faixa.inicio)) < agora)
+
+
+def horarios_da_sala(sala_id, data, agora=None, tipo=None):
+    """
+    Disponibilidade de uma sala em um dia usando uma unica query de reservas.
+
+    `tipo` (da sala) seleciona as grades por tipo; sem ele valem so as grades
+    da propria sala e as gerais. Em dia fechado retorna [] sem consultar.
+    """
+    grade = grades.obter().faixas(data, sala_id, tipo)
+    if not grade:
+        return []
+    return calcular_horarios(data, intervalos_reservados(sala_id, data), grade=grade, agora=agora)
+
+
+def intervalos_por_sala_e_dia(sala_ids, data_inicio, data_fim):
+    """
+    Agrupa as reservas ativas de varias salas em um periodo (1 query).
+
+    Retorna {(sala_id, data): [(inicio, fim), ...]} com as listas ordenadas por
+    inicio; uma reserva que atravessa a meia-noite aparece em todos os dias que toca.
+    """
+    inicio_periodo, _ = limites_do_dia(data_inicio)
+    _, fim_periodo = limites_do_dia(data_fim)
+    reservas = (
+        Reserva.objects.filter(
+            sala_id__in=sala_ids,
+            cancelada=False,
+            inicio__lt=fim_periodo,
+            fim__gt=inicio_periodo,
+        )
+        .order_by("inicio")
+        .values_list("sala_id", "inicio", "fim")
+    )
+    agrupados = {}
+    for sala_id, inicio, fim in reservas:
+        dia = max(timezone.localtime(inicio).date(), data_inicio)
+        ultimo_dia = min(timezone.localtime(fim).date(), data_fim)
+        while dia <= ultimo_dia:
+            agrupados.setdefault((sala_id, dia), []).append((inicio, fim))
+            dia += timedelta(days=1)
+    return agrupados
+
+
+def matriz_disponibilidade(sala_ids, data_inicio, data_fim, agora=None, tipos=None):
+    """
+    Disponibilidade sala x dia x faixa para um periodo, sem queries por sala/dia.
+
+    `tipos` ({sala_id: tipo}) seleciona as grades por tipo de cada sala.
+    Retorna {sala_id: {data: [horarios...]}} no formato de `calcular_horarios`.
+    """
+    agora = agora or timezone.now()
+    tipos = tipos or {}
+    compiladas = grades.obter()
+    intervalos = intervalos_por_sala_e_dia(sala_ids, data_inicio, data_fim)
+    dias = [data_inicio + timedelta(days=n) for n in range((data_fim - data_inicio).days + 1)]
+    return {
+        sala_id: {
+            dia: calcular_horarios(
+                dia,
+                intervalos.get((sala_id, dia), []),
+                grade=compiladas.faixas(dia, sala_id, tipos.get(sala_id)),
+                agora=agora,
+            )
+            for dia in dias
+        }
+        for sala_id in sala_ids
+    }
@@ -1,8 +1,13 @@
 import logging
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
 from django.utils import timezone
 
+from .models import EmailPendente
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,28 +21,119 @@ def _format_reserva(reserva):
     return data, horario_inicio, horario_fim
 
 
+def _smtp_configurado():
+    smtp_backend = "django.core.mail.backends.smtp.EmailBackend"
+    return not (
+        getattr(settings, "EMAIL_BACKEND", smtp_backend) == smtp_backend
+        and (not settings.EMAIL_HOST_USER or not settings.EMAIL_HOST_PASSWORD)
+    )
+
+
 def _send_email(subject, body, destinatario=None):
-    """Envia email usando o backend configurado no Django."""
+    """Grava o email na outbox; o envio fica a cargo do comando `processar_emails`."""
     to_email = destinatario or getattr(
         settings,
         "RESERVA_EMAIL_DESTINO",
         "coelho.danillo@academico.ifpb.edu.br",
     )
-    smtp_backend = "django.core.mail.backends.smtp.EmailBackend"
-    if (
-        getattr(settings, "EMAIL_BACKEND", smtp_backend) == smtp_backend
-        and (not settings.EMAIL_HOST_USER or not settings.EMAIL_HOST_PASSWORD)
-    ):
+    if not _smtp_configurado():
         logger.warning("Email SMTP nao configurado; pulando envio para %s", to_email)
         return
-    email = EmailMessage(
-        subject=subject,
-        body=body,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[to_email],
-    )
-    email.send(fail_silently=False)
-    logger.info("Email enviado para %s: %s", to_email, subject)
+    EmailPendente.objects.create(assunto=subject, corpo=body, destinatario=to_email)
+    logger.info("Email enfileirado para %s: %s", to_email, subject)
+
+
+def _backoff(tentativas):
+    """Atraso ate a proxima tentativa: base * 2^(tentativas-1), limitado."""
+    base = getattr(settings, "EMAIL_OUTBOX_BACKOFF_BASE", 60)
+    maximo = getattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX", 3600)
+    return timedelta(seconds=min(base * 2 ** (tentativas - 1), maximo))
+
+
+def _reservar_lote(limite):
+    """
+    Seleciona ate `limite` emails vencidos e adia sua proxima tentativa pelo
+    tempo de concessao, para que outro worker nao os pegue enquanto sao
+    enviados. Se o worker cair no meio do envio, eles voltam a fila depois.
+    """
+    agora = timezone.now()
+    concessao = timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_CONCESSAO", 300))
+    with transaction.atomic():
+        lote = list(
+            EmailPendente.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailPendente.STATUS_PENDENTE, proxima_tentativa__lte=agora)
+            .order_by("proxima_tentativa", "id")[:limite]
+        )
+        if lote:
+            EmailPendente.objects.filter(id__in=[e.id for e in lote]).update(
+                proxima_tentativa=agora + concessao
+            )
+    return lote
+
+
+def _registrar_falha(pendente, exc, max_tentativas):
+    """Conta a tentativa falha: reagenda com backoff ou desiste no limite."""
+    pendente.tentativas += 1
+    pendente.ultimo_erro = str(exc)
+    if pendente.tentativas >= max_tentativas:
+        pendente.status = EmailPendente.STATUS_FALHOU
+        logger.error("Email %s descartado apos %s tentativas: %s", pendente.id, pendente.tentativas, exc)
+    else:
+        pendente.proxima_tentativa = timezone.now() + _backoff(pendente.tentativas)
+        logger.warning("Falha ao enviar email %s (tentativa %s): %s", pendente.id, pendente.tentativas, exc)
+
+
+def processar_fila(limite=50):
+    """
+    Envia um lote da outbox reutilizando uma unica conexao SMTP.
+
+    Retorna a quantidade de emails processados (enviados ou reagendados).
+    """
+    lote = _reservar_lote(limite)
+    if not lote:
+        return 0
+
+    max_tentativas = getattr(settings, "EMAIL_OUTBOX_MAX_TENTATIVAS", 5)
+    campos = ["status", "tentativas", "proxima_tentativa", "ultimo_erro", "enviado_em"]
+    enviados = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # Sem conexao, o lote inteiro conta como tentativa falha: um SMTP
+        # quebrado recua pelo backoff e chega a "falhou" como um envio falho
+        logger.exception("Falha na conexao SMTP ao processar a outbox: %s", exc)
+        for pendente in lote:
+            _registrar_falha(pendente, exc, max_tentativas)
+            pendente.save(update_fields=campos)
+        connection.close()
+        return len(lote)
+
+    try:
+        for pendente in lote:
+            email = EmailMessage(
+                subject=pendente.assunto,
+                body=pendente.corpo,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[pendente.destinatario],
+                connection=connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as exc:
+                _registrar_falha(pendente, exc, max_tentativas)
+            else:
+                pendente.tentativas += 1
+                pendente.status = EmailPendente.STATUS_ENVIADO
+                pendente.enviado_em = timezone.now()
+                enviados += 1
+                logger.info("Email enviado para %s: %s", pendente.destinatario, pendente.assunto)
+            pendente.save(update_fields=campos)
+    finally:
+        connection.close()
+
+    logger.info("Outbox: %s de %s emails enviados", enviados, len(lote))
+    return len(lote)
 
 
 def enviar_confirmacao(reserva, destinatario=None):
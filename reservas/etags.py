@@ -0,0 +1,47 @@
+"""
+ETags fortes para GET condicional (`django.views.decorators.http.condition`).
+
+Cada ETag é derivado das versões de `versoes.py` e dos parâmetros da
+requisição, nunca do conteúdo: calculá-lo não consulta o banco. Com um
+If-None-Match igual, a view nem é executada e a resposta é 304.
+As funções retornam None (sem ETag) fora de GET/HEAD e com parâmetros
+inválidos, deixando a view responder normalmente.
+"""
+import hashlib
+from datetime import datetime
+
+from . import grades, versoes
+from .dashboard import ESCOPOS as ESCOPOS_DASHBOARD
+from .disponibilidade import faixas_iniciadas
+
+
+def _etag(*partes):
+    return hashlib.md5(":".join(str(p) for p in partes).encode()).hexdigest()
+
+
+def horarios_disponiveis(request, sala_id):
+    """Versões da sala e das grades + dia consultado + faixas do dia que já começaram."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    try:
+        data = datetime.strptime(request.GET.get("data") or "", "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    sala, grade = versoes.versoes(versoes.escopo_sala(sala_id), grades.ESCOPO)
+    # Conta os inícios de todas as grades: não depende de saber o tipo da sala
+    iniciadas = faixas_iniciadas(data, grades.obter().todas_as_faixas)
+    return _etag("horarios", sala, grade, data, iniciadas)
+
+
+def salas_admin(request):
+    """Versão das salas + página pedida."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    return _etag("salas_admin", versoes.versao("salas"), request.GET.get("page", 1))
+
+
+def dashboard(request):
+    """Versões de que dependem os totais do dashboard."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    return _etag("dashboard", *versoes.versoes(*ESCOPOS_DASHBOARD))
@@ -0,0 +1,173 @@
+"""
+Eventos em tempo real da disponibilidade de horários (server-sent events).
+
+Quando uma reserva é criada ou cancelada, `publicar_alteracao_de_reserva`
+recalcula as faixas afetadas daquela sala/dia (após o commit) e publica o
+delta no canal `horarios:<sala_id>:<data>`. A view `eventos_horarios`
+mantém uma conexão aberta por visitante e repassa esses deltas ao navegador.
+
+O broker é escolhido por EVENTOS_BROKER (caminho de import):
+- `BrokerEmMemoria` (padrão): pub/sub no processo; basta com um único worker.
+- `BrokerRedis`: pub/sub do Redis (EVENTOS_REDIS_URL), para vários workers
+  ou máquinas; exige o pacote `redis`.
+
+Um broker expõe `publicar(canal, mensagem)` (síncrono, chamado pelas views),
+`assinar(canal)` (context manager assíncrono que entrega uma fila com
+`await fila.get()`) e `tem_assinantes(canal)`.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from salas.models import Sala
+
+from .disponibilidade import horarios_da_sala
+
+logger = logging.getLogger(__name__)
+
+
+def canal_horarios(sala_id, data):
+    return f"horarios:{sala_id}:{data.isoformat()}"
+
+
+class BrokerEmMemoria:
+    """Pub/sub entre as conexões de um mesmo processo."""
+
+    TAMANHO_FILA = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinantes = defaultdict(set)
+
+    def tem_assinantes(self, canal):
+        with self._lock:
+            return bool(self._assinantes.get(canal))
+
+    def publicar(self, canal, mensagem):
+        # Pode ser chamado de qualquer thread: entrega pelo loop de cada assinante
+        with self._lock:
+            assinantes = list(self._assinantes.get(canal, ()))
+        for loop, fila in assinantes:
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, mensagem)
+            except RuntimeError:
+                # Loop já encerrado; a assinatura some no `finally` de `assinar`
+                pass
+
+    @staticmethod
+    def _entregar(fila, mensagem):
+        if fila.full():
+            # Cliente lento: descarta o delta mais antigo
+            fila.get_nowait()
+        fila.put_nowait(mensagem)
+
+    @asynccontextmanager
+    async def assinar(self, canal):
+        assinatura = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.TAMANHO_FILA))
+        with self._lock:
+            self._assinantes[canal].add(assinatura)
+        try:
+            yield assinatura[1]
+        finally:
+            with self._lock:
+                self._assinantes[canal].discard(assinatura)
+                if not self._assinantes[canal]:
+                    del self._assinantes[canal]
+
+
+class _FilaRedis:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self):
+        while True:
+            mensagem = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if mensagem is not None:
+                return json.loads(mensagem["data"])
+
+
+class BrokerRedis:
+    """Pub/sub do Redis: entrega os eventos a todos os workers."""
+
+    PREFIXO = "ifteca:eventos:"
+
+    def __init__(self, url=None):
+        try:
+            import redis  # noqa: F401
+        except ImportError as exc:
+            raise ImproperlyConfigured("BrokerRedis exige o pacote 'redis' (pip install redis).") from exc
+        self.url = url or settings.EVENTOS_REDIS_URL
+        self._cliente = None
+
+    def tem_assinantes(self, canal):
+        # Os assinantes podem estar em outros processos
+        return True
+
+    def publicar(self, canal, mensagem):
+        if self._cliente is None:
+            import redis
+            self._cliente = redis.Redis.from_url(self.url)
+        self._cliente.publish(self.PREFIXO + canal, json.dumps(mensagem))
+
+    @asynccontextmanager
+    async def assinar(self, canal):
+        import redis.asyncio as aioredis
+
+        cliente = aioredis.Redis.from_url(self.url)
+        pubsub = cliente.pubsub()
+        await pubsub.subscribe(self.PREFIXO + canal)
+        try:
+            yield _FilaRedis(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await cliente.aclose()
+
+
+@lru_cache(maxsize=None)
+def obter_broker():
+    """Instância única (por processo) do broker configurado em EVENTOS_BROKER."""
+    return import_string(getattr(settings, "EVENTOS_BROKER", "reservas.eventos.BrokerEmMemoria"))()
+
+
+def publicar_alteracao_de_reserva(sala_id, inicio, fim):
+    """
+    Publica o novo estado das faixas que o intervalo [inicio, fim) toca, em
+    cada dia afetado. Deve rodar após o commit (ver `signals.py`); falhas do
+    broker só são registradas, nunca derrubam a reserva.
+    """
+    broker = obter_broker()
+    tipo = None
+    dia = timezone.localtime(inicio).date()
+    ultimo_dia = timezone.localtime(fim - timedelta(microseconds=1)).date()
+    while dia <= ultimo_dia:
+        canal = canal_horarios(sala_id, dia)
+        try:
+            if broker.tem_assinantes(canal):
+                if tipo is None:
+                    tipo = Sala.objects.filter(id=sala_id).values_list("tipo", flat=True).first()
+                faixas = [
+                    h for h in horarios_da_sala(sala_id, dia, tipo=tipo)
+                    if _toca(dia, h, inicio, fim)
+                ]
+                broker.publicar(canal, {"sala_id": sala_id, "data": dia.isoformat(), "horarios": faixas})
+        except Exception:
+            logger.exception("Falha ao publicar horários de %s", canal)
+        dia += timedelta(days=1)
+
+
+def _toca(dia, horario, inicio, fim):
+    inicio_faixa, fim_faixa = (
+        timezone.make_aware(datetime.combine(dia, time.fromisoformat(h))) for h in (horario["inicio"], horario["fim"])
+    )
+    return inicio_faixa < fim and fim_faixa > inicio
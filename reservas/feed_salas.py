@@ -0,0 +1,67 @@
+"""
+Feed público de salas (GET /reservas/salas/publicas/).
+
+Quiosques e integrações consultam o feed o tempo todo, então cada página já
+serializada fica no cache com seu ETag e Last-Modified, sob uma chave que
+inclui a versão do escopo "salas" (ver `versoes.py`): salvar ou excluir uma
+sala invalida todas as páginas. Enquanto nada muda, uma consulta ao feed não
+toca o banco.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+
+from salas.models import Sala
+
+from . import versoes
+
+CAMPOS_PUBLICOS = ("id", "nome", "capacidade", "tipo", "localizacao", "equipamentos", "status", "descricao")
+CAMPOS_PADRAO = ("nome", "capacidade", "tipo")
+
+
+def _chave_cache(pagina, por_pagina, campos):
+    return f"salas_publicas:{versoes.versao('salas')}:{pagina}:{por_pagina or 'todas'}:{','.join(campos)}"
+
+
+def _montar_pagina(pagina, por_pagina, campos):
+    salas = Sala.objects.filter(ativo=True).order_by("nome", "id").values(*campos)
+    if por_pagina is None:
+        linhas = list(salas)
+        total, paginas = len(linhas), 1
+    else:
+        paginator = Paginator(salas, por_pagina)
+        page = paginator.page(pagina)  # EmptyPage/PageNotAnInteger sobem para a view
+        linhas = list(page.object_list)
+        total, paginas = paginator.count, paginator.num_pages
+
+    corpo = json.dumps(linhas, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    # Inclui salas inativas: desativar uma sala também é uma mudança no feed
+    ultima_alteracao = Sala.objects.aggregate(ultima=Max("atualizado_em"))["ultima"]
+    return {
+        "corpo": corpo,
+        "etag": f'"{hashlib.md5(corpo).hexdigest()}"',
+        "ultima_alteracao": ultima_alteracao,
+        "total": total,
+        "paginas": paginas,
+    }
+
+
+def obter_pagina(pagina, por_pagina, campos):
+    """
+    Página `pagina` do feed com os `campos` pedidos, servida do cache.
+    Com `por_pagina` None, todas as salas numa única página.
+
+    Retorna dict com `corpo` (JSON em bytes), `etag`, `ultima_alteracao`
+    (datetime ou None), `total` e `paginas`.
+    """
+    chave = _chave_cache(pagina, por_pagina, campos)
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = _montar_pagina(pagina, por_pagina, campos)
+        cache.set(chave, resultado, getattr(settings, "SALAS_PUBLICAS_CACHE_TTL", 300))
+    return resultado
@@ -0,0 +1,162 @@
+"""
+Grades de horários das salas, compiladas em memória.
+
+As grades (`GradeHorario`) e os fechamentos (`Fechamento`) mudam raramente e
+são consultados em toda disponibilidade e reserva. `obter()` os carrega uma
+vez por processo (2 queries) e expande cada grade nas suas faixas já
+convertidas; a estrutura é refeita quando a versão do escopo "grades" muda
+(ver `signals.py`, vale entre processos com o cache compartilhado) e, de
+qualquer forma, a cada GRADES_TTL segundos, para que um worker que perdeu
+a invalidação não continue aceitando reservas com a grade antiga.
+
+Resolução da grade de uma sala num dia, da mais específica à mais geral:
+sala + dia da semana, sala, tipo + dia da semana, tipo, geral + dia da
+semana, geral e, por fim, `HORARIOS_PADRAO`. Num fechamento não há faixas.
+"""
+import threading
+import time as relogio
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+
+from . import versoes
+from .models import Fechamento, GradeHorario
+
+ESCOPO = "grades"
+
+# Faixa de horario ja convertida: evita `strptime` a cada requisicao.
+Faixa = namedtuple("Faixa", ["inicio", "fim", "rotulo_inicio", "rotulo_fim"])
+
+
+def _faixa(inicio_str, fim_str):
+    return Faixa(time.fromisoformat(inicio_str), time.fromisoformat(fim_str), inicio_str, fim_str)
+
+
+# Horarios padrao (2 horas cada)
+HORARIOS_PADRAO = tuple(
+    _faixa(inicio, fim)
+    for inicio, fim in (
+        ("08:00", "10:00"),
+        ("10:00", "12:00"),
+        ("12:00", "14:00"),
+        ("14:00", "16:00"),
+        ("16:00", "18:00"),
+        ("18:00", "20:00"),
+        ("20:00", "22:00"),
+    )
+)
+
+
+def gerar_faixas(abertura, encerramento, duracao_minutos):
+    """Faixas consecutivas de `duracao_minutos`; a sobra antes do encerramento fica de fora."""
+    dia = datetime.min
+    atual = dia.replace(hour=abertura.hour, minute=abertura.minute)
+    limite = dia.replace(hour=encerramento.hour, minute=encerramento.minute)
+    passo = timedelta(minutes=duracao_minutos)
+    faixas = []
+    while atual + passo <= limite:
+        proxima = atual + passo
+        faixas.append(Faixa(atual.time(), proxima.time(), f"{atual:%H:%M}", f"{proxima:%H:%M}"))
+        atual = proxima
+    return tuple(faixas)
+
+
+class GradesCompiladas:
+    """Grades e fechamentos já resolvidos; consultá-los não acessa o banco."""
+
+    def __init__(self, grades=(), fechamentos=()):
+        # (escopo, dia_semana) -> faixas; escopo é ("sala", id), ("tipo", tipo) ou ("geral", None)
+        self._faixas = {}
+        for grade in grades:
+            if grade.sala_id:
+                escopo = ("sala", grade.sala_id)
+            elif grade.tipo:
+                escopo = ("tipo", grade.tipo)
+            else:
+                escopo = ("geral", None)
+            # Em caso de repetição, a grade cadastrada por último prevalece
+            self._faixas[(escopo, grade.dia_semana)] = gerar_faixas(
+                grade.abertura, grade.encerramento, grade.duracao_minutos
+            )
+        self._fechamentos = set(fechamentos)
+        # Posição de cada início de faixa, por grade, para validar reservas
+        self._posicoes = {
+            faixas: {f.inicio: i for i, f in enumerate(faixas)}
+            for faixas in {HORARIOS_PADRAO, *self._faixas.values()}
+        }
+        # Uma faixa por horário de início existente em qualquer grade: o ETag
+        # da disponibilidade muda sempre que alguma delas começa
+        por_inicio = {f.inicio: f for faixas in self._posicoes for f in faixas}
+        self.todas_as_faixas = tuple(por_inicio[inicio] for inicio in sorted(por_inicio))
+
+    def fechada(self, data, sala_id=None):
+        return (None, data) in self._fechamentos or (sala_id, data) in self._fechamentos
+
+    def _grade(self, data, sala_id, tipo):
+        dia_semana = data.weekday()
+        for escopo in (("sala", sala_id), ("tipo", tipo), ("geral", None)):
+            if escopo[1] is None and escopo[0] != "geral":
+                continue
+            for dia in (dia_semana, None):
+                faixas = self._faixas.get((escopo, dia))
+                if faixas is not None:
+                    return faixas
+        return HORARIOS_PADRAO
+
+    def faixas(self, data, sala_id=None, tipo=None):
+        """Faixas reserváveis da sala no dia (vazio se fechada)."""
+        if self.fechada(data, sala_id):
+            return ()
+        return self._grade(data, sala_id, tipo)
+
+    def permite(self, data, inicio, fim, sala_id=None, tipo=None):
+        """
+        Se [inicio, fim) coincide com faixas da sala no dia: começa no início de
+        uma faixa e termina no fim dela ou de uma faixa seguinte, sem lacunas.
+        Intervalos desalinhados (09:17-10:03) escapariam da constraint
+        (sala, inicio) e da visão por faixas.
+        """
+        faixas = self.faixas(data, sala_id, tipo)
+        posicao = self._posicoes.get(faixas, {}).get(inicio)
+        if posicao is None:
+            return False
+        for anterior, faixa in zip((None, *faixas[posicao:]), faixas[posicao:]):
+            if anterior is not None and faixa.inicio != anterior.fim:
+                return False
+            if faixa.fim == fim:
+                return True
+            if faixa.fim > fim:
+                return False
+        return False
+
+
+_lock = threading.Lock()
+_compiladas = (None, None, 0.0)  # (versão, GradesCompiladas, compilada em)
+
+
+def compilar():
+    """Lê as grades ativas e os fechamentos do banco (2 queries)."""
+    return GradesCompiladas(
+        GradeHorario.objects.filter(ativo=True).order_by("id"),
+        Fechamento.objects.order_by().values_list("sala_id", "data"),
+    )
+
+
+def _vencida(versao, compilada_em, atual, agora):
+    return versao != atual or agora - compilada_em >= getattr(settings, "GRADES_TTL", 60)
+
+
+def obter():
+    """Grades compiladas deste processo, refeitas quando a versão muda ou o TTL vence."""
+    global _compiladas
+    atual = versoes.versao(ESCOPO)
+    versao, compiladas, compilada_em = _compiladas
+    if _vencida(versao, compilada_em, atual, relogio.monotonic()):
+        with _lock:
+            versao, compiladas, compilada_em = _compiladas
+            agora = relogio.monotonic()
+            if _vencida(versao, compilada_em, atual, agora):
+                compiladas = compilar()
+                _compiladas = (atual, compiladas, agora)
+    return compiladas
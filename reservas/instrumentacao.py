@@ -0,0 +1,186 @@
+"""
+Instrumentação por requisição: tempo total, consultas e tempo de banco,
+tempo de renderização de templates e tamanho da resposta.
+
+`InstrumentacaoMiddleware` anota cada resposta com o cabeçalho
+`Server-Timing` (visível no DevTools), registra uma linha JSON no logger
+`ifteca.requisicoes` e alimenta uma janela deslizante por nome de rota, da
+qual `resumo()` calcula percentis (servido pela view `api_metricas_requisicoes`).
+
+As janelas ficam na memória de cada processo: com vários workers, cada um
+reporta o tráfego que atendeu.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger("ifteca.requisicoes")
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por interpolação linear entre os vizinhos."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = math.floor(posicao)
+    alto = math.ceil(posicao)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+# Acumulador de tempo de template da requisição corrente: [ms, profundidade]
+_template_atual = ContextVar("template_atual", default=None)
+
+
+def _instalar_medicao_de_templates():
+    """Envolve Template.render uma única vez; só mede dentro de uma requisição."""
+    if getattr(Template.render, "_instrumentado", False):
+        return
+    render_original = Template.render
+
+    def render(self, context):
+        acumulador = _template_atual.get()
+        if acumulador is None:
+            return render_original(self, context)
+        # Includes/extends renderizam templates aninhados: conta só o externo
+        acumulador[1] += 1
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, context)
+        finally:
+            acumulador[1] -= 1
+            if acumulador[1] == 0:
+                acumulador[0] += (time.perf_counter() - inicio) * 1000
+
+    render._instrumentado = True
+    Template.render = render
+
+
+class JanelaDeMetricas:
+    """Últimas `tamanho` medições por rota, com percentis sob demanda."""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._janelas = defaultdict(lambda: deque(maxlen=self.tamanho))
+        self._totais = defaultdict(int)
+
+    def registrar(self, rota, medida):
+        with self._lock:
+            self._janelas[rota].append(medida)
+            self._totais[rota] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._janelas.clear()
+            self._totais.clear()
+
+    def resumo(self):
+        with self._lock:
+            copias = {rota: list(janela) for rota, janela in self._janelas.items()}
+            totais = dict(self._totais)
+
+        resultado = {}
+        for rota, medidas in sorted(copias.items()):
+            total_ms = [m["total_ms"] for m in medidas]
+            banco_ms = [m["banco_ms"] for m in medidas]
+            template_ms = [m["template_ms"] for m in medidas]
+            consultas = [m["consultas"] for m in medidas]
+            tamanhos = [m["bytes"] for m in medidas if m["bytes"] is not None]
+            resultado[rota] = {
+                "requisicoes": totais[rota],
+                "janela": len(medidas),
+                "total_ms": {
+                    "p50": round(percentil(total_ms, 50), 3),
+                    "p95": round(percentil(total_ms, 95), 3),
+                    "p99": round(percentil(total_ms, 99), 3),
+                    "max": round(max(total_ms), 3),
+                },
+                "banco_ms": {"p50": round(percentil(banco_ms, 50), 3), "p95": round(percentil(banco_ms, 95), 3)},
+                "template_ms": {
+                    "p50": round(percentil(template_ms, 50), 3),
+                    "p95": round(percentil(template_ms, 95), 3),
+                },
+                "consultas": {"p50": percentil(consultas, 50), "p95": percentil(consultas, 95), "max": max(consultas)},
+                "bytes_medio": round(sum(tamanhos) / len(tamanhos)) if tamanhos else None,
+                "status_5xx": sum(1 for m in medidas if m["status"] >= 500),
+            }
+        return resultado
+
+
+janela = JanelaDeMetricas(getattr(settings, "INSTRUMENTACAO_JANELA", 500))
+
+
+def resumo():
+    """Percentis por rota das requisições atendidas por este processo."""
+    return janela.resumo()
+
+
+class InstrumentacaoMiddleware:
+    """Mede a requisição inteira; deve ser o primeiro middleware da lista."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTACAO_ATIVA", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instalar_medicao_de_templates()
+
+    def __call__(self, request):
+        banco = {"consultas": 0, "ms": 0.0}
+
+        def medir_consulta(execute, sql, params, many, context):
+            inicio_consulta = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                banco["consultas"] += 1
+                banco["ms"] += (time.perf_counter() - inicio_consulta) * 1000
+
+        acumulador = [0.0, 0]
+        token = _template_atual.set(acumulador)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(medir_consulta))
+                response = self.get_response(request)
+        finally:
+            _template_atual.reset(token)
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        rota = match.view_name if match else None
+        medida = {
+            "rota": rota,
+            "metodo": request.method,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 3),
+            "consultas": banco["consultas"],
+            "banco_ms": round(banco["ms"], 3),
+            "template_ms": round(acumulador[0], 3),
+            "bytes": None if response.streaming else len(response.content),
+        }
+
+        timing = (
+            f'total;dur={medida["total_ms"]:.1f}, '
+            f'db;dur={medida["banco_ms"]:.1f};desc="{medida["consultas"]} consultas", '
+            f'tpl;dur={medida["template_ms"]:.1f}'
+        )
+        if response.has_header("Server-Timing"):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response["Server-Timing"] = timing
+
+        logger.info(json.dumps({"caminho": request.path, **medida}, ensure_ascii=False))
+        if rota:
+            janela.registrar(rota, medida)
+        return response
@@ -0,0 +1,119 @@
+import json
+import platform
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from reservas import perf
+from reservas.carga import gerar_dados_carga
+
+
+class Command(BaseCommand):
+    help = (
+        "Popula um banco descartável e mede p50/p95 e consultas por requisição dos "
+        "endpoints de salas e reservas. Resultado em JSON para comparação entre versões."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salas", type=int, default=200, help="Salas geradas (padrão: 200).")
+        parser.add_argument("--usuarios", type=int, default=5000, help="Usuários gerados (padrão: 5000).")
+        parser.add_argument("--reservas", type=int, default=100_000, help="Reservas geradas (padrão: 100000).")
+        parser.add_argument("--seed", type=int, default=42, help="Semente dos dados (padrão: 42).")
+        parser.add_argument(
+            "--data-referencia",
+            type=date.fromisoformat,
+            default=None,
+            help="Data 'hoje' dos dados gerados (AAAA-MM-DD; padrão: hoje).",
+        )
+        parser.add_argument(
+            "--repeticoes", type=int, default=50, help="Requisições medidas por endpoint (padrão: 50)."
+        )
+        parser.add_argument(
+            "--endpoint", action="append", dest="endpoints", help="Mede só este endpoint (repetível)."
+        )
+        parser.add_argument("--saida", help="Grava o resultado JSON neste arquivo (padrão: stdout).")
+        parser.add_argument("--comparar", help="JSON de uma execução anterior para apontar regressões.")
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=20.0,
+            help="Aumento de p95 (%%) tolerado na comparação (padrão: 20).",
+        )
+
+    def handle(self, *args, **options):
+        base = None
+        if options["comparar"]:
+            with open(options["comparar"], encoding="utf-8") as arquivo:
+                base = json.load(arquivo)["endpoints"]
+
+        # Cache em memória próprio: o cache.clear() abaixo não pode apagar
+        # sessões, versões e caches do cache compartilhado de produção. O
+        # Client de teste usa o host "testserver".
+        isolado = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "benchmark_endpoints",
+                }
+            },
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        )
+        with isolado:
+            nome_original = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                self.stderr.write(f"Populando banco de teste ({connection.vendor})...")
+                gerados = gerar_dados_carga(
+                    salas=options["salas"],
+                    usuarios=options["usuarios"],
+                    reservas=options["reservas"],
+                    seed=options["seed"],
+                    data_referencia=options["data_referencia"],
+                    log=self.stderr.write,
+                )
+                cache.clear()
+                self.stderr.write(f"Medindo {options['repeticoes']} requisições por endpoint...")
+                endpoints = perf.executar(
+                    repeticoes=options["repeticoes"],
+                    hoje=options["data_referencia"],
+                    somente=options["endpoints"],
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            finally:
+                connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+        resultado = {
+            "meta": {
+                "executado_em": timezone.now().isoformat(),
+                "banco": connection.vendor,
+                "python": platform.python_version(),
+                "seed": options["seed"],
+                "repeticoes": options["repeticoes"],
+                "dados": gerados,
+            },
+            "endpoints": endpoints,
+        }
+        saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options["saida"]:
+            with open(options["saida"], "w", encoding="utf-8") as arquivo:
+                arquivo.write(saida + "\n")
+        else:
+            self.stdout.write(saida)
+
+        for nome, medida in endpoints.items():
+            self.stderr.write(
+                f"{nome:<26} p50 {medida['p50_ms']:8.2f} ms  p95 {medida['p95_ms']:8.2f} ms  "
+                f"consultas {medida['consultas_max']:>3}  status {medida['status']}"
+            )
+
+        if base is not None:
+            regressoes = perf.comparar(base, endpoints, options["tolerancia"])
+            if regressoes:
+                raise CommandError("Regressões encontradas:\n  " + "\n  ".join(regressoes))
+            self.stderr.write(self.style.SUCCESS("Nenhuma regressão em relação à execução anterior."))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservas.email_service import processar_fila
+
+
+class Command(BaseCommand):
+    help = "Envia os e-mails pendentes da outbox em lotes, reutilizando uma conexão SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=50, help="E-mails por lote (padrão: 50).")
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5.0,
+            help="Segundos de espera quando a fila está vazia (padrão: 5).",
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Esvazia a fila e encerra, em vez de rodar continuamente.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        total = 0
+        try:
+            while True:
+                processados = processar_fila(limite=lote)
+                total += processados
+                if processados:
+                    continue
+                if options["uma_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} e-mail(s) processado(s)."))
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0005_alter_reserva_sala'),
+        ('salas', '0009_alter_sala_nome_sala_unique_nome_sala_ativa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('cancelada', False)), fields=['sala', 'inicio', 'fim'], name='reserva_sala_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('cancelada', False)), fields=['usuario', 'fim', 'inicio'], name='reserva_usuario_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['usuario', 'inicio'], name='reserva_usuario_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['inicio'], name='reserva_inicio_idx'),
+        ),
+    ]
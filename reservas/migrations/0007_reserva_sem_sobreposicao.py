@@ -0,0 +1,73 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:27
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+logger = logging.getLogger(__name__)
+
+EXCLUSION_CONSTRAINT = "reserva_sem_sobreposicao_ativa"
+
+
+def cancelar_sobreposicoes(apps, schema_editor):
+    """
+    Cancela as reservas ativas que colidem com outra mais antiga (menor id) na
+    mesma sala, para que as constraints abaixo possam ser criadas em bases que
+    já têm reservas duplicadas. A mais antiga de cada colisão é mantida.
+    """
+    Reserva = apps.get_model('reservas', 'Reserva')
+    ativas = Reserva.objects.using(schema_editor.connection.alias).filter(cancelada=False)
+    anteriores = ativas.filter(
+        sala=OuterRef('sala'), id__lt=OuterRef('id'), inicio__lt=OuterRef('fim'), fim__gt=OuterRef('inicio'),
+    )
+    # Só as reservas com alguma colisão anterior são candidatas; em ordem de id,
+    # cada uma é reavaliada, pois a reserva com que colidia pode ter sido cancelada
+    candidatas = list(
+        ativas.filter(Exists(anteriores)).order_by('id').values_list('id', 'sala_id', 'inicio', 'usuario')
+    )
+    for reserva_id, sala_id, inicio, usuario in candidatas:
+        if ativas.filter(Exists(anteriores), id=reserva_id).exists():
+            ativas.filter(id=reserva_id).update(cancelada=True)
+            logger.warning(
+                "Reserva %s (sala %s, %s, %s) cancelada: sobrepõe uma reserva anterior",
+                reserva_id, sala_id, inicio, usuario,
+            )
+
+
+def criar_exclusion_constraint(apps, schema_editor):
+    """No PostgreSQL, impede qualquer sobreposição de reservas ativas na mesma sala."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE reservas_reserva ADD CONSTRAINT {EXCLUSION_CONSTRAINT} "
+        "EXCLUDE USING gist (sala_id WITH =, tstzrange(inicio, fim) WITH &&) "
+        "WHERE (NOT cancelada)"
+    )
+
+
+def remover_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE reservas_reserva DROP CONSTRAINT IF EXISTS {EXCLUSION_CONSTRAINT}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0006_reserva_indices'),
+        ('salas', '0009_alter_sala_nome_sala_unique_nome_sala_ativa'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancelar_sobreposicoes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('cancelada', False)), fields=('sala', 'inicio'), name='reserva_unica_sala_inicio_ativa'),
+        ),
+        migrations.RunPython(criar_exclusion_constraint, remover_exclusion_constraint),
+    ]
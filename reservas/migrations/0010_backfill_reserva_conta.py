@@ -0,0 +1,47 @@
+"""
+Preenche Reserva.conta a partir do username guardado em Reserva.usuario.
+
+Roda em lotes por faixa de id, cada lote em sua própria transação
+(migration não atômica), para não segurar o lock da tabela por muito tempo
+em bases grandes. Pode ser reexecutada: só toca reservas com conta vazia.
+"""
+from django.conf import settings
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery
+
+
+TAMANHO_LOTE = 5000
+
+
+def preencher_conta(apps, schema_editor):
+    Reserva = apps.get_model('reservas', 'Reserva')
+    # Mesmo modelo para o qual aponta a FK `conta`
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    db_alias = schema_editor.connection.alias
+
+    pendentes = Reserva.objects.using(db_alias).filter(conta__isnull=True)
+    primeiro = pendentes.order_by('id').values_list('id', flat=True).first()
+    ultimo = pendentes.order_by('-id').values_list('id', flat=True).first()
+    if primeiro is None:
+        return
+
+    conta_por_username = Subquery(
+        User.objects.using(db_alias).filter(username=OuterRef('usuario')).values('id')[:1]
+    )
+    for inicio in range(primeiro, ultimo + 1, TAMANHO_LOTE):
+        with transaction.atomic(using=db_alias):
+            pendentes.filter(id__gte=inicio, id__lt=inicio + TAMANHO_LOTE).update(
+                conta_id=conta_por_username
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('reservas', '0009_reserva_conta'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_conta, migrations.RunPython.noop),
+    ]
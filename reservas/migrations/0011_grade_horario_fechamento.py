@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-17 21:07
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0010_backfill_reserva_conta'),
+        ('salas', '0010_sala_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Fechamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('motivo', models.CharField(blank=True, default='', max_length=255, verbose_name='Motivo')),
+                ('sala', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fechamentos', to='salas.sala', verbose_name='Sala')),
+            ],
+            options={
+                'verbose_name': 'Fechamento',
+                'verbose_name_plural': 'Fechamentos',
+                'ordering': ['data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeHorario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(blank=True, choices=[('Coletiva', 'Coletiva'), ('Auditorio', 'Auditorio')], max_length=50, verbose_name='Tipo de sala')),
+                ('dia_semana', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], null=True, verbose_name='Dia da semana')),
+                ('abertura', models.TimeField(verbose_name='Abertura')),
+                ('encerramento', models.TimeField(verbose_name='Encerramento')),
+                ('duracao_minutos', models.PositiveSmallIntegerField(default=120, validators=[django.core.validators.MinValueValidator(15)], verbose_name='Duração de cada faixa (min)')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('sala', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grades_horario', to='salas.sala', verbose_name='Sala')),
+            ],
+            options={
+                'verbose_name': 'Grade de horários',
+                'verbose_name_plural': 'Grades de horários',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,6 +1,12 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
+from salas.models import Sala
+
 
 # Agora usamos o modelo canônico `salas.Sala` para evitar duplicação.
 # A migration criada atualiza os FKs e remove o modelo duplicado em `reservas`.
@@ -11,18 +17,23 @@ class Reserva(models.Model):
         related_name="reservas",
     )
 
-    # NOTA: Campo usuario usa CharField por razões históricas
-    # TODO: Em refatoração futura, migrar para ForeignKey('auth.User')
-    # Isso permitirá:
-    # - Relacionamento real com tabela de usuários
-    # - Queries complexas e relatórios melhores
-    # - Integridade referencial adequada
-    # - Suporte a mudanças de username sem perder histórico
+    # NOTA: Campo usuario guarda o username por razões históricas e continua
+    # sendo preenchido (histórico legível mesmo se o usuário for removido).
+    # Relacionamento real com a tabela de usuários fica em `conta`.
     usuario = models.CharField(
         max_length=100,
         verbose_name="Usuário",
     )
 
+    conta = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,  # Preserva o histórico se o usuário for removido
+        related_name="reservas",
+        null=True,
+        blank=True,
+        verbose_name="Conta do usuário",
+    )
+
     inicio = models.DateTimeField(
         verbose_name="Início da Reserva",
     )
@@ -39,7 +50,181 @@ class Reserva(models.Model):
     def __str__(self):
         return f"Reserva da sala {self.sala.nome} em {self.inicio.strftime('%d/%m/%Y %H:%M')}"
 
+    def save(self, *args, **kwargs):
+        # Mantém `usuario` e `conta` sincronizados em reservas novas. Quem já
+        # tem o usuário em mãos (ex.: request.user) deve passar `conta` e
+        # evitar a busca por username, que fica só como fallback.
+        if self._state.adding:
+            if self.conta_id is None and self.usuario:
+                self.conta = get_user_model().objects.filter(username=self.usuario).first()
+            elif self.conta_id is not None and not self.usuario:
+                self.usuario = self.conta.username
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
         ordering = ["inicio"]
+        # Índices alinhados aos predicados das consultas mais frequentes.
+        # Os parciais cobrem apenas reservas ativas (cancelada=False).
+        indexes = [
+            # Conflito na sala (api_criar_reserva) e disponibilidade do dia
+            models.Index(
+                fields=["sala", "inicio", "fim"],
+                condition=models.Q(cancelada=False),
+                name="reserva_sala_ativa_idx",
+            ),
+            # Conflito do usuário e reservas ativas em minhas_reservas
+            models.Index(
+                fields=["usuario", "fim", "inicio"],
+                condition=models.Q(cancelada=False),
+                name="reserva_usuario_ativa_idx",
+            ),
+            # Histórico e total do usuário (ordenado por inicio)
+            models.Index(fields=["usuario", "inicio"], name="reserva_usuario_inicio_idx"),
+            # Contagens por período do dashboard (inicio__gte, TruncMonth)
+            models.Index(fields=["inicio"], name="reserva_inicio_idx"),
+        ]
+        constraints = [
+            # Garante no banco que duas reservas ativas não ocupem o mesmo
+            # início na mesma sala, mesmo com requisições concorrentes.
+            # No PostgreSQL a migration 0007 adiciona também uma exclusion
+            # constraint contra qualquer sobreposição de intervalos.
+            models.UniqueConstraint(
+                fields=["sala", "inicio"],
+                condition=models.Q(cancelada=False),
+                name="reserva_unica_sala_inicio_ativa",
+            ),
+        ]
+
+
+class EmailPendente(models.Model):
+    """
+    Outbox de notificações por e-mail.
+
+    As views apenas gravam a mensagem aqui; o comando `processar_emails`
+    envia em lotes por uma única conexão SMTP, com novas tentativas e backoff.
+    """
+    STATUS_PENDENTE = "pendente"
+    STATUS_ENVIADO = "enviado"
+    STATUS_FALHOU = "falhou"
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, "Pendente"),
+        (STATUS_ENVIADO, "Enviado"),
+        (STATUS_FALHOU, "Falhou"),
+    ]
+
+    assunto = models.CharField(max_length=255, verbose_name="Assunto")
+    corpo = models.TextField(verbose_name="Corpo")
+    destinatario = models.EmailField(verbose_name="Destinatário")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDENTE,
+        verbose_name="Status",
+    )
+    tentativas = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    proxima_tentativa = models.DateTimeField(default=timezone.now, verbose_name="Próxima tentativa")
+    ultimo_erro = models.TextField(blank=True, default="", verbose_name="Último erro")
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(blank=True, null=True, verbose_name="Enviado em")
+
+    def __str__(self):
+        return f"{self.assunto} -> {self.destinatario} ({self.status})"
+
+    class Meta:
+        verbose_name = "E-mail pendente"
+        verbose_name_plural = "E-mails pendentes"
+        ordering = ["proxima_tentativa"]
+        indexes = [
+            # Fila do worker: pendentes cuja próxima tentativa já venceu
+            models.Index(fields=["status", "proxima_tentativa"], name="email_fila_idx"),
+        ]
+
+
+class GradeHorario(models.Model):
+    """
+    Grade de horários reserváveis: faixas de `duracao_minutos` entre
+    `abertura` e `encerramento`.
+
+    Vale para uma sala, para todas as salas de um tipo ou, sem nenhum dos
+    dois, para todas as salas; `dia_semana` vazio vale para todos os dias.
+    A mais específica prevalece (ver `reservas/grades.py`); sem nenhuma grade
+    cadastrada vale `HORARIOS_PADRAO`.
+    """
+    DIAS_SEMANA = [
+        (0, "Segunda-feira"),
+        (1, "Terça-feira"),
+        (2, "Quarta-feira"),
+        (3, "Quinta-feira"),
+        (4, "Sexta-feira"),
+        (5, "Sábado"),
+        (6, "Domingo"),
+    ]
+
+    sala = models.ForeignKey(
+        'salas.Sala',
+        on_delete=models.CASCADE,
+        related_name="grades_horario",
+        null=True,
+        blank=True,
+        verbose_name="Sala",
+    )
+    tipo = models.CharField(
+        max_length=50,
+        choices=Sala.TIPO_CHOICES,
+        blank=True,
+        verbose_name="Tipo de sala",
+    )
+    dia_semana = models.PositiveSmallIntegerField(
+        choices=DIAS_SEMANA,
+        null=True,
+        blank=True,
+        verbose_name="Dia da semana",
+    )
+    abertura = models.TimeField(verbose_name="Abertura")
+    encerramento = models.TimeField(verbose_name="Encerramento")
+    duracao_minutos = models.PositiveSmallIntegerField(
+        default=120,
+        validators=[MinValueValidator(15)],
+        verbose_name="Duração de cada faixa (min)",
+    )
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+
+    def __str__(self):
+        alvo = self.sala or self.tipo or "Todas as salas"
+        dia = self.get_dia_semana_display() if self.dia_semana is not None else "todos os dias"
+        return f"{alvo} - {dia} ({self.abertura:%H:%M}-{self.encerramento:%H:%M}, {self.duracao_minutos} min)"
+
+    def clean(self):
+        if self.sala_id and self.tipo:
+            raise ValidationError("Informe a sala ou o tipo de sala, não ambos.")
+        if self.abertura and self.encerramento and self.abertura >= self.encerramento:
+            raise ValidationError({"encerramento": "O encerramento deve ser posterior à abertura."})
+
+    class Meta:
+        verbose_name = "Grade de horários"
+        verbose_name_plural = "Grades de horários"
+        ordering = ["id"]
+
+
+class Fechamento(models.Model):
+    """Data em que uma sala (ou, sem sala, a biblioteca inteira) não abre."""
+    sala = models.ForeignKey(
+        'salas.Sala',
+        on_delete=models.CASCADE,
+        related_name="fechamentos",
+        null=True,
+        blank=True,
+        verbose_name="Sala",
+    )
+    data = models.DateField(verbose_name="Data")
+    motivo = models.CharField(max_length=255, blank=True, default="", verbose_name="Motivo")
+
+    def __str__(self):
+        return f"{self.sala or 'Biblioteca'} fechada em {self.data:%d/%m/%Y}"
+
+    class Meta:
+        verbose_name = "Fechamento"
+        verbose_name_plural = "Fechamentos"
+        ordering = ["data"]
@@ -0,0 +1,167 @@
+"""
+Medição de desempenho das views: latência e número de consultas por requisição.
+
+Usado pelo comando `benchmark_endpoints`, que popula um banco descartável com
+`carga.gerar_dados_carga` e percorre os cenários abaixo com o test client. O
+resultado é um dicionário serializável em JSON; `comparar` aponta regressões
+de p95 e de consultas em relação a um resultado anterior.
+"""
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from salas.models import Sala
+
+from .carga import DOMINIO_EMAIL, PREFIXO_SALA
+from .instrumentacao import percentil
+
+
+def resumir(tempos_ms, consultas, status):
+    return {
+        "requisicoes": len(tempos_ms),
+        "p50_ms": round(percentil(tempos_ms, 50), 3),
+        "p95_ms": round(percentil(tempos_ms, 95), 3),
+        "media_ms": round(sum(tempos_ms) / len(tempos_ms), 3) if tempos_ms else 0.0,
+        "max_ms": round(max(tempos_ms, default=0.0), 3),
+        "consultas_p50": percentil(consultas, 50),
+        "consultas_max": max(consultas, default=0),
+        "status": sorted(set(status)),
+    }
+
+
+def medir(requisicao, repeticoes, aquecimento=1):
+    """
+    Executa `requisicao(i)` `repeticoes` vezes, medindo tempo e consultas.
+
+    As primeiras `aquecimento` chamadas não entram na estatística (carregam
+    templates, URLconf, sessão).
+    """
+    for i in range(aquecimento):
+        requisicao(-1 - i)
+
+    tempos_ms, consultas, status = [], [], []
+    for i in range(repeticoes):
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            resposta = requisicao(i)
+            tempos_ms.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(ctx.captured_queries))
+        status.append(resposta.status_code)
+    return resumir(tempos_ms, consultas, status)
+
+
+def _cliente(usuario):
+    cliente = Client()
+    cliente.force_login(usuario)
+    return cliente
+
+
+def cenarios(hoje=None):
+    """
+    Cenários dos hot paths: {nome: função(i) -> resposta}.
+
+    Usa as salas e usuários de carga já existentes no banco; cria um
+    administrador e um estudante sem reservas (para as reservas novas).
+    """
+    hoje = hoje or timezone.localdate()
+    salas = list(
+        Sala.objects.filter(nome__startswith=PREFIXO_SALA, ativo=True, status="Disponivel")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not salas:
+        raise ValueError("Nenhuma sala de carga no banco; gere os dados com gerar_dados_carga.")
+
+    admin, _ = User.objects.get_or_create(
+        username="benchmark.admin",
+        defaults={"email": f"benchmark.admin{DOMINIO_EMAIL}", "is_staff": True, "is_superuser": True},
+    )
+    novato, _ = User.objects.get_or_create(
+        username="2099benchmark",
+        defaults={"email": f"2099benchmark{DOMINIO_EMAIL}"},
+    )
+    # Estudante com mais reservas: pior caso de minhas_reservas
+    veterano = (
+        User.objects.filter(email__endswith=DOMINIO_EMAIL, is_staff=False)
+        .annotate(total=Count("reservas"))
+        .order_by("-total", "id")
+        .first()
+    )
+
+    cliente_admin = _cliente(admin)
+    cliente_novato = _cliente(novato)
+    cliente_veterano = _cliente(veterano)
+    # Reservas novas ficam depois de qualquer dado gerado (um dia por requisição)
+    primeiro_dia_livre = max(hoje, timezone.localdate()) + timedelta(days=400)
+
+    def dia_da_reserva(i):
+        # O aquecimento (i = -1, -2, ...) reserva nos dias anteriores aos medidos
+        if i < 0:
+            return primeiro_dia_livre - timedelta(days=-i)
+        return primeiro_dia_livre + timedelta(days=i)
+
+    def horarios(i):
+        url = reverse("api_horarios_disponiveis", args=[salas[i % len(salas)]])
+        return cliente_veterano.get(url, {"data": hoje.isoformat()})
+
+    def criar_reserva(i):
+        corpo = {
+            "sala_id": salas[i % len(salas)],
+            "data": dia_da_reserva(i).isoformat(),
+            "inicio": "10:00",
+            "fim": "12:00",
+        }
+        return cliente_novato.post(
+            reverse("api_criar_reserva"), json.dumps(corpo), content_type="application/json"
+        )
+
+    return {
+        "api_horarios_disponiveis": horarios,
+        "api_criar_reserva": criar_reserva,
+        "minhas_reservas": lambda i: cliente_veterano.get(reverse("minhas_reservas")),
+        "admin_reservas": lambda i: cliente_admin.get(reverse("admin_reservas")),
+        "gerenciar_usuarios": lambda i: cliente_admin.get(reverse("gerenciar_usuarios")),
+        "admin_dashboard": lambda i: cliente_admin.get(reverse("admin_dashboard")),
+        "salas_admin": lambda i: cliente_admin.get(reverse("salas_admin")),
+    }
+
+
+def executar(repeticoes=50, hoje=None, somente=None):
+    """Mede todos os cenários (ou os de `somente`) e retorna {nome: resumo}."""
+    resultado = {}
+    for nome, requisicao in cenarios(hoje).items():
+        if somente and nome not in somente:
+            continue
+        resultado[nome] = medir(requisicao, repeticoes)
+    return resultado
+
+
+def comparar(base, atual, tolerancia_pct=20.0):
+    """
+    Regressões de `atual` em relação a `base` (ambos no formato de `executar`):
+    p95 acima da tolerância ou mais consultas por requisição.
+    """
+    regressoes = []
+    for nome, medida in atual.items():
+        anterior = base.get(nome)
+        if not anterior:
+            continue
+        limite = anterior["p95_ms"] * (1 + tolerancia_pct / 100)
+        if medida["p95_ms"] > limite:
+            regressoes.append(
+                f"{nome}: p95 {anterior['p95_ms']:.2f} ms -> {medida['p95_ms']:.2f} ms "
+                f"(tolerância {tolerancia_pct:g}%)"
+            )
+        if medida["consultas_max"] > anterior["consultas_max"]:
+            regressoes.append(
+                f"{nome}: consultas {anterior['consultas_max']} -> {medida['consultas_max']}"
+            )
+    return regressoes
@@ -0,0 +1,124 @@
+"""
+Perfilamento sob demanda de requisições lentas (cProfile).
+
+Desligado por padrão (PERFIL_ATIVO). Quando ligado, `PerfilamentoMiddleware`
+perfila:
+- toda requisição de um usuário staff que envie o cabeçalho `X-Perfil: 1`
+  ou o parâmetro `?_perfil=1` (o nome do arquivo volta no cabeçalho
+  `X-Perfil`);
+- uma amostra (PERFIL_AMOSTRAGEM) das demais, guardando o perfil só quando a
+  requisição passa de PERFIL_LIMIAR_MS.
+
+Toda requisição é cronometrada (custo desprezível): uma que passa do limiar
+sem ter sido perfilada é registrada no log com a rota, para que endpoints
+lentos apareçam mesmo fora da amostra. PERFIL_AMOSTRAGEM=1 perfila todas e
+guarda só as lentas, mas o cProfile deixa cada requisição várias vezes mais
+lenta e serializa as requisições perfiladas (um perfil por vez): use só
+para investigar, não continuamente.
+
+Cada perfil vira um `.prof` (abra com `python -m pstats` ou snakeviz) e um
+`.txt` com as funções mais caras, em PERFIL_DIRETORIO. Só os
+PERFIL_MAX_ARQUIVOS perfis mais recentes são mantidos.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+# O cProfile usa um gancho global do interpretador: um perfil por vez
+_perfil_em_uso = threading.Lock()
+
+
+def _pedido_explicito(request):
+    pedido = request.headers.get("X-Perfil") == "1" or request.GET.get("_perfil") == "1"
+    usuario = getattr(request, "user", None)
+    return pedido and usuario is not None and usuario.is_staff
+
+
+def _rota(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else request.path
+
+
+def _nome_arquivo(request, total_ms):
+    rota = re.sub(r"[^A-Za-z0-9_.-]+", "_", _rota(request)).strip("_") or "raiz"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000:06d}-{rota}-{int(total_ms)}ms"
+
+
+class PerfilamentoMiddleware:
+    """Deve vir depois de AuthenticationMiddleware (usa request.user)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERFIL_ATIVO", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limiar_ms = settings.PERFIL_LIMIAR_MS
+        self.amostragem = settings.PERFIL_AMOSTRAGEM
+        self.diretorio = Path(settings.PERFIL_DIRETORIO)
+        self.max_arquivos = settings.PERFIL_MAX_ARQUIVOS
+
+    def __call__(self, request):
+        explicito = _pedido_explicito(request)
+        sorteada = explicito or random.random() < self.amostragem
+        if not sorteada or not _perfil_em_uso.acquire(blocking=False):
+            return self.cronometrar(request)
+
+        perfil = cProfile.Profile()
+        try:
+            inicio = time.perf_counter()
+            perfil.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfil.disable()
+            total_ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            _perfil_em_uso.release()
+
+        if explicito or total_ms >= self.limiar_ms:
+            nome = self.salvar(perfil, _nome_arquivo(request, total_ms))
+            logger.warning("Perfil de %s (%.0f ms) salvo em %s", request.path, total_ms, nome)
+            if explicito:
+                response["X-Perfil"] = nome
+        return response
+
+    def cronometrar(self, request):
+        """Requisição sem perfil: só mede o tempo e registra se passou do limiar."""
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        if total_ms >= self.limiar_ms:
+            logger.warning(
+                "Requisição lenta sem perfil: %s %s (%s) em %.0f ms",
+                request.method, request.path, _rota(request), total_ms,
+            )
+        return response
+
+    def salvar(self, perfil, nome):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        perfil.dump_stats(self.diretorio / f"{nome}.prof")
+
+        resumo = io.StringIO()
+        pstats.Stats(perfil, stream=resumo).sort_stats("cumulative").print_stats(40)
+        (self.diretorio / f"{nome}.txt").write_text(resumo.getvalue(), encoding="utf-8")
+
+        self.rotacionar()
+        return f"{nome}.prof"
+
+    def rotacionar(self):
+        perfis = sorted(
+            self.diretorio.glob("*.prof"), key=lambda p: (p.stat().st_mtime_ns, p.name), reverse=True
+        )
+        for antigo in perfis[self.max_arquivos:]:
+            antigo.unlink(missing_ok=True)
+            antigo.with_suffix(".txt").unlink(missing_ok=True)
@@ -0,0 +1,50 @@
+"""
+Invalidação de caches derivados e eventos em tempo real a partir das
+escritas nos modelos. As versões só mudam após o commit da escrita
+(`versoes.incrementar_apos_commit`), como os eventos.
+
+Atualizações em massa (`QuerySet.update`, `bulk_create`) não disparam
+sinais; quem usá-las deve chamar `versoes.incrementar` explicitamente,
+incluindo o escopo de cada sala afetada (`versoes.escopo_sala`).
+"""
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from salas.models import Sala
+
+from . import eventos, grades, versoes
+from .models import Fechamento, GradeHorario, Reserva
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def reserva_alterada(sender, instance, **kwargs):
+    versoes.incrementar_apos_commit("reservas", versoes.escopo_sala(instance.sala_id))
+    # Visitantes conectados em eventos_horarios recebem o novo estado das faixas
+    transaction.on_commit(
+        partial(eventos.publicar_alteracao_de_reserva, instance.sala_id, instance.inicio, instance.fim)
+    )
+
+
+@receiver([post_save, post_delete], sender=Sala)
+def sala_alterada(sender, instance, **kwargs):
+    versoes.incrementar_apos_commit("salas", versoes.escopo_sala(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=GradeHorario)
+@receiver([post_save, post_delete], sender=Fechamento)
+def grade_alterada(sender, instance, **kwargs):
+    # Cada processo recompila suas grades na próxima consulta; antes do
+    # commit outra thread compilaria as grades antigas sob a versão nova
+    versoes.incrementar_apos_commit(grades.ESCOPO)
+
+
+@receiver([post_save, post_delete], sender=User)
+def usuario_alterado(sender, instance, update_fields=None, **kwargs):
+    # Login só atualiza last_login: não muda nenhuma métrica
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    versoes.incrementar_apos_commit("usuarios")
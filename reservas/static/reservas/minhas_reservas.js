@@ -3,13 +3,13 @@ lucide.createIcons();
 
 // ========== BUSCA DE RESERVAS ==========
 const searchInput = document.getElementById('searchReservation');
-const reservationCards = document.querySelectorAll('.reservation-card');
 
 if (searchInput) {
     searchInput.addEventListener('input', function(e) {
         const searchTerm = e.target.value.toLowerCase().trim();
         
-        reservationCards.forEach(card => {
+        // Consulta a cada busca: a rolagem infinita acrescenta cartões
+        document.querySelectorAll('.reservation-card').forEach(card => {
             const searchData = card.dataset.search.toLowerCase();
             
             if (searchData.includes(searchTerm)) {
@@ -94,3 +94,91 @@ function updateCounters() {
 
 // Atualiza contadores ao carregar
 document.addEventListener('DOMContentLoaded', updateCounters);
+
+// ========== ROLAGEM INFINITA DO HISTÓRICO (?continuo=1) ==========
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function formatarData(iso) {
+    const data = new Date(iso);
+    return data.toLocaleDateString('pt-BR');
+}
+
+function formatarHora(iso) {
+    const data = new Date(iso);
+    return data.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
+}
+
+function criarCardHistorico(reserva) {
+    const card = document.createElement('a');
+    card.href = reserva.detalhe;
+    card.className = 'reservation-card reservation-past';
+    card.dataset.search = reserva.sala;
+    const badge = reserva.status === 'cancelada'
+        ? '<span class="status-badge status-cancelada">Cancelada</span>'
+        : '<span class="status-badge status-concluida">Concluída</span>';
+    card.innerHTML = `
+        <div class="reservation-icon reservation-icon-past">
+            <i data-lucide="panel-right-open"></i>
+        </div>
+        <div class="reservation-info">
+            <div class="reservation-name">${escapeHtml(reserva.sala)}</div>
+            <div class="reservation-details">
+                <span class="detail-item">
+                    <i data-lucide="calendar"></i>
+                    ${formatarData(reserva.inicio)}
+                </span>
+                <span class="detail-item">
+                    <i data-lucide="clock"></i>
+                    ${formatarHora(reserva.inicio)} - ${formatarHora(reserva.fim)}
+                </span>
+            </div>
+        </div>
+        <div class="reservation-status">${badge}</div>
+    `;
+    return card;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const sentinel = document.getElementById('historicoSentinel');
+    const lista = document.getElementById('reservasAnterioresList');
+    if (!sentinel || !lista || !('IntersectionObserver' in window)) return;
+
+    let carregando = false;
+    const observer = new IntersectionObserver(async function(entries) {
+        if (carregando || !entries.some(entry => entry.isIntersecting)) return;
+        carregando = true;
+        try {
+            const params = new URLSearchParams({ cursor: sentinel.dataset.cursor });
+            const response = await fetch(`${sentinel.dataset.url}?${params}`, {
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const data = await response.json();
+
+            data.reservas.forEach(reserva => lista.appendChild(criarCardHistorico(reserva)));
+            lucide.createIcons();
+
+            if (data.proximo_cursor) {
+                sentinel.dataset.cursor = data.proximo_cursor;
+                // Reobservar dispara de novo se o sentinela continuar visível
+                observer.unobserve(sentinel);
+                observer.observe(sentinel);
+            } else {
+                observer.disconnect();
+                sentinel.remove();
+            }
+        } catch (error) {
+            console.error('Erro ao carregar reservas anteriores:', error);
+            observer.disconnect();
+            sentinel.textContent = 'Não foi possível carregar mais reservas.';
+        } finally {
+            carregando = false;
+        }
+    }, { rootMargin: '200px' });
+
+    observer.observe(sentinel);
+});
@@ -0,0 +1,71 @@
+"""
+Suporte aos testes de regressão de consultas.
+
+`medir_consultas` executa uma requisição registrando quantas consultas SQL
+ela fez e quanto tempo passou no banco. `ConsultasConstantesMixin` compara
+essas medidas entre um banco pequeno e um grande: uma view sem N+1 faz o mesmo
+número de consultas com 10 ou com 1000 linhas.
+"""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+MedidaConsultas = namedtuple("MedidaConsultas", ["status", "consultas", "tempo_banco_ms", "sql"])
+
+
+@contextmanager
+def _registrar(sql):
+    def wrapper(execute, comando, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(comando, params, many, context)
+        finally:
+            sql.append((comando, (time.perf_counter() - inicio) * 1000))
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def medir_consultas(requisicao):
+    """Executa `requisicao()` (que retorna a resposta) e mede o acesso ao banco."""
+    sql = []
+    with _registrar(sql):
+        resposta = requisicao()
+    return MedidaConsultas(
+        status=resposta.status_code,
+        consultas=len(sql),
+        tempo_banco_ms=sum(ms for _, ms in sql),
+        sql=[comando for comando, _ in sql],
+    )
+
+
+class ConsultasConstantesMixin:
+    """
+    Mixin para TestCase: `medir_views` mede um dicionário {nome: requisição} e
+    `assertConsultasConstantes` compara duas medições feitas com volumes de
+    dados diferentes.
+    """
+
+    def medir_views(self, views):
+        medidas = {}
+        for nome, requisicao in views.items():
+            requisicao()  # aquecimento: sessão, caches de ContentType etc.
+            medidas[nome] = medir_consultas(requisicao)
+        return medidas
+
+    def assertConsultasConstantes(self, pequeno, grande):
+        for nome, antes in pequeno.items():
+            depois = grande[nome]
+            with self.subTest(view=nome):
+                self.assertLess(antes.status, 400, f"{nome} respondeu {antes.status}")
+                self.assertLess(depois.status, 400, f"{nome} respondeu {depois.status}")
+                self.assertEqual(
+                    antes.consultas,
+                    depois.consultas,
+                    f"{nome}: {antes.consultas} consultas ({antes.tempo_banco_ms:.1f} ms) com poucos dados, "
+                    f"{depois.consultas} ({depois.tempo_banco_ms:.1f} ms) com muitos:\n  "
+                    + "\n  ".join(depois.sql),
+                )
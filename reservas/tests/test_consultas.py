@@ -0,0 +1,135 @@
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas.carga import DOMINIO_EMAIL, PREFIXO_SALA, gerar_dados_carga, limpar_dados_de_carga
+from reservas.models import Reserva
+from reservas.tests.consultas import ConsultasConstantesMixin, medir_consultas
+from salas.models import Sala
+
+
+class ConsultasPorViewTests(ConsultasConstantesMixin, TestCase):
+    """
+    Nenhuma view de leitura pode fazer mais consultas quando há mais dados
+    (salas, usuários, reservas): compara 10 linhas de cada com 1000.
+    """
+
+    POUCOS = {"salas": 10, "usuarios": 10, "reservas": 10}
+    MUITOS = {"salas": 1000, "usuarios": 1000, "reservas": 1000}
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="senha123"
+        )
+        cls.novato = User.objects.create_user(
+            username="20249999", email="novato@ifpb.edu.br", password="senha123"
+        )
+
+    def setUp(self):
+        self.hoje = timezone.localdate()
+        self.cliente_admin = Client()
+        self.cliente_admin.force_login(self.admin)
+        self.cliente_novato = Client()
+        self.cliente_novato.force_login(self.novato)
+        self.reservas_criadas = 0
+
+    def popular(self, tamanhos):
+        limpar_dados_de_carga()
+        gerar_dados_carga(
+            **tamanhos, semestres=1, dias_futuros=30, data_referencia=self.hoje, tamanho_lote=500
+        )
+
+    def views(self):
+        """Requisições de cada view, sobre os dados de carga atuais."""
+        sala = Sala.objects.filter(nome__startswith=PREFIXO_SALA).order_by("id").first()
+        veterano = (
+            get_user_model().objects.filter(email__endswith=DOMINIO_EMAIL)
+            .annotate(total=Count("reservas")).order_by("-total", "id").first()
+        )
+        reserva = Reserva.objects.filter(conta=veterano).order_by("id").first()
+        cliente = Client()
+        cliente.force_login(veterano)
+        anonimo = Client()
+        dia = self.hoje.isoformat()
+        cursor_salas = anonimo.get(reverse("api_listar_salas")).json()["proximo_cursor"]
+        # Cursor logo após a primeira reserva: a página seguinte traz o resto do histórico
+        cursor_historico = cliente.get(reverse("api_minhas_reservas"), {"limite": 1}).json()["proximo_cursor"]
+        semana = (self.hoje + timedelta(days=6)).isoformat()
+
+        def criar_reserva():
+            self.reservas_criadas += 1
+            data = self.hoje + timedelta(days=60 + self.reservas_criadas)
+            return self.cliente_novato.post(
+                reverse("api_criar_reserva"),
+                json.dumps({"sala_id": sala.id, "data": data.isoformat(), "inicio": "08:00", "fim": "10:00"}),
+                content_type="application/json",
+            )
+
+        def sem_cache(requisicao):
+            def executar():
+                cache.clear()
+                return requisicao()
+            return executar
+
+        return {
+            # Área do estudante
+            "listar_salas": lambda: cliente.get(reverse("listar_salas")),
+            "api_listar_salas": lambda: anonimo.get(reverse("api_listar_salas"), {"cursor": cursor_salas}),
+            "detalhar_sala": lambda: cliente.get(reverse("detalhar_sala", args=[sala.id])),
+            "minhas_reservas": lambda: cliente.get(reverse("minhas_reservas")),
+            "api_minhas_reservas": lambda: cliente.get(reverse("api_minhas_reservas")),
+            "api_minhas_reservas_cursor": lambda: cliente.get(
+                reverse("api_minhas_reservas"), {"cursor": cursor_historico}
+            ),
+            "detalhes_reserva": lambda: cliente.get(reverse("detalhes_reserva", args=[reserva.id])),
+            "api_horarios_disponiveis": lambda: cliente.get(
+                reverse("api_horarios_disponiveis", args=[sala.id]), {"data": dia}
+            ),
+            "api_matriz_disponibilidade": lambda: cliente.get(
+                reverse("api_matriz_disponibilidade"), {"inicio": dia, "fim": semana}
+            ),
+            "api_criar_reserva": criar_reserva,
+            "salas_publicas": sem_cache(lambda: anonimo.get(reverse("salas_publicas"))),
+            # Área administrativa
+            "salas_admin": lambda: self.cliente_admin.get(reverse("salas_admin")),
+            "gerenciar_salas": lambda: self.cliente_admin.get(reverse("gerenciar_salas")),
+            "api_lookup_sala": lambda: self.cliente_admin.get(reverse("api_lookup_sala"), {"nome": sala.nome}),
+            "admin_reservas": lambda: self.cliente_admin.get(reverse("admin_reservas")),
+            "gerenciar_usuarios": lambda: self.cliente_admin.get(reverse("gerenciar_usuarios")),
+            "admin_dashboard": sem_cache(lambda: self.cliente_admin.get(reverse("admin_dashboard"))),
+            "api_dashboard_data": sem_cache(lambda: self.cliente_admin.get(reverse("api_dashboard_data"))),
+        }
+
+    def test_consultas_nao_crescem_com_os_dados(self):
+        """Mesmo número de consultas por view com 10 e com 1000 linhas"""
+        self.popular(self.POUCOS)
+        pequeno = self.medir_views(self.views())
+
+        self.popular(self.MUITOS)
+        grande = self.medir_views(self.views())
+
+        self.assertConsultasConstantes(pequeno, grande)
+
+    def test_medicao_detecta_n_mais_1(self):
+        """A medição acusa uma 'view' que consulta a sala de cada reserva"""
+        def n_mais_1():
+            for reserva in Reserva.objects.all():
+                reserva.sala.nome
+            return SimpleNamespace(status_code=200)
+
+        self.popular(self.POUCOS)
+        pequeno = {"n_mais_1": medir_consultas(n_mais_1)}
+        self.popular({"salas": 20, "usuarios": 20, "reservas": 20})
+        grande = {"n_mais_1": medir_consultas(n_mais_1)}
+
+        # Uma consulta a mais por reserva: exatamente o que o guarda deve acusar
+        self.assertEqual(grande["n_mais_1"].consultas - pequeno["n_mais_1"].consultas, 10)
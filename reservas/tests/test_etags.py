@@ -0,0 +1,138 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas import versoes
+from reservas.models import Reserva
+from salas.models import Sala
+
+
+class GetCondicionalTests(TestCase):
+    """Testes para ETag/304 em horários, salas_admin e dashboard"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="senha123"
+        )
+        cls.estudante = User.objects.create_user(username="20241001", password="senha123")
+        cls.sala = Sala.objects.create(nome="Sala ETag", capacidade=6, tipo="Coletiva")
+        cls.outra_sala = Sala.objects.create(nome="Sala Vizinha", capacidade=6, tipo="Coletiva")
+
+    def setUp(self):
+        cache.clear()
+        self.amanha = timezone.localdate() + timedelta(days=1)
+        self.url_horarios = reverse("api_horarios_disponiveis", args=[self.sala.id])
+        self.params = {"data": self.amanha.isoformat()}
+
+    def reservar(self, sala, hora):
+        inicio = timezone.make_aware(datetime.combine(self.amanha, time(hora)))
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reserva.objects.create(
+                sala=sala, usuario=self.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2)
+            )
+
+    def test_horarios_304_sem_consultas(self):
+        """CT-E1: Repetir a consulta com o ETag recebido devolve 304 sem tocar no banco"""
+        resp = self.client.get(self.url_horarios, self.params)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("no-cache", resp["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url_horarios, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+        # Outro dia é outro recurso
+        outro_dia = {"data": (self.amanha + timedelta(days=1)).isoformat()}
+        self.assertEqual(self.client.get(self.url_horarios, outro_dia, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_horarios_versao_por_sala(self):
+        """CT-E2: Reserva na própria sala muda o ETag; reserva em outra sala não"""
+        etag = self.client.get(self.url_horarios, self.params)["ETag"]
+
+        self.reservar(self.outra_sala, 8)
+        self.assertEqual(self.client.get(self.url_horarios, self.params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        reserva = self.reservar(self.sala, 8)
+        resp = self.client.get(self.url_horarios, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.json()[0]["disponivel"])
+
+        etag = resp["ETag"]
+        reserva.cancelada = True
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.save()
+        resp = self.client.get(self.url_horarios, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()[0]["disponivel"])
+
+    def test_horarios_de_hoje_mudam_com_o_tempo(self):
+        """CT-E3: Quando uma faixa de hoje começa, o ETag muda"""
+        hoje = timezone.localdate()
+        params = {"data": hoje.isoformat()}
+        antes = timezone.make_aware(datetime.combine(hoje, time(9)))
+        depois = timezone.make_aware(datetime.combine(hoje, time(10, 1)))
+
+        with mock.patch("django.utils.timezone.now", return_value=antes):
+            etag = self.client.get(self.url_horarios, params)["ETag"]
+            self.assertEqual(self.client.get(self.url_horarios, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch("django.utils.timezone.now", return_value=depois):
+            resp = self.client.get(self.url_horarios, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.json()[1]["disponivel"])
+
+    def test_salas_admin_e_dashboard(self):
+        """CT-E4: salas_admin e api_dashboard_data respondem 304 até uma escrita relevante"""
+        admin = Client()
+        admin.force_login(self.admin)
+        admin.get(reverse("api_dashboard_data"))  # grava a renovação da sessão
+
+        for nome in ("salas_admin", "api_dashboard_data"):
+            url = reverse(nome)
+            etag = admin.get(url)["ETag"]
+            with CaptureQueriesContext(connection) as ctx:
+                resp = admin.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 304, nome)
+            tabelas = " ".join(q["sql"] for q in ctx.captured_queries)
+            self.assertNotIn("reservas_reserva", tabelas)
+            self.assertNotIn("salas_sala", tabelas)
+
+        etag_salas = admin.get(reverse("salas_admin"))["ETag"]
+        etag_dashboard = admin.get(reverse("api_dashboard_data"))["ETag"]
+        self.reservar(self.sala, 14)
+        self.assertEqual(admin.get(reverse("salas_admin"), HTTP_IF_NONE_MATCH=etag_salas).status_code, 304)
+        resp = admin.get(reverse("api_dashboard_data"), HTTP_IF_NONE_MATCH=etag_dashboard)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["total_reservas"], 1)
+
+        self.sala.capacidade = 8
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sala.save()
+        self.assertEqual(admin.get(reverse("salas_admin"), HTTP_IF_NONE_MATCH=etag_salas).status_code, 200)
+
+    def test_versao_muda_so_no_commit(self):
+        """CT-E5: A versão da sala só muda quando a transação da reserva é confirmada"""
+        etag = self.client.get(self.url_horarios, self.params)["ETag"]
+        escopo = versoes.escopo_sala(self.sala.id)
+        versao = versoes.versao(escopo)
+
+        inicio = timezone.make_aware(datetime.combine(self.amanha, time(8)))
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.create(
+                sala=self.sala, usuario=self.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2)
+            )
+            self.assertEqual(versoes.versao(escopo), versao)
+
+        self.assertNotEqual(versoes.versao(escopo), versao)
+        self.assertEqual(self.client.get(self.url_horarios, self.params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas import eventos
+from reservas.models import Reserva
+from salas.models import Sala
+
+
+def _evento(bloco):
+    """Converte um bloco SSE em (nome, dados)."""
+    campos = dict(linha.split(": ", 1) for linha in bloco.strip().splitlines() if not linha.startswith("retry"))
+    return campos["event"], json.loads(campos["data"])
+
+
+class EventosHorariosTests(TestCase):
+    """Testes para o stream de eventos da disponibilidade (SSE)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.estudante = User.objects.create_user(username="20241001", password="senha123")
+        cls.sala = Sala.objects.create(nome="Sala Eventos", capacidade=6, tipo="Coletiva")
+
+    def setUp(self):
+        self.amanha = timezone.localdate() + timedelta(days=1)
+        self.url = reverse("eventos_horarios", args=[self.sala.id])
+        self.params = {"data": self.amanha.isoformat()}
+
+    def intervalo(self, hora):
+        inicio = timezone.make_aware(datetime.combine(self.amanha, time(hora)))
+        return inicio, inicio + timedelta(hours=2)
+
+    async def proximo(self, stream):
+        return (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+
+    async def test_estado_inicial_e_delta(self):
+        """CT-EV1: Conexão recebe o estado completo e depois só as faixas alteradas"""
+        resp = await self.async_client.get(self.url, self.params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        stream = aiter(resp.streaming_content)
+
+        nome, dados = _evento(await self.proximo(stream))
+        self.assertEqual(nome, "horarios")
+        self.assertEqual(len(dados["horarios"]), 7)
+        self.assertTrue(all(h["disponivel"] for h in dados["horarios"]))
+        canal = eventos.canal_horarios(self.sala.id, self.amanha)
+        self.assertTrue(eventos.obter_broker().tem_assinantes(canal))
+
+        inicio, fim = self.intervalo(10)
+        await Reserva.objects.acreate(sala=self.sala, usuario=self.estudante.username, inicio=inicio, fim=fim)
+        await sync_to_async(eventos.publicar_alteracao_de_reserva)(self.sala.id, inicio, fim)
+
+        nome, dados = _evento(await self.proximo(stream))
+        self.assertEqual(nome, "delta")
+        self.assertEqual(dados["data"], self.amanha.isoformat())
+        self.assertEqual([(h["inicio"], h["disponivel"]) for h in dados["horarios"]], [("10:00", False)])
+
+        # Desconexão do cliente: o servidor ASGI cancela a leitura pendente
+        leitura = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        leitura.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leitura
+        self.assertFalse(eventos.obter_broker().tem_assinantes(canal))
+
+    @override_settings(EVENTOS_HEARTBEAT=0.05, EVENTOS_DURACAO_MAX=0.3)
+    async def test_heartbeat_e_duracao_maxima(self):
+        """CT-EV2: Sem alterações o stream envia pings e fecha após a duração máxima"""
+        resp = await self.async_client.get(self.url, self.params)
+        blocos = [b.decode() async for b in resp.streaming_content]
+
+        self.assertTrue(blocos[0].startswith("retry: 50"))
+        self.assertIn(": ping\n\n", blocos[1:])
+
+    async def test_parametros_invalidos(self):
+        """CT-EV3: Data inválida é 400 e sala inexistente é 404"""
+        resp = await self.async_client.get(self.url, {"data": "amanha"})
+        self.assertEqual(resp.status_code, 400)
+        resp = await self.async_client.get(reverse("eventos_horarios", args=[9999]), self.params)
+        self.assertEqual(resp.status_code, 404)
+
+    def test_wsgi_responde_503(self):
+        """CT-EV4: Sob WSGI o stream não é servido (o navegador segue com a API de horários)"""
+        resp = self.client.get(self.url, self.params)
+        self.assertEqual(resp.status_code, 503)
+
+    def test_reserva_publica_apos_commit(self):
+        """CT-EV5: Criar e cancelar reserva publica as faixas afetadas depois do commit"""
+        broker = mock.Mock()
+        broker.tem_assinantes.return_value = True
+        self.client.force_login(self.estudante)
+
+        with mock.patch.object(eventos, "obter_broker", return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(
+                    reverse("api_criar_reserva"),
+                    json.dumps({"sala_id": self.sala.id, "data": self.amanha.isoformat(), "inicio": "14:00", "fim": "16:00"}),
+                    content_type="application/json",
+                )
+                broker.publicar.assert_not_called()
+            self.assertEqual(resp.status_code, 201)
+
+            canal, mensagem = broker.publicar.call_args.args
+            self.assertEqual(canal, eventos.canal_horarios(self.sala.id, self.amanha))
+            self.assertEqual([(h["inicio"], h["disponivel"]) for h in mensagem["horarios"]], [("14:00", False)])
+
+            reserva = Reserva.objects.get(sala=self.sala)
+            with self.captureOnCommitCallbacks(execute=True):
+                reserva.cancelada = True
+                reserva.save()
+            _, mensagem = broker.publicar.call_args.args
+            self.assertEqual([(h["inicio"], h["disponivel"]) for h in mensagem["horarios"]], [("14:00", True)])
+
+
+class BrokerEmMemoriaTests(TestCase):
+    """Testes para o pub/sub em memória"""
+
+    async def test_publicacao_de_outra_thread(self):
+        """CT-EV6: Publicar de uma thread síncrona entrega no loop do assinante"""
+        broker = eventos.BrokerEmMemoria()
+        async with broker.assinar("canal") as fila:
+            thread = threading.Thread(target=broker.publicar, args=("canal", {"n": 1}))
+            thread.start()
+            thread.join()
+            broker.publicar("outro", {"n": 2})
+            self.assertEqual(await asyncio.wait_for(fila.get(), timeout=5), {"n": 1})
+            self.assertTrue(fila.empty())
+        self.assertFalse(broker.tem_assinantes("canal"))
+
+    async def test_fila_cheia_descarta_o_mais_antigo(self):
+        """CT-EV7: Cliente lento perde os deltas mais antigos, não trava a publicação"""
+        broker = eventos.BrokerEmMemoria()
+        broker.TAMANHO_FILA = 2
+        async with broker.assinar("canal") as fila:
+            for n in range(3):
+                broker.publicar("canal", n)
+            await asyncio.sleep(0)
+            self.assertEqual([fila.get_nowait(), fila.get_nowait()], [1, 2])
@@ -0,0 +1,172 @@
+import json
+from datetime import time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas import grades, versoes
+from reservas.models import Fechamento, GradeHorario
+from salas.models import Sala
+
+
+class GradesHorarioTests(TestCase):
+    """Testes para as grades de horários por sala/tipo e os fechamentos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.estudante = User.objects.create_user(username="20241001", password="senha123")
+        cls.sala = Sala.objects.create(nome="Sala Grade", capacidade=6, tipo="Coletiva")
+        cls.auditorio = Sala.objects.create(nome="Auditorio Grade", capacidade=100, tipo="Auditorio")
+
+    def setUp(self):
+        # Uma segunda-feira futura, para as variações por dia da semana
+        hoje = timezone.localdate()
+        self.segunda = hoje + timedelta(days=7 - hoje.weekday())
+
+    # As grades só são recompiladas depois do commit da alteração
+    def grade(self, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return GradeHorario.objects.create(**campos)
+
+    def fechamento(self, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Fechamento.objects.create(**campos)
+
+    def horarios(self, sala, data):
+        resp = self.client.get(reverse("api_horarios_disponiveis", args=[sala.id]), {"data": data.isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        return [h["range"] for h in resp.json()]
+
+    def reservar(self, sala, data, inicio, fim):
+        self.client.force_login(self.estudante)
+        return self.client.post(
+            reverse("api_criar_reserva"),
+            json.dumps({"sala_id": sala.id, "data": data.isoformat(), "inicio": inicio, "fim": fim}),
+            content_type="application/json",
+        )
+
+    def test_grade_por_tipo_com_outra_granularidade(self):
+        """CT-G1: Auditórios usam a grade do tipo; as demais salas seguem a padrão"""
+        self.grade(tipo="Auditorio", abertura=time(8), encerramento=time(12), duracao_minutos=60)
+
+        self.assertEqual(
+            self.horarios(self.auditorio, self.segunda),
+            ["08:00 - 09:00", "09:00 - 10:00", "10:00 - 11:00", "11:00 - 12:00"],
+        )
+        self.assertEqual(len(self.horarios(self.sala, self.segunda)), len(grades.HORARIOS_PADRAO))
+
+    def test_grade_mais_especifica_prevalece(self):
+        """CT-G2: Grade da sala no dia da semana vence a da sala e a geral"""
+        self.grade(abertura=time(7), encerramento=time(9), duracao_minutos=120)
+        self.grade(sala=self.sala, abertura=time(10), encerramento=time(14), duracao_minutos=120)
+        self.grade(
+            sala=self.sala, dia_semana=0, abertura=time(14), encerramento=time(15), duracao_minutos=30
+        )
+
+        self.assertEqual(self.horarios(self.sala, self.segunda), ["14:00 - 14:30", "14:30 - 15:00"])
+        terca = self.segunda + timedelta(days=1)
+        self.assertEqual(self.horarios(self.sala, terca), ["10:00 - 12:00", "12:00 - 14:00"])
+        self.assertEqual(self.horarios(self.auditorio, terca), ["07:00 - 09:00"])
+
+    def test_fechamento(self):
+        """CT-G3: Em dia fechado não há horários nem reservas"""
+        self.fechamento(sala=self.sala, data=self.segunda, motivo="Manutenção")
+        self.fechamento(data=self.segunda + timedelta(days=1), motivo="Feriado")
+
+        self.assertEqual(self.horarios(self.sala, self.segunda), [])
+        self.assertEqual(len(self.horarios(self.auditorio, self.segunda)), len(grades.HORARIOS_PADRAO))
+        self.assertEqual(self.horarios(self.auditorio, self.segunda + timedelta(days=1)), [])
+
+        resp = self.reservar(self.sala, self.segunda, "10:00", "12:00")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("não funciona", resp.json()["detail"])
+
+    def test_reserva_deve_caber_na_grade(self):
+        """CT-G4: Reservas fora do funcionamento ou desalinhadas das faixas são recusadas"""
+        self.grade(sala=self.sala, abertura=time(8), encerramento=time(12), duracao_minutos=120)
+
+        recusadas = (
+            ("07:00", "08:00"), ("11:00", "13:00"), ("10:00", "09:00"),
+            # Dentro do funcionamento, mas fora das faixas 08-10 e 10-12
+            ("09:17", "10:03"), ("09:00", "11:00"), ("08:00", "09:00"),
+        )
+        for inicio, fim in recusadas:
+            resp = self.reservar(self.sala, self.segunda, inicio, fim)
+            self.assertEqual(resp.status_code, 400, (inicio, fim))
+            self.assertIn("fora da grade", resp.json()["detail"])
+
+        # Atravessar duas faixas contíguas é permitido
+        self.assertEqual(self.reservar(self.sala, self.segunda, "08:00", "12:00").status_code, 201)
+
+    def test_permite_so_intervalos_de_faixas(self):
+        """CT-G9: Início e fim precisam coincidir com limites de faixas da grade"""
+        compiladas = grades.GradesCompiladas([
+            GradeHorario(sala_id=self.sala.id, abertura=time(8), encerramento=time(9, 45), duracao_minutos=30),
+        ])
+
+        def permite(inicio, fim):
+            return compiladas.permite(self.segunda, inicio, fim, self.sala.id)
+
+        self.assertTrue(permite(time(8), time(8, 30)))
+        self.assertTrue(permite(time(8, 30), time(9, 30)))
+        self.assertFalse(permite(time(8, 30), time(9, 45)))  # sobra de 15 min não é faixa
+        self.assertFalse(permite(time(8, 15), time(8, 45)))
+        # Grade padrão: faixas de 2h
+        self.assertTrue(compiladas.permite(self.segunda, time(8), time(14)))
+        self.assertFalse(compiladas.permite(self.segunda, time(8), time(9)))
+
+    def test_grades_compiladas_em_memoria(self):
+        """CT-G5: Grades ficam compiladas até uma alteração mudar a versão"""
+        compiladas = grades.obter()
+        with self.assertNumQueries(0):
+            self.assertIs(grades.obter(), compiladas)
+
+        grade = self.grade(abertura=time(9), encerramento=time(11), duracao_minutos=60)
+        recompiladas = grades.obter()
+        self.assertIsNot(recompiladas, compiladas)
+        self.assertEqual(len(recompiladas.faixas(self.segunda)), 2)
+
+        grade.ativo = False
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.save()
+        self.assertEqual(grades.obter().faixas(self.segunda), grades.HORARIOS_PADRAO)
+
+    def test_grades_recarregadas_pelo_ttl(self):
+        """CT-G8: Sem a invalidação (outro processo, cache perdido), o TTL recarrega as grades"""
+        with override_settings(GRADES_TTL=60), mock.patch("reservas.grades.relogio.monotonic", return_value=1000.0):
+            versoes.incrementar(grades.ESCOPO)
+            compiladas = grades.obter()
+            # Grade gravada sem incrementar a versão
+            GradeHorario.objects.create(abertura=time(9), encerramento=time(11), duracao_minutos=60)
+            self.assertIs(grades.obter(), compiladas)
+
+        with override_settings(GRADES_TTL=60), mock.patch("reservas.grades.relogio.monotonic", return_value=1060.0):
+            self.assertEqual(len(grades.obter().faixas(self.segunda)), 2)
+
+    def test_etag_muda_com_a_grade(self):
+        """CT-G6: Alterar a grade invalida o ETag dos horários"""
+        url = reverse("api_horarios_disponiveis", args=[self.sala.id])
+        params = {"data": self.segunda.isoformat()}
+        etag = self.client.get(url, params)["ETag"]
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.grade(sala=self.sala, abertura=time(8), encerramento=time(10), duracao_minutos=60)
+        resp = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()), 2)
+
+    def test_validacao_da_grade(self):
+        """CT-G7: Grade com sala e tipo ou encerramento antes da abertura é inválida"""
+        with self.assertRaises(ValidationError):
+            GradeHorario(sala=self.sala, tipo="Coletiva", abertura=time(8), encerramento=time(10)).clean()
+        with self.assertRaises(ValidationError):
+            GradeHorario(abertura=time(10), encerramento=time(8)).clean()
+        self.assertEqual(
+            [(f.rotulo_inicio, f.rotulo_fim) for f in grades.gerar_faixas(time(8), time(9, 45), 30)],
+            [("08:00", "08:30"), ("08:30", "09:00"), ("09:00", "09:30")],
+        )
@@ -0,0 +1,87 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas import instrumentacao
+from reservas.models import Reserva
+from salas.models import Sala
+
+
+class InstrumentacaoTests(TestCase):
+    """Testes para InstrumentacaoMiddleware e o endpoint de métricas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="senha123"
+        )
+        cls.estudante = User.objects.create_user(
+            username="20241001", email="aluno@ifpb.edu.br", password="senha123"
+        )
+        cls.sala = Sala.objects.create(nome="Sala Metricas", capacidade=6, tipo="Coletiva")
+        inicio = timezone.now() + timedelta(days=1)
+        Reserva.objects.create(
+            sala=cls.sala, usuario=cls.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2)
+        )
+
+    def setUp(self):
+        instrumentacao.janela.limpar()
+        self.client = Client()
+        self.client.force_login(self.estudante)
+        self.url_horarios = reverse("api_horarios_disponiveis", args=[self.sala.id])
+        self.dia = {"data": timezone.localdate().isoformat()}
+
+    def test_server_timing_e_log_estruturado(self):
+        """CT-I1: Resposta traz Server-Timing e gera uma linha JSON de log"""
+        with self.assertLogs("ifteca.requisicoes", "INFO") as logs:
+            resp = self.client.get(reverse("minhas_reservas"))
+
+        self.assertEqual(resp.status_code, 200)
+        timing = resp["Server-Timing"]
+        self.assertRegex(timing, r"total;dur=[\d.]+")
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertRegex(timing, r"tpl;dur=[\d.]+")
+
+        linha = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(linha["rota"], "minhas_reservas")
+        self.assertEqual(linha["status"], 200)
+        self.assertEqual(linha["bytes"], len(resp.content))
+        self.assertGreater(linha["consultas"], 0)
+        self.assertGreater(linha["template_ms"], 0)
+
+    def test_percentis_por_rota(self):
+        """CT-I2: Medições agregadas por nome de rota"""
+        for _ in range(3):
+            self.client.get(self.url_horarios, self.dia)
+        self.client.get(reverse("minhas_reservas"))
+
+        resumo = instrumentacao.resumo()
+
+        horarios = resumo["api_horarios_disponiveis"]
+        self.assertEqual(horarios["requisicoes"], 3)
+        self.assertEqual(horarios["janela"], 3)
+        self.assertGreater(horarios["consultas"]["max"], 0)
+        self.assertGreaterEqual(horarios["total_ms"]["p95"], horarios["total_ms"]["p50"])
+        self.assertEqual(horarios["template_ms"]["p95"], 0)
+        self.assertEqual(resumo["minhas_reservas"]["requisicoes"], 1)
+
+    def test_endpoint_apenas_staff(self):
+        """CT-I3: Métricas só para administradores"""
+        self.client.get(self.url_horarios, self.dia)
+        url = reverse("api_metricas_requisicoes")
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 302)
+
+        admin = Client()
+        admin.force_login(self.admin)
+        resp = admin.get(url)
+        self.assertEqual(resp.status_code, 200)
+        dados = resp.json()
+        self.assertIn("api_horarios_disponiveis", dados["rotas"])
+        self.assertEqual(dados["janela"], instrumentacao.janela.tamanho)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+
+ANTES = [("reservas", "0006_reserva_indices"), ("salas", "0009_alter_sala_nome_sala_unique_nome_sala_ativa")]
+DEPOIS = [("reservas", "0007_reserva_sem_sobreposicao")]
+
+
+class ReservaSemSobreposicaoMigrationTests(TransactionTestCase):
+    """Migration 0007 em uma base que já tem reservas duplicadas"""
+
+    def migrar(self, alvo):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(alvo)
+        return executor.loader.project_state(alvo).apps
+
+    def tearDown(self):
+        # Devolve o banco ao estado mais recente para os demais testes
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migration_cancela_reservas_sobrepostas(self):
+        """CT-R19: A migration cancela as colisões, mantendo a reserva mais antiga"""
+        apps = self.migrar(ANTES)
+        Sala = apps.get_model("salas", "Sala")
+        Reserva = apps.get_model("reservas", "Reserva")
+        sala = Sala.objects.create(nome="Sala Migration", capacidade=4)
+        outra = Sala.objects.create(nome="Outra Sala Migration", capacidade=4)
+        inicio = timezone.now().replace(microsecond=0) + timedelta(days=3)
+
+        def reservar(sala, horas, duracao=2, **campos):
+            return Reserva.objects.create(
+                sala=sala, usuario="20241001", inicio=inicio + timedelta(hours=horas),
+                fim=inicio + timedelta(hours=horas + duracao), **campos,
+            ).id
+
+        mantida = reservar(sala, 0)
+        duplicada = reservar(sala, 0)
+        sobreposta = reservar(sala, 1)
+        # Colidia só com a sobreposta, que será cancelada: fica ativa
+        seguinte = reservar(sala, 2.5)
+        ja_cancelada = reservar(sala, 0, cancelada=True)
+        outra_sala = reservar(outra, 0)
+
+        with self.assertLogs("reservas.migrations.0007_reserva_sem_sobreposicao", "WARNING") as logs:
+            apps = self.migrar(DEPOIS)
+        self.assertEqual(len(logs.output), 2)
+        Reserva = apps.get_model("reservas", "Reserva")
+        canceladas = set(Reserva.objects.filter(cancelada=True).values_list("id", flat=True))
+        self.assertEqual(canceladas, {duplicada, sobreposta, ja_cancelada})
+        self.assertFalse(Reserva.objects.filter(id__in=[mantida, seguinte, outra_sala], cancelada=True).exists())
@@ -0,0 +1,52 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from reservas import perf
+from reservas.carga import gerar_dados_carga
+
+
+class PerfTests(TestCase):
+    """Testes para o harness de benchmark (reservas/perf.py)"""
+
+    def test_percentil(self):
+        """CT-P1: Percentis por interpolação linear"""
+        valores = [10, 1, 4, 3, 2, 5, 6, 7, 8, 9]
+        self.assertEqual(perf.percentil(valores, 50), 5.5)
+        self.assertAlmostEqual(perf.percentil(valores, 95), 9.55)
+        self.assertEqual(perf.percentil([7], 95), 7)
+        self.assertEqual(perf.percentil([], 50), 0.0)
+
+    def test_comparar_aponta_regressoes(self):
+        """CT-P2: Comparação acusa p95 acima da tolerância e consultas a mais"""
+        base = {"a": {"p95_ms": 10.0, "consultas_max": 3}, "b": {"p95_ms": 10.0, "consultas_max": 3}}
+        atual = {
+            "a": {"p95_ms": 11.9, "consultas_max": 3},
+            "b": {"p95_ms": 12.5, "consultas_max": 4},
+            "novo": {"p95_ms": 99.0, "consultas_max": 99},
+        }
+
+        regressoes = perf.comparar(base, atual, tolerancia_pct=20)
+
+        self.assertEqual(len(regressoes), 2)
+        self.assertTrue(all(r.startswith("b:") for r in regressoes))
+
+    def test_executa_todos_os_cenarios(self):
+        """CT-P3: Todos os endpoints respondem com sucesso sobre dados de carga"""
+        hoje = date(2026, 3, 2)
+        gerar_dados_carga(
+            salas=5, usuarios=20, reservas=200, semestres=1, dias_futuros=5, data_referencia=hoje
+        )
+        cache.clear()
+
+        resultado = perf.executar(repeticoes=3, hoje=hoje)
+
+        self.assertEqual(set(resultado), {
+            "api_horarios_disponiveis", "api_criar_reserva", "minhas_reservas", "admin_reservas",
+            "gerenciar_usuarios", "admin_dashboard", "salas_admin",
+        })
+        for nome, medida in resultado.items():
+            self.assertEqual(medida["requisicoes"], 3, nome)
+            self.assertTrue(set(medida["status"]) <= {200, 201}, (nome, medida["status"]))
+            self.assertGreater(medida["consultas_max"], 0, nome)
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from reservas.models import Reserva
+from salas.models import Sala
+
+
+class PerfilamentoTests(TestCase):
+    """Testes para PerfilamentoMiddleware (cProfile sob demanda)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="senha123"
+        )
+        cls.estudante = User.objects.create_user(
+            username="20241001", email="aluno@ifpb.edu.br", password="senha123"
+        )
+        sala = Sala.objects.create(nome="Sala Perfil", capacidade=6, tipo="Coletiva")
+        inicio = timezone.now() + timedelta(days=1)
+        Reserva.objects.create(
+            sala=sala, usuario=cls.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2)
+        )
+
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+
+    def configurar(self, **extra):
+        valores = {
+            "PERFIL_ATIVO": True,
+            "PERFIL_DIRETORIO": str(self.diretorio),
+            "PERFIL_LIMIAR_MS": 60_000,
+            "PERFIL_AMOSTRAGEM": 0.0,
+            "PERFIL_MAX_ARQUIVOS": 10,
+        }
+        valores.update(extra)
+        contexto = override_settings(**valores)
+        contexto.enable()
+        self.addCleanup(contexto.disable)
+
+    def cliente(self, usuario):
+        # Cliente novo carrega o middleware com as configurações atuais
+        cliente = Client()
+        cliente.force_login(usuario)
+        return cliente
+
+    def perfis(self):
+        return sorted(p.name for p in self.diretorio.glob("*.prof"))
+
+    def test_staff_pede_perfil(self):
+        """CT-PF1: Staff com ?_perfil=1 ou X-Perfil recebe o perfil da requisição"""
+        self.configurar()
+        admin = self.cliente(self.admin)
+
+        with self.assertLogs("reservas.perfilador", "WARNING"):
+            resp = admin.get(reverse("admin_reservas"), {"_perfil": "1"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.perfis(), [resp["X-Perfil"]])
+        self.assertIn("admin_reservas", resp["X-Perfil"])
+        resumo = (self.diretorio / resp["X-Perfil"]).with_suffix(".txt").read_text(encoding="utf-8")
+        self.assertIn("cumulative", resumo)
+
+        with self.assertLogs("reservas.perfilador", "WARNING"):
+            admin.get(reverse("gerenciar_usuarios"), HTTP_X_PERFIL="1")
+        self.assertEqual(len(self.perfis()), 2)
+
+    def test_estudante_nao_pode_pedir_perfil(self):
+        """CT-PF2: Pedido de perfil de usuário comum é ignorado"""
+        self.configurar()
+        resp = self.cliente(self.estudante).get(reverse("minhas_reservas"), {"_perfil": "1"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("X-Perfil", resp)
+        self.assertEqual(self.perfis(), [])
+
+    def test_amostra_lenta_salva_e_rapida_descartada(self):
+        """CT-PF3: Amostras só viram arquivo acima do limiar"""
+        self.configurar(PERFIL_AMOSTRAGEM=1.0)
+        self.cliente(self.estudante).get(reverse("minhas_reservas"))
+        self.assertEqual(self.perfis(), [])
+
+        self.configurar(PERFIL_AMOSTRAGEM=1.0, PERFIL_LIMIAR_MS=0)
+        with self.assertLogs("reservas.perfilador", "WARNING"):
+            self.cliente(self.estudante).get(reverse("minhas_reservas"))
+        self.assertEqual(len(self.perfis()), 1)
+
+    def test_lenta_fora_da_amostra_vai_para_o_log(self):
+        """CT-PF6: Requisição acima do limiar sem perfil é registrada com a rota"""
+        self.configurar(PERFIL_AMOSTRAGEM=0.0, PERFIL_LIMIAR_MS=0)
+        with self.assertLogs("reservas.perfilador", "WARNING") as logs:
+            resp = self.cliente(self.estudante).get(reverse("minhas_reservas"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("(minhas_reservas)", logs.output[0])
+        self.assertEqual(self.perfis(), [])
+
+    def test_rotacao(self):
+        """CT-PF4: Só os perfis mais recentes são mantidos"""
+        self.configurar(PERFIL_MAX_ARQUIVOS=2)
+        admin = self.cliente(self.admin)
+
+        with self.assertLogs("reservas.perfilador", "WARNING"):
+            nomes = [admin.get(reverse("admin_reservas"), {"_perfil": "1"})["X-Perfil"] for _ in range(4)]
+
+        self.assertEqual(self.perfis(), sorted(nomes[-2:]))
+        self.assertEqual(len(list(self.diretorio.glob("*.txt"))), 2)
+
+    def test_desligado_por_padrao(self):
+        """CT-PF5: Sem PERFIL_ATIVO nada é perfilado"""
+        with override_settings(PERFIL_DIRETORIO=str(self.diretorio)):
+            resp = self.cliente(self.admin).get(reverse("admin_reservas"), {"_perfil": "1"})
+        self.assertNotIn("X-Perfil", resp)
+        self.assertEqual(self.perfis(), [])
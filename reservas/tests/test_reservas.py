@@ -2,17 +2,34 @@
 Testes unitários para o módulo de Reservas
 Cobre: criação, listagem, cancelamento e validações de reservas
 """
+import importlib
 import json
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
+from django.apps import apps
 from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.management import CommandError, call_command
 from django.contrib.auth import get_user_model
+from django.db import DatabaseError, IntegrityError, connection, models, transaction
+from django.db.models import Count
 from django.test import Client, TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.utils import timezone
-
-from reservas.models import Reserva
+from rest_framework.authtoken.models import Token
+
+from reservas import grades
+from reservas.carga import limpar_dados_de_carga
+from reservas.dashboard import obter_metricas
+from reservas.disponibilidade import horarios_da_sala
+from reservas.email_service import processar_fila
+from reservas.models import EmailPendente, Reserva
+from reservas.views import get_user_type, user_type_expression
 from salas.models import Sala
 
 
@@ -177,7 +194,7 @@ class ReservaTests(TestCase):
         payload = {
             "sala_id": self.sala.id,
             "data": data_futura,
-            "inicio": "09:00",
+            "inicio": "08:00",
             "fim": "10:00",
         }
 
@@ -188,12 +205,42 @@ class ReservaTests(TestCase):
         )
 
         self.assertEqual(resp.status_code, 201)
+        # O envio sai do ciclo da requisição: a view só grava na outbox
+        self.assertEqual(len(mail.outbox), 0)
+        processar_fila()
         self.assertEqual(len(mail.outbox), 1)
         email = mail.outbox[0]
         self.assertIn("Confirmacao de Reserva", email.subject)
         self.assertEqual(email.to, ["coelho.danillo@academico.ifpb.edu.br"])
         self.assertIn("Sala Teste Reserva", email.body)
 
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        RESERVA_EMAIL_DESTINO="coelho.danillo@academico.ifpb.edu.br",
+    )
+    def test_reserva_e_email_na_mesma_transacao(self):
+        """CT-R4c: Se a outbox falha, nem a reserva nem o cancelamento são gravados"""
+        self.login_estudante()
+        payload = {
+            "sala_id": self.sala.id,
+            "data": (timezone.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "inicio": "10:00",
+            "fim": "12:00",
+        }
+        with mock.patch.object(EmailPendente.objects, "create", side_effect=DatabaseError("outbox")), \
+                self.assertRaises(DatabaseError):
+            self.client.post(reverse("api_criar_reserva"), json.dumps(payload), content_type="application/json")
+        self.assertFalse(Reserva.objects.exists())
+
+        resp = self.client.post(reverse("api_criar_reserva"), json.dumps(payload), content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(EmailPendente.objects.count(), 1)
+
+        with mock.patch.object(EmailPendente.objects, "create", side_effect=DatabaseError("outbox")), \
+                self.assertRaises(DatabaseError):
+            self.client.post(reverse("api_cancelar_reserva", args=[resp.json()["id"]]))
+        self.assertFalse(Reserva.objects.get().cancelada)
+
     # ========== TESTES DE LISTAGEM DE RESERVAS ==========
 
     def test_listar_minhas_reservas(self):
@@ -270,6 +317,8 @@ class ReservaTests(TestCase):
         resp = self.client.post(reverse("api_cancelar_reserva", args=[reserva.id]))
 
         self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        processar_fila()
         self.assertEqual(len(mail.outbox), 1)
         email = mail.outbox[0]
         self.assertIn("Cancelamento de Reserva", email.subject)
@@ -368,6 +417,35 @@ class ReservaTests(TestCase):
         resp = self.client.get(reverse("admin_reservas") + "?page=1")
         self.assertEqual(resp.status_code, 200)
 
+    def test_admin_reservas_consultas_nao_crescem_com_reservas(self):
+        """CT-R12b: Listagem admin não faz uma consulta de usuário por reserva"""
+        self.login_admin()
+
+        def criar(qtd, offset):
+            for i in range(qtd):
+                inicio = timezone.now() + timedelta(days=offset + i, hours=10)
+                Reserva.objects.create(
+                    sala=self.sala,
+                    usuario=self.estudante.username if i % 2 else self.estudante2.username,
+                    inicio=inicio,
+                    fim=inicio + timedelta(hours=2),
+                )
+
+        criar(3, 10)
+        # A primeira requisição após o login grava a renovação da sessão
+        self.client.get(reverse("admin_reservas"))
+        with CaptureQueriesContext(connection) as poucas:
+            resp = self.client.get(reverse("admin_reservas"))
+        criar(30, 100)
+        with CaptureQueriesContext(connection) as muitas:
+            resp = self.client.get(reverse("admin_reservas"))
+
+        self.assertEqual(len(poucas), len(muitas))
+        self.assertEqual(len(resp.context["reservas"]), 8)
+        self.assertEqual(resp.context["total"], 33)
+        self.assertContains(resp, "João Silva")
+        self.assertContains(resp, "Maria Santos")
+
     # ========== TESTES DE AUTORIZAÇÃO ==========
 
     def test_estudante_nao_acessa_admin_reservas(self):
@@ -407,6 +485,92 @@ class ReservaTests(TestCase):
         self.assertEqual(resp.status_code, 403)
 
 
+    # ========== TESTES DO VÍNCULO COM O USUÁRIO ==========
+
+    def test_reserva_vincula_conta_pelo_username(self):
+        """CT-R17: Reserva nova recebe a FK do usuário a partir do username"""
+        inicio = timezone.now() + timedelta(days=9)
+        reserva = Reserva.objects.create(
+            sala=self.sala, usuario=self.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2),
+        )
+        self.assertEqual(reserva.conta, self.estudante)
+
+        reserva = Reserva.objects.create(
+            sala=self.sala, conta=self.estudante2, inicio=inicio + timedelta(hours=2), fim=inicio + timedelta(hours=4),
+        )
+        self.assertEqual(reserva.usuario, self.estudante2.username)
+
+    def test_reserva_com_conta_nao_busca_usuario(self):
+        """CT-R17b: Com `conta` informada a criação não consulta o usuário pelo username"""
+        inicio = timezone.now() + timedelta(days=9)
+        with self.assertNumQueries(1):  # só o INSERT
+            Reserva.objects.create(
+                sala=self.sala, usuario=self.estudante.username, conta=self.estudante,
+                inicio=inicio, fim=inicio + timedelta(hours=2),
+            )
+
+        self.login_estudante()
+        payload = {"sala_id": self.sala.id, "data": (inicio + timedelta(days=1)).strftime("%Y-%m-%d"),
+                   "inicio": "10:00", "fim": "12:00"}
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse("api_criar_reserva"), json.dumps(payload), content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertFalse([q for q in ctx.captured_queries if '"auth_user"."username" =' in q["sql"]])
+
+    def test_backfill_preenche_conta_em_lotes(self):
+        """CT-R18: Migration de backfill liga reservas antigas aos usuários"""
+        backfill = importlib.import_module("reservas.migrations.0010_backfill_reserva_conta")
+        inicio = timezone.now() + timedelta(days=9)
+        for i, usuario in enumerate([self.estudante.username, self.estudante2.username, "removido"] * 3):
+            Reserva.objects.create(
+                sala=self.sala, usuario=usuario, inicio=inicio + timedelta(hours=2 * i), fim=inicio + timedelta(hours=2 * i + 1),
+            )
+        Reserva.objects.update(conta=None)
+
+        with mock.patch.object(backfill, "TAMANHO_LOTE", 2):
+            backfill.preencher_conta(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(Reserva.objects.filter(conta=self.estudante).count(), 3)
+        self.assertEqual(Reserva.objects.filter(conta=self.estudante2).count(), 3)
+        self.assertEqual(Reserva.objects.filter(conta__isnull=True, usuario="removido").count(), 3)
+
+    # ========== TESTES DE CONCORRÊNCIA ==========
+
+    def test_banco_rejeita_reserva_ativa_duplicada(self):
+        """CT-R15: Constraint impede duas reservas ativas no mesmo início da sala"""
+        inicio = timezone.now() + timedelta(days=8)
+        Reserva.objects.create(
+            sala=self.sala, usuario=self.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2),
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reserva.objects.create(
+                sala=self.sala, usuario=self.estudante2.username, inicio=inicio, fim=inicio + timedelta(hours=2),
+            )
+
+        # Reservas canceladas não ocupam o horário
+        Reserva.objects.filter(sala=self.sala, inicio=inicio).update(cancelada=True)
+        Reserva.objects.create(
+            sala=self.sala, usuario=self.estudante2.username, inicio=inicio, fim=inicio + timedelta(hours=2),
+        )
+
+    def test_conflito_concorrente_retorna_409(self):
+        """CT-R16: Reserva perdida para requisição concorrente retorna 409"""
+        self.login_estudante()
+        data_futura = (timezone.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        payload = {"sala_id": self.sala.id, "data": data_futura, "inicio": "16:00", "fim": "18:00"}
+
+        # Simula outra requisição inserindo a reserva entre a verificação e o INSERT
+        with mock.patch.object(Reserva.objects, "create", side_effect=IntegrityError):
+            resp = self.client.post(
+                reverse("api_criar_reserva"),
+                data=json.dumps(payload),
+                content_type="application/json",
+            )
+
+        self.assertEqual(resp.status_code, 409)
+        self.assertFalse(Reserva.objects.filter(sala=self.sala).exists())
+
 class HorariosDisponiveisTests(TestCase):
     """Testes para a API de horários disponíveis"""
 
@@ -467,3 +631,648 @@ class HorariosDisponiveisTests(TestCase):
         )
 
         self.assertEqual(resp.status_code, 404)
+
+    def test_horarios_marca_faixa_reservada_como_indisponivel(self):
+        """CT-H4: Faixa com reserva ativa aparece indisponível"""
+        self.client.force_login(self.user)
+        data_futura = (timezone.now() + timedelta(days=5)).date()
+        inicio = timezone.make_aware(datetime.combine(data_futura, time(10, 0)))
+        Reserva.objects.create(
+            sala=self.sala,
+            usuario=self.user.username,
+            inicio=inicio,
+            fim=inicio + timedelta(hours=2),
+        )
+        Reserva.objects.create(
+            sala=self.sala,
+            usuario=self.user.username,
+            inicio=inicio + timedelta(hours=4),
+            fim=inicio + timedelta(hours=6),
+            cancelada=True,
+        )
+
+        resp = self.client.get(
+            reverse("api_horarios_disponiveis", args=[self.sala.id]),
+            {"data": data_futura.strftime("%Y-%m-%d")}
+        )
+
+        disponibilidade = {h["range"]: h["disponivel"] for h in resp.json()}
+        self.assertFalse(disponibilidade["10:00 - 12:00"])
+        self.assertTrue(disponibilidade["08:00 - 10:00"])
+        self.assertTrue(disponibilidade["12:00 - 14:00"])
+        # Reserva cancelada não bloqueia o horário
+        self.assertTrue(disponibilidade["14:00 - 16:00"])
+
+    def test_horarios_da_sala_usa_uma_query(self):
+        """CT-H5: Disponibilidade do dia é calculada com uma única query"""
+        data_futura = (timezone.now() + timedelta(days=5)).date()
+        for hora in (8, 12, 16, 20):
+            inicio = timezone.make_aware(datetime.combine(data_futura, time(hora, 0)))
+            Reserva.objects.create(
+                sala=self.sala,
+                usuario=self.user.username,
+                inicio=inicio,
+                fim=inicio + timedelta(hours=2),
+            )
+
+        grades.obter()  # grades compiladas ficam em memória entre requisições
+        with self.assertNumQueries(1):
+            horarios = horarios_da_sala(self.sala.id, data_futura)
+
+        self.assertEqual(
+            [h["disponivel"] for h in horarios],
+            [False, True, False, True, False, True, False],
+        )
+
+
+class MatrizDisponibilidadeTests(TestCase):
+    """Testes para a API de matriz de disponibilidade (sala x dia x horário)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sala_projetor = Sala.objects.create(
+            nome="Sala Matriz A",
+            capacidade=30,
+            tipo="Coletiva",
+            equipamentos=["Projetor", "Quadro branco"],
+        )
+        cls.sala_pequena = Sala.objects.create(
+            nome="Sala Matriz B",
+            capacidade=8,
+            tipo="Coletiva",
+            equipamentos=["Quadro branco"],
+        )
+        cls.auditorio = Sala.objects.create(
+            nome="Auditorio Matriz",
+            capacidade=100,
+            tipo="Auditorio",
+        )
+        cls.sala_inativa = Sala.objects.create(
+            nome="Sala Matriz Inativa",
+            capacidade=30,
+            tipo="Coletiva",
+            ativo=False,
+        )
+        cls.dia = (timezone.now() + timedelta(days=3)).date()
+        inicio = timezone.make_aware(datetime.combine(cls.dia, time(14, 0)))
+        Reserva.objects.create(
+            sala=cls.sala_projetor,
+            usuario="20231001",
+            inicio=inicio,
+            fim=inicio + timedelta(hours=2),
+        )
+
+    def get_matriz(self, **params):
+        return self.client.get(reverse("api_matriz_disponibilidade"), params)
+
+    def test_matriz_periodo_com_consultas_constantes(self):
+        """CT-M1: Matriz cobre todas as salas ativas e dias com duas queries"""
+        fim = self.dia + timedelta(days=6)
+        grades.obter()
+        with self.assertNumQueries(2):
+            resp = self.get_matriz(inicio=self.dia.isoformat(), fim=fim.isoformat())
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(len(data["horarios"]), 7)
+        ids = {s["id"] for s in data["salas"]}
+        self.assertEqual(ids, {self.sala_projetor.id, self.sala_pequena.id, self.auditorio.id})
+
+        sala = next(s for s in data["salas"] if s["id"] == self.sala_projetor.id)
+        self.assertEqual(len(sala["disponibilidade"]), 7)
+        self.assertEqual(
+            sala["disponibilidade"][self.dia.isoformat()],
+            [True, True, True, False, True, True, True],
+        )
+        self.assertTrue(all(sala["disponibilidade"][fim.isoformat()]))
+
+    def test_matriz_filtros(self):
+        """CT-M2: Filtros de tipo, capacidade mínima e equipamentos"""
+        dia = self.dia.isoformat()
+
+        data = self.get_matriz(inicio=dia, tipo="Auditorio").json()
+        self.assertEqual([s["id"] for s in data["salas"]], [self.auditorio.id])
+
+        data = self.get_matriz(inicio=dia, capacidade_min=10).json()
+        self.assertNotIn(self.sala_pequena.id, [s["id"] for s in data["salas"]])
+
+        data = self.get_matriz(inicio=dia, equipamentos="projetor, Quadro branco").json()
+        self.assertEqual([s["id"] for s in data["salas"]], [self.sala_projetor.id])
+
+    def test_matriz_periodo_invalido(self):
+        """CT-M3: Períodos invertidos, longos demais ou mal formatados retornam 400"""
+        dia = self.dia
+        self.assertEqual(self.get_matriz(inicio=dia.isoformat(), fim=(dia - timedelta(days=1)).isoformat()).status_code, 400)
+        self.assertEqual(self.get_matriz(inicio=dia.isoformat(), fim=(dia + timedelta(days=40)).isoformat()).status_code, 400)
+        self.assertEqual(self.get_matriz(inicio="31/12/2025").status_code, 400)
+        self.assertEqual(self.get_matriz(inicio=dia.isoformat(), capacidade_min="muitos").status_code, 400)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX_MAX_TENTATIVAS=2,
+)
+class EmailOutboxTests(TestCase):
+    """Testes para a outbox de e-mails e o worker `processar_emails`"""
+
+    def setUp(self):
+        mail.outbox.clear()
+
+    def enfileirar(self, n=1):
+        for i in range(n):
+            EmailPendente.objects.create(assunto=f"Assunto {i}", corpo="Corpo", destinatario="a@b.com")
+
+    def test_lote_enviado_por_uma_conexao(self):
+        """CT-E1: Um lote é enviado reutilizando uma única conexão"""
+        self.enfileirar(3)
+
+        with mock.patch("reservas.email_service.get_connection", wraps=get_connection) as conexao:
+            self.assertEqual(processar_fila(limite=10), 3)
+
+        conexao.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            EmailPendente.objects.filter(status=EmailPendente.STATUS_ENVIADO, enviado_em__isnull=False).count(), 3
+        )
+        # Fila vazia: nada a processar
+        self.assertEqual(processar_fila(), 0)
+
+    def test_falha_reagenda_com_backoff_e_desiste(self):
+        """CT-E2: Falhas são reagendadas com backoff até o limite de tentativas"""
+        self.enfileirar()
+
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP fora do ar")):
+            processar_fila()
+        pendente = EmailPendente.objects.get()
+        self.assertEqual(pendente.status, EmailPendente.STATUS_PENDENTE)
+        self.assertEqual(pendente.tentativas, 1)
+        self.assertGreater(pendente.proxima_tentativa, timezone.now())
+        self.assertIn("SMTP fora do ar", pendente.ultimo_erro)
+
+        # Ainda não venceu: não é reprocessado
+        self.assertEqual(processar_fila(), 0)
+
+        EmailPendente.objects.update(proxima_tentativa=timezone.now())
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP fora do ar")):
+            processar_fila()
+        pendente.refresh_from_db()
+        self.assertEqual(pendente.status, EmailPendente.STATUS_FALHOU)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_falha_de_conexao_conta_para_o_lote(self):
+        """CT-E4: Sem conexão SMTP o lote inteiro recua pelo backoff até desistir"""
+        self.enfileirar(2)
+        conexao = mock.Mock(**{"open.side_effect": OSError("SMTP recusou a conexão")})
+
+        with mock.patch("reservas.email_service.get_connection", return_value=conexao), \
+                self.assertLogs("reservas.email_service", "WARNING"):
+            self.assertEqual(processar_fila(), 2)
+        for pendente in EmailPendente.objects.all():
+            self.assertEqual(pendente.status, EmailPendente.STATUS_PENDENTE)
+            self.assertEqual(pendente.tentativas, 1)
+            self.assertGreater(pendente.proxima_tentativa, timezone.now())
+            self.assertIn("recusou a conexão", pendente.ultimo_erro)
+
+        EmailPendente.objects.update(proxima_tentativa=timezone.now())
+        with mock.patch("reservas.email_service.get_connection", return_value=conexao), \
+                self.assertLogs("reservas.email_service", "WARNING"):
+            processar_fila()
+        self.assertEqual(EmailPendente.objects.filter(status=EmailPendente.STATUS_FALHOU).count(), 2)
+        conexao.close.assert_called()
+
+    def test_comando_esvazia_fila(self):
+        """CT-E3: `processar_emails --uma-vez` envia tudo e encerra"""
+        self.enfileirar(5)
+
+        call_command("processar_emails", "--uma-vez", "--lote", "2", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(EmailPendente.objects.filter(status=EmailPendente.STATUS_PENDENTE).exists())
+
+
+class GerenciarUsuariosTests(TestCase):
+    """Testes para a listagem administrativa de usuários"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="admin123",
+        )
+        cls.estudante = User.objects.create_user(
+            username="20231001", email="joao@academico.ifpb.edu.br", password="senha123",
+            first_name="João", last_name="Silva",
+        )
+        cls.professor_siape = User.objects.create_user(
+            username="siape123", email="ana@ifpb.edu.br", password="senha123",
+            first_name="Ana", last_name="Souza",
+        )
+        cls.professor_nome = User.objects.create_user(
+            username="20230999", email="carlos@ifpb.edu.br", password="senha123",
+            first_name="Prof Carlos", is_active=False,
+        )
+        cls.sala = Sala.objects.create(nome="Sala Usuarios", capacidade=10, tipo="Coletiva")
+        inicio = timezone.now() + timedelta(days=2)
+        for i in range(3):
+            Reserva.objects.create(
+                sala=cls.sala, usuario=cls.estudante.username,
+                inicio=inicio + timedelta(hours=2 * i), fim=inicio + timedelta(hours=2 * i + 1),
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def usuarios_por_id(self, resp):
+        return {u["id"]: u for u in resp.context["usuarios"]}
+
+    def test_tipos_contagens_e_reservas(self):
+        """CT-U1: Tipo, estatísticas e total de reservas vêm do banco"""
+        resp = self.client.get(reverse("gerenciar_usuarios"))
+
+        self.assertEqual(resp.status_code, 200)
+        usuarios = self.usuarios_por_id(resp)
+        self.assertEqual(usuarios[self.admin.id]["tipo"], "admin")
+        self.assertEqual(usuarios[self.estudante.id]["tipo"], "estudante")
+        self.assertEqual(usuarios[self.professor_siape.id]["tipo"], "professor")
+        self.assertEqual(usuarios[self.professor_nome.id]["tipo_display"], "Professor")
+        self.assertEqual(usuarios[self.estudante.id]["reservas_count"], 3)
+        self.assertEqual(usuarios[self.professor_siape.id]["reservas_count"], 0)
+        self.assertEqual(resp.context["total_usuarios"], 4)
+        self.assertEqual(resp.context["usuarios_ativos"], 3)
+        self.assertEqual(resp.context["total_estudantes"], 1)
+        self.assertEqual(resp.context["total_professores"], 2)
+
+    def test_regra_de_tipo_igual_no_banco_e_no_python(self):
+        """CT-U1b: "Prof" no nome vale sem diferenciar maiúsculas nas contagens e no rótulo"""
+        User = get_user_model()
+        professora = User.objects.create_user(username="20230777", password="senha123", first_name="professora Maria")
+        estudante = User.objects.create_user(username="20230778", password="senha123", first_name="Rafael")
+
+        anotados = dict(
+            User.objects.filter(id__in=[professora.id, estudante.id])
+            .annotate(tipo=user_type_expression()).values_list("id", "tipo")
+        )
+        for usuario in (professora, estudante):
+            self.assertEqual(anotados[usuario.id], get_user_type(usuario))
+        self.assertEqual(anotados[professora.id], "professor")
+
+        resp = self.client.get(reverse("gerenciar_usuarios"))
+        self.assertEqual(self.usuarios_por_id(resp)[professora.id]["tipo"], "professor")
+        self.assertEqual(resp.context["total_professores"], 3)
+
+    def test_filtros_tipo_e_status(self):
+        """CT-U2: Filtros de tipo e status são aplicados na consulta"""
+        resp = self.client.get(reverse("gerenciar_usuarios"), {"tipo": "professor"})
+        self.assertEqual(set(self.usuarios_por_id(resp)), {self.professor_siape.id, self.professor_nome.id})
+
+        resp = self.client.get(reverse("gerenciar_usuarios"), {"tipo": "professor", "status": "ativo"})
+        self.assertEqual(set(self.usuarios_por_id(resp)), {self.professor_siape.id})
+        self.assertEqual(resp.context["page_obj"].paginator.count, 1)
+
+    def test_consultas_nao_crescem_com_usuarios(self):
+        """CT-U3: Número de consultas independe da quantidade de usuários"""
+        # A primeira requisição após o login grava a renovação da sessão
+        self.client.get(reverse("gerenciar_usuarios"))
+        with CaptureQueriesContext(connection) as poucos:
+            self.client.get(reverse("gerenciar_usuarios"))
+
+        User = get_user_model()
+        for i in range(20):
+            User.objects.create_user(username=f"2024{i:04d}", password="senha123")
+        with CaptureQueriesContext(connection) as muitos:
+            resp = self.client.get(reverse("gerenciar_usuarios"))
+
+        self.assertEqual(len(poucos), len(muitos))
+        self.assertEqual(len(resp.context["usuarios"]), 8)
+
+
+class DashboardMetricasTests(TestCase):
+    """Testes para as métricas (cacheadas) do dashboard administrativo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(
+            username="admin@ifpb.edu.br", email="admin@ifpb.edu.br", password="admin123",
+        )
+        cls.estudante = User.objects.create_user(
+            username="20231001", password="senha123", first_name="João", last_name="Silva",
+        )
+        cls.sala = Sala.objects.create(nome="Sala Dashboard", capacidade=10, tipo="Coletiva")
+        Sala.objects.create(nome="Sala Manutencao", capacidade=10, tipo="Coletiva", status="Em Manutencao")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def criar_reserva(self, dias):
+        inicio = timezone.now() + timedelta(days=dias)
+        # As versões só mudam no commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reserva.objects.create(
+                sala=self.sala, usuario=self.estudante.username, inicio=inicio, fim=inicio + timedelta(hours=2),
+            )
+
+    def test_dashboard_exibe_kpis(self):
+        """CT-D1: Dashboard calcula KPIs e próximas reservas"""
+        self.criar_reserva(1)
+        self.criar_reserva(2)
+
+        resp = self.client.get(reverse("admin_dashboard"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_reservas"], 2)
+        self.assertEqual(resp.context["total_salas"], 2)
+        self.assertEqual(resp.context["salas_disponiveis"], 1)
+        self.assertEqual(resp.context["salas_manutencao"], 1)
+        self.assertEqual(resp.context["total_usuarios"], 2)
+        self.assertEqual(resp.context["total_estudantes"], 1)
+        self.assertEqual(json.loads(resp.context["salas_manutencao_json"]), ["Sala Manutencao"])
+        self.assertEqual(resp.context["proximas_reservas"][0]["usuario"], "João Silva")
+
+    def test_metricas_servidas_do_cache(self):
+        """CT-D2: Segunda leitura das métricas não consulta o banco"""
+        obter_metricas()
+        with self.assertNumQueries(0):
+            obter_metricas()
+
+    def test_escrita_invalida_cache(self):
+        """CT-D3: Criar/cancelar reserva ou alterar sala invalida as métricas"""
+        self.assertEqual(obter_metricas()["total_reservas"], 0)
+
+        reserva = self.criar_reserva(1)
+        self.assertEqual(obter_metricas()["total_reservas"], 1)
+
+        self.sala.status = "Em Manutencao"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sala.save()
+        self.assertEqual(obter_metricas()["salas_manutencao"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.delete()
+        resp = self.client.get(reverse("api_dashboard_data"))
+        self.assertEqual(resp.json()["total_reservas"], 0)
+
+
+class DadosCargaTests(TestCase):
+    """Testes para o comando `gerar_dados_carga`"""
+
+    ARGS = [
+        "--salas", "6", "--usuarios", "15", "--reservas", "300", "--semestres", "1",
+        "--dias-futuros", "5", "--data-referencia", "2026-03-02", "--lote", "40",
+    ]
+
+    def gerar(self, *extra):
+        call_command("gerar_dados_carga", *self.ARGS, *extra, stdout=StringIO())
+        return set(
+            Reserva.objects.values_list("sala__nome", "usuario", "inicio", "cancelada")
+        )
+
+    def test_gera_quantidades_sem_sobreposicao(self):
+        """CT-G1: Quantidades pedidas, conta preenchida e nenhuma sobreposição"""
+        self.gerar()
+
+        self.assertEqual(Sala.objects.filter(nome__startswith="Carga ").count(), 6)
+        self.assertEqual(get_user_model().objects.filter(email__endswith="@carga.ifteca.test").count(), 15)
+        self.assertEqual(Reserva.objects.count(), 300)
+        self.assertFalse(Reserva.objects.filter(conta__isnull=True).exists())
+        self.assertFalse(Reserva.objects.exclude(conta__username=models.F("usuario")).exists())
+        # Faixas fixas da grade: sobreposição implica mesmo início
+        for campo in ("sala", "usuario"):
+            repetidas = (
+                Reserva.objects.values(campo, "inicio").annotate(n=Count("id")).filter(n__gt=1)
+            )
+            self.assertFalse(repetidas.exists(), campo)
+
+    def test_deterministico_pela_semente(self):
+        """CT-G2: Mesma semente gera os mesmos dados; exige --limpar para recriar"""
+        primeira = self.gerar()
+
+        with self.assertRaises(CommandError):
+            self.gerar()
+
+        self.assertEqual(self.gerar("--limpar"), primeira)
+        self.assertNotEqual(self.gerar("--limpar", "--seed", "7"), primeira)
+
+    def test_limpar_em_lotes_sem_sinais(self):
+        """CT-G4: Limpeza apaga em lotes, preserva dados reais e incrementa as versões uma vez"""
+        self.gerar()
+        User = get_user_model()
+        real = Sala.objects.create(nome="Sala Real", capacidade=4)
+        veterano = User.objects.filter(email__endswith="@carga.ifteca.test").order_by("id").first()
+        inicio = timezone.now() + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva_real = Reserva.objects.create(
+                sala=real, usuario=veterano.username, conta=veterano, inicio=inicio, fim=inicio + timedelta(hours=2),
+            )
+        Token.objects.create(user=veterano)
+
+        with mock.patch("reservas.carga.versoes.incrementar") as incrementar, \
+                self.captureOnCommitCallbacks() as callbacks:
+            removidos = limpar_dados_de_carga(tamanho_lote=4)
+
+        self.assertEqual(removidos, {"reservas": 300, "usuarios": 15, "salas": 6})
+        incrementar.assert_called_once()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Sala.objects.filter(nome__startswith="Carga ").exists())
+        self.assertFalse(User.objects.filter(email__endswith="@carga.ifteca.test").exists())
+        self.assertFalse(Token.objects.exists())
+        reserva_real.refresh_from_db()
+        self.assertIsNone(reserva_real.conta)
+        self.assertEqual(list(Reserva.objects.all()), [reserva_real])
+
+    def test_reservas_acima_da_capacidade(self):
+        """CT-G3: Pedido impossível sem sobreposição é recusado antes de inserir"""
+        with self.assertRaises(CommandError):
+            call_command(
+                "gerar_dados_carga", "--salas", "2", "--usuarios", "2", "--reservas", "10000",
+                "--semestres", "1", stdout=StringIO(),
+            )
+        self.assertFalse(Sala.objects.exists())
+
+
+class SalasPublicasTests(TestCase):
+    """Testes para o feed público de salas (paginação, campos, cache e GET condicional)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.salas = [
+            Sala.objects.create(nome=f"Sala Feed {i}", capacidade=10 + i, tipo="Coletiva", localizacao=f"Bloco {i}")
+            for i in range(1, 6)
+        ]
+        Sala.objects.create(nome="Sala Feed Inativa", capacidade=10, tipo="Coletiva", ativo=False)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("salas_publicas")
+
+    def test_lista_apenas_salas_ativas(self):
+        """CT-F1: Corpo continua uma lista com os campos padrão, sem salas inativas"""
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        dados = resp.json()
+        self.assertEqual([s["nome"] for s in dados], [f"Sala Feed {i}" for i in range(1, 6)])
+        self.assertEqual(dados[0], {"nome": "Sala Feed 1", "capacidade": 11, "tipo": "Coletiva"})
+        self.assertEqual(resp["X-Total-Count"], "5")
+        self.assertNotIn("Link", resp)
+
+    @override_settings(SALAS_PUBLICAS_POR_PAGINA=2)
+    def test_sem_parametros_lista_todas(self):
+        """CT-F1b: Sem page nem page_size o feed traz todas as salas; com eles, pagina"""
+        resp = self.client.get(self.url)
+        self.assertEqual(len(resp.json()), 5)
+        self.assertNotIn("Link", resp)
+
+        resp = self.client.get(self.url, {"page": 1})
+        self.assertEqual(len(resp.json()), 2)
+        self.assertIn('rel="next"', resp["Link"])
+
+    def test_paginacao_por_cabecalhos(self):
+        """CT-F2: page/page_size com total e links nos cabeçalhos"""
+        resp = self.client.get(self.url, {"page": 2, "page_size": 2})
+
+        self.assertEqual([s["nome"] for s in resp.json()], ["Sala Feed 3", "Sala Feed 4"])
+        self.assertIn('page=1', resp["Link"])
+        self.assertIn('rel="prev"', resp["Link"])
+        self.assertIn('page=3', resp["Link"])
+        self.assertIn('rel="next"', resp["Link"])
+
+        self.assertEqual(self.client.get(self.url, {"page": 9, "page_size": 2}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {"page": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"page_size": 0}).status_code, 400)
+
+    def test_projecao_de_campos(self):
+        """CT-F3: fields= escolhe os campos e rejeita campos desconhecidos"""
+        resp = self.client.get(self.url, {"fields": "id,localizacao", "page_size": 1})
+        self.assertEqual(resp.json(), [{"id": self.salas[0].id, "localizacao": "Bloco 1"}])
+
+        resp = self.client.get(self.url, {"fields": "nome,ativo"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("detail", resp.json())
+
+    def test_corpo_servido_do_cache_ate_sala_mudar(self):
+        """CT-F4: Consultas repetidas não tocam o banco; salvar uma sala invalida"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+
+        sala = self.salas[0]
+        sala.capacidade = 99
+        with self.captureOnCommitCallbacks(execute=True):
+            sala.save()
+        self.assertEqual(self.client.get(self.url).json()[0]["capacidade"], 99)
+
+        sala.ativo = False
+        with self.captureOnCommitCallbacks(execute=True):
+            sala.save(update_fields=["ativo", "atualizado_em"])
+        self.assertEqual(self.client.get(self.url)["X-Total-Count"], "4")
+
+    def test_get_condicional(self):
+        """CT-F5: If-None-Match e If-Modified-Since respondem 304 até a sala mudar"""
+        resp = self.client.get(self.url)
+        etag, last_modified = resp["ETag"], resp["Last-Modified"]
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        self.assertEqual(resp["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        sala = self.salas[1]
+        sala.nome = "Sala Feed 2B"
+        # Last-Modified tem resolução de segundos
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(seconds=2)):
+            with self.captureOnCommitCallbacks(execute=True):
+                sala.save()
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class MinhasReservasHistoricoTests(TestCase):
+    """Testes para o histórico de 'Minhas Reservas' (resumo, keyset e API)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.estudante = User.objects.create_user(username="20241001", password="senha123")
+        cls.outro = User.objects.create_user(username="20241002", password="senha123")
+        cls.salas = [Sala.objects.create(nome=f"Sala Hist {i}", capacidade=6, tipo="Coletiva") for i in range(2)]
+        base = timezone.now().replace(microsecond=123456) - timedelta(days=60)
+        # 20 reservas passadas, em pares com o mesmo início (desempate por id)
+        for i in range(20):
+            inicio = base + timedelta(days=i // 2)
+            Reserva.objects.create(
+                sala=cls.salas[i % 2], usuario=cls.estudante.username,
+                inicio=inicio, fim=inicio + timedelta(hours=1), cancelada=(i % 5 == 0),
+            )
+        futura = timezone.now() + timedelta(days=2)
+        Reserva.objects.create(sala=cls.salas[0], usuario=cls.estudante.username, inicio=futura, fim=futura + timedelta(hours=1))
+        Reserva.objects.create(
+            sala=cls.salas[1], usuario=cls.estudante.username,
+            inicio=futura, fim=futura + timedelta(hours=1), cancelada=True,
+        )
+        Reserva.objects.create(sala=cls.salas[0], usuario=cls.outro.username, inicio=base, fim=base + timedelta(hours=1))
+        cls.esperado = list(
+            Reserva.objects.filter(usuario=cls.estudante.username)
+            .filter(models.Q(fim__lt=timezone.now()) | models.Q(cancelada=True))
+            .order_by("-inicio", "-id").values_list("id", flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.estudante)
+        # Primeira requisição grava a renovação da sessão
+        self.client.get(reverse("api_minhas_reservas"))
+
+    def test_resumo_em_um_aggregate(self):
+        """CT-R12: Total e divisão ativas/concluídas/canceladas na tela"""
+        resp = self.client.get(reverse("minhas_reservas"))
+
+        self.assertEqual(resp.context["resumo"], {"total": 22, "ativas": 1, "concluidas": 16, "canceladas": 5})
+        self.assertEqual(resp.context["total_reservas"], 22)
+        self.assertEqual(resp.context["page_obj"].paginator.count, 21)
+        self.assertEqual(resp.context["page_obj"].paginator.num_pages, 3)
+
+    def test_paginas_com_consultas_constantes(self):
+        """CT-R13: Primeira e última página fazem as mesmas consultas, sem COUNT do histórico"""
+        with CaptureQueriesContext(connection) as primeira:
+            self.client.get(reverse("minhas_reservas"))
+        with CaptureQueriesContext(connection) as ultima:
+            resp = self.client.get(reverse("minhas_reservas"), {"page": 3})
+
+        self.assertEqual(len(primeira), len(ultima))
+        self.assertEqual([r.id for r in resp.context["reservas_anteriores"]], self.esperado[16:])
+        reservas_sql = [q["sql"] for q in ultima.captured_queries if '"reservas_reserva"' in q["sql"]]
+        self.assertEqual(len(reservas_sql), 3)  # resumo, ativas e página do histórico
+
+    def test_api_percorre_historico_por_cursor(self):
+        """CT-R14: Cursor visita todo o histórico uma vez, mesmo com inícios iguais"""
+        ids, cursor = [], None
+        while True:
+            params = {"limite": 3, **({"cursor": cursor} if cursor else {})}
+            with self.assertNumQueries(2):  # usuário da sessão + página
+                dados = self.client.get(reverse("api_minhas_reservas"), params).json()
+            ids += [r["id"] for r in dados["reservas"]]
+            cursor = dados["proximo_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(ids, self.esperado)
+        primeira = self.client.get(reverse("api_minhas_reservas")).json()["reservas"][0]
+        self.assertEqual(primeira["detalhe"], reverse("detalhes_reserva", args=[primeira["id"]]))
+        self.assertIn(primeira["status"], {"cancelada", "concluida"})
+
+    def test_modo_continuo_e_cursor_invalido(self):
+        """CT-R15: ?continuo=1 traz a primeira página com cursor; cursor adulterado é 400"""
+        resp = self.client.get(reverse("minhas_reservas"), {"continuo": "1"})
+        self.assertIsNone(resp.context["page_obj"])
+        self.assertEqual([r.id for r in resp.context["reservas_anteriores"]], self.esperado[:8])
+        self.assertContains(resp, 'id="historicoSentinel"')
+
+        for cursor in ("???", "WyJ4IiwxXQ"):  # lixo e ["x", 1] (data inválida)
+            resp = self.client.get(reverse("api_minhas_reservas"), {"cursor": cursor})
+            self.assertEqual(resp.status_code, 400)
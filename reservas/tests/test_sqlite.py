@@ -0,0 +1,154 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+
+ALIAS = "sqlite_estresse"
+
+
+class SqliteConcorrenciaTests(unittest.TestCase):
+    """
+    Exercita as opções do SQLite de settings.DATABASES em um arquivo temporário
+    (o banco de testes padrão é em memória, onde WAL não se aplica). Usa um
+    alias próprio, registrado só durante o teste, acessado por várias threads.
+    """
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.diretorio, "estresse.sqlite3")
+        self.configurar(settings.DATABASES["default"]["OPTIONS"])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE reserva (id INTEGER PRIMARY KEY, sala INTEGER, slot INTEGER)"
+            )
+        connections[ALIAS].close()
+
+    def tearDown(self):
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def configurar(self, options):
+        if ALIAS in connections.settings:
+            connections[ALIAS].close()
+            del connections[ALIAS]
+        config = dict(connections["default"].settings_dict)
+        config.update(NAME=self.caminho, OPTIONS=dict(options), CONN_MAX_AGE=0)
+        connections.settings[ALIAS] = config
+
+    def executar_em_threads(self, alvo, quantidade):
+        erros = []
+
+        def rodar(n):
+            try:
+                alvo(n)
+            except OperationalError as exc:
+                erros.append(str(exc))
+            finally:
+                connections[ALIAS].close()
+
+        threads = [threading.Thread(target=rodar, args=(n,)) for n in range(quantidade)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return erros
+
+    def segurar_lock_de_escrita(self, segundos, pronto):
+        """Abre uma transação de escrita e só faz commit depois de `segundos`."""
+        with transaction.atomic(using=ALIAS):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("INSERT INTO reserva (sala, slot) VALUES (0, 0)")
+            pronto.set()
+            time.sleep(segundos)
+
+    # CT-S1: PRAGMAs aplicados em toda nova conexão
+    def test_pragmas_aplicados_na_conexao(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0].upper(), settings.SQLITE_JOURNAL_MODE.upper())
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+
+    # CT-S2: sem os ajustes, um escritor concorrente falha na hora
+    def test_sem_ajustes_escrita_concorrente_falha(self):
+        self.configurar({"transaction_mode": "IMMEDIATE", "timeout": 0})
+        pronto = threading.Event()
+        lock = threading.Thread(target=self.segurar_lock_de_escrita, args=(0.5, pronto))
+        lock.start()
+        pronto.wait()
+        try:
+            with self.assertRaisesRegex(OperationalError, "database is locked"):
+                with transaction.atomic(using=ALIAS):
+                    with connections[ALIAS].cursor() as cursor:
+                        cursor.execute("INSERT INTO reserva (sala, slot) VALUES (1, 1)")
+        finally:
+            lock.join()
+
+    # CT-S3: com busy_timeout o escritor espera o lock; com WAL o leitor não espera
+    def test_com_ajustes_escritor_espera_e_leitor_nao_bloqueia(self):
+        pronto = threading.Event()
+        lock = threading.Thread(target=self.segurar_lock_de_escrita, args=(0.5, pronto))
+        lock.start()
+        pronto.wait()
+        try:
+            inicio = time.monotonic()
+            leitor = sqlite3.connect(self.caminho, timeout=0)
+            self.assertEqual(leitor.execute("SELECT COUNT(*) FROM reserva").fetchone()[0], 0)
+            leitor.close()
+            self.assertLess(time.monotonic() - inicio, 0.4)
+
+            with transaction.atomic(using=ALIAS):
+                with connections[ALIAS].cursor() as cursor:
+                    cursor.execute("INSERT INTO reserva (sala, slot) VALUES (1, 1)")
+        finally:
+            lock.join()
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM reserva")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    # CT-S4: muitos escritores e leitores simultâneos, nenhum "database is locked"
+    def test_estresse_escritores_e_leitores(self):
+        escritores, leitores, por_thread = 8, 4, 40
+
+        def escrever(n):
+            for slot in range(por_thread):
+                # Mesmo padrão de api_criar_reserva: verifica conflito e insere
+                with transaction.atomic(using=ALIAS):
+                    with connections[ALIAS].cursor() as cursor:
+                        cursor.execute(
+                            "SELECT COUNT(*) FROM reserva WHERE sala = %s AND slot = %s", [n, slot]
+                        )
+                        if cursor.fetchone()[0] == 0:
+                            cursor.execute(
+                                "INSERT INTO reserva (sala, slot) VALUES (%s, %s)", [n, slot]
+                            )
+
+        def ler(n):
+            for _ in range(por_thread * 2):
+                with connections[ALIAS].cursor() as cursor:
+                    cursor.execute("SELECT sala, COUNT(*) FROM reserva GROUP BY sala")
+                    cursor.fetchall()
+
+        def misto(n):
+            if n < escritores:
+                escrever(n)
+            else:
+                ler(n)
+
+        erros = self.executar_em_threads(misto, escritores + leitores)
+
+        self.assertEqual(erros, [])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM reserva")
+            self.assertEqual(cursor.fetchone()[0], escritores * por_thread)
@@ -6,6 +6,7 @@ urlpatterns = [
     # Dashboard Admin
     path("admin/dashboard/", views.admin_dashboard, name="admin_dashboard"),
     path("api/dashboard/", views.api_dashboard_data, name="api_dashboard_data"),
+    path("admin/metricas/", views.api_metricas_requisicoes, name="api_metricas_requisicoes"),
     
     # Admin
     path("admin/salas/", views.salas_admin, name="salas_admin"),
@@ -25,6 +26,7 @@ urlpatterns = [
     path("reserva/<int:reserva_id>/", views.detalhes_reserva, name="detalhes_reserva"),
 
     # API
+    path("api/minhas-reservas/", views.api_minhas_reservas, name="api_minhas_reservas"),
     path("api/reservas/<int:reserva_id>/cancelar/", views.api_cancelar_reserva, name="api_cancelar_reserva"),
     path("admin/reservas/<int:reserva_id>/cancelar/", views.api_admin_cancel_reserva, name="api_admin_cancel_reserva"),
 
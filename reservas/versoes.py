@@ -0,0 +1,60 @@
+"""
+Contadores de versão por escopo ("reservas", "salas", ...), guardados no cache.
+
+Cada escrita relevante incrementa a versão do seu escopo (ver `signals.py`);
+valores derivados são cacheados sob chaves que incluem as versões das quais
+dependem, então qualquer escrita invalida todos eles de uma vez, inclusive
+entre processos quando o backend de cache é compartilhado.
+"""
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+PREFIXO = "versao:"
+
+
+def _valor_inicial():
+    # Um contador que sumiu do cache nunca volta a um valor já usado
+    return time.time_ns()
+
+
+def escopo_sala(sala_id):
+    """Escopo das escritas que afetam uma sala (seus dados e suas reservas)."""
+    return f"sala:{sala_id}"
+
+
+def versao(escopo):
+    """Versão atual do escopo (cria o contador na primeira leitura)."""
+    return cache.get_or_set(PREFIXO + escopo, _valor_inicial, timeout=None)
+
+
+def versoes(*escopos):
+    """Versões de vários escopos com uma única ida ao cache."""
+    chaves = [PREFIXO + e for e in escopos]
+    encontradas = cache.get_many(chaves)
+    faltando = {c: _valor_inicial() for c in chaves if c not in encontradas}
+    if faltando:
+        cache.set_many(faltando, timeout=None)
+        encontradas.update(faltando)
+    return tuple(encontradas[c] for c in chaves)
+
+
+def incrementar(*escopos):
+    """Invalida tudo que depende dos escopos informados."""
+    for escopo in escopos:
+        try:
+            cache.incr(PREFIXO + escopo)
+        except ValueError:
+            cache.set(PREFIXO + escopo, _valor_inicial(), timeout=None)
+
+
+def incrementar_apos_commit(*escopos):
+    """
+    Incrementa só depois do commit da transação atual (na hora, fora de uma).
+
+    Antes do commit, uma leitura concorrente combinaria a versão nova com as
+    linhas antigas e geraria um ETag que continuaria valendo para dados velhos.
+    """
+    transaction.on_commit(partial(incrementar, *escopos))
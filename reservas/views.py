@@ -1,21 +1,35 @@
+import asyncio
 import json
 import logging
-from datetime import timedelta
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.utils import timezone
-from django.db import models
-from django.db.models import Count
-from django.db.models.functions import TruncMonth
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 
 # Use the canonical Sala model from the `salas` app to avoid duplication
 from salas.models import Sala
+from salas.paginacao import CursorInvalido, paginar_por_cursor
 from .models import Reserva
+from . import etags, eventos, feed_salas, grades, instrumentacao
+from .dashboard import obter_metricas
+from .disponibilidade import horarios_da_sala, limites_do_dia, matriz_disponibilidade
 from .email_service import enviar_confirmacao, enviar_cancelamento
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
@@ -29,6 +43,8 @@ logger = logging.getLogger(__name__)
 # ============================================
 
 @login_required(login_url="/login/")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etags.salas_admin)
 def salas_admin(request):
     """
     Endpoint GET/POST /api/admin/salas/
@@ -304,7 +320,7 @@ def deletar_sala(request, sala_id):
 
     # Soft delete: mantém histórico de reservas e libera nome para novas salas
     sala.ativo = False
-    sala.save(update_fields=["ativo"])
+    sala.save(update_fields=["ativo", "atualizado_em"])
     return JsonResponse({"detail": "Sala desativada com sucesso."}, status=200)
 
 
@@ -315,22 +331,73 @@ def deletar_sala(request, sala_id):
 def salas_publicas(request):
     """
     Endpoint GET /api/salas/publicas
+    - Somente salas ativas, em ordem de nome; o corpo continua sendo uma lista.
+    - Sem page nem page_size, todas as salas (como antes da paginação).
+    - ?page=N&page_size=M (padrão SALAS_PUBLICAS_POR_PAGINA); o total e os
+      links de navegação vão nos cabeçalhos X-Total-Count e Link.
+    - ?fields=nome,capacidade escolhe os campos (padrão: nome, capacidade, tipo).
+    - ETag/Last-Modified: If-None-Match/If-Modified-Since respondem 304.
     """
     if request.method != "GET":
         return JsonResponse({"detail": "Método não permitido."}, status=405)
 
-    salas = Sala.objects.all().order_by("nome")
+    por_pagina_padrao = getattr(settings, "SALAS_PUBLICAS_POR_PAGINA", 100)
+    por_pagina_max = getattr(settings, "SALAS_PUBLICAS_POR_PAGINA_MAX", 500)
+    try:
+        pagina = int(request.GET.get("page", 1))
+        por_pagina = int(request.GET.get("page_size", por_pagina_padrao))
+    except ValueError:
+        return JsonResponse({"detail": "Parâmetros 'page' e 'page_size' devem ser inteiros."}, status=400)
+    if pagina < 1 or por_pagina < 1:
+        return JsonResponse({"detail": "Parâmetros 'page' e 'page_size' devem ser positivos."}, status=400)
+    por_pagina = min(por_pagina, por_pagina_max)
+    # Clientes antigos não mandam parâmetros de página e esperam a lista inteira
+    if "page" not in request.GET and "page_size" not in request.GET:
+        por_pagina = None
+
+    if "fields" in request.GET:
+        campos = tuple(dict.fromkeys(c.strip() for c in request.GET["fields"].split(",") if c.strip()))
+        invalidos = [c for c in campos if c not in feed_salas.CAMPOS_PUBLICOS]
+        if invalidos or not campos:
+            return JsonResponse(
+                {"detail": f"Campos inválidos. Use: {', '.join(feed_salas.CAMPOS_PUBLICOS)}."}, status=400
+            )
+    else:
+        campos = feed_salas.CAMPOS_PADRAO
+
+    try:
+        feed = feed_salas.obter_pagina(pagina, por_pagina, campos)
+    except EmptyPage:
+        return JsonResponse({"detail": "Página não encontrada."}, status=404)
+
+    ultima_alteracao = feed["ultima_alteracao"]
+    last_modified = int(ultima_alteracao.timestamp()) if ultima_alteracao else None
+    response = get_conditional_response(request, etag=feed["etag"], last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(feed["corpo"], content_type="application/json")
+
+    response["ETag"] = feed["etag"]
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["X-Total-Count"] = feed["total"]
+    links = []
+    if pagina > 1:
+        links.append((pagina - 1, "prev"))
+    if pagina < feed["paginas"]:
+        links.append((pagina + 1, "next"))
+    if links:
+        response["Link"] = ", ".join(
+            f'<{request.build_absolute_uri("?" + _com_pagina(request, numero))}>; rel="{rel}"'
+            for numero, rel in links
+        )
+    patch_cache_control(response, public=True, max_age=getattr(settings, "SALAS_PUBLICAS_MAX_AGE", 0))
+    return response
 
-    data = [
-        {
-            "nome": s.nome,
-            "capacidade": s.capacidade,
-            "tipo": s.tipo,
-        }
-        for s in salas
-    ]
 
-    return JsonResponse(data, safe=False, status=200)
+def _com_pagina(request, numero):
+    params = request.GET.copy()
+    params["page"] = numero
+    return params.urlencode()
 
 
 @staff_member_required(login_url='/login/')
@@ -342,6 +409,41 @@ def gerenciar_salas_ui(request):
     return render(request, 'reservas/gerenciar_salas.html', {'tipos': tipos, 'is_admin': is_admin})
 
 
+RESERVAS_POR_PAGINA = 8
+ORDENACAO_HISTORICO = ('-inicio', '-id')
+
+
+def _historico_do_usuario(usuario, agora):
+    """Reservas concluídas ou canceladas, mais recentes primeiro (índice usuario+inicio)."""
+    return Reserva.objects.filter(
+        usuario=usuario
+    ).filter(
+        models.Q(fim__lt=agora) | models.Q(cancelada=True)
+    ).select_related('sala').order_by(*ORDENACAO_HISTORICO)
+
+
+def _resumo_reservas_do_usuario(usuario, agora):
+    """Total e divisão ativas/concluídas/canceladas em um único aggregate."""
+    nao_cancelada = models.Q(cancelada=False)
+    return Reserva.objects.filter(usuario=usuario).aggregate(
+        total=Count('id'),
+        ativas=Count('id', filter=nao_cancelada & models.Q(fim__gte=agora)),
+        concluidas=Count('id', filter=nao_cancelada & models.Q(fim__lt=agora)),
+        canceladas=Count('id', filter=models.Q(cancelada=True)),
+    )
+
+
+def _reserva_do_historico(reserva):
+    return {
+        'id': reserva.id,
+        'sala': reserva.sala.nome,
+        'inicio': timezone.localtime(reserva.inicio).isoformat(),
+        'fim': timezone.localtime(reserva.fim).isoformat(),
+        'status': 'cancelada' if reserva.cancelada else 'concluida',
+        'detalhe': reverse('detalhes_reserva', args=[reserva.id]),
+    }
+
+
 @login_required(login_url="/login/")
 def minhas_reservas(request):
     """
@@ -367,35 +469,72 @@ def minhas_reservas(request):
         cancelada=False
     ).select_related('sala').order_by('inicio')
     
+    resumo = _resumo_reservas_do_usuario(usuario, agora)
+    
     # Reservas anteriores (já concluídas ou canceladas)
     # NOTA: Mesmo salas deletadas (ativo=False) aparecem aqui via ForeignKey
-    reservas_anteriores_qs = Reserva.objects.filter(
-        usuario=usuario
-    ).filter(
-        models.Q(fim__lt=agora) | models.Q(cancelada=True)
-    ).select_related('sala').order_by('-inicio')
-    
-    # Paginação para reservas anteriores
-    paginator = Paginator(reservas_anteriores_qs, 8)  # 8 reservas por página
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.get_page(1)
-    
-    # Total de reservas
-    total_reservas = Reserva.objects.filter(usuario=usuario).count()
+    # Com ?continuo=1 a primeira página vem por cursor e as seguintes são
+    # carregadas sob demanda por api_minhas_reservas (rolagem infinita).
+    proximo_cursor = None
+    if request.GET.get('continuo') == '1':
+        reservas_anteriores, proximo_cursor = paginar_por_cursor(
+            _historico_do_usuario(usuario, agora), ORDENACAO_HISTORICO, tamanho=RESERVAS_POR_PAGINA
+        )
+        page_obj = None
+    else:
+        paginator = Paginator(_historico_do_usuario(usuario, agora), RESERVAS_POR_PAGINA)
+        # O total do histórico já vem no resumo: dispensa o COUNT do Paginator
+        paginator.count = resumo['concluidas'] + resumo['canceladas']
+        page_number = request.GET.get('page', 1)
+        try:
+            page_obj = paginator.get_page(page_number)
+        except (EmptyPage, PageNotAnInteger):
+            page_obj = paginator.get_page(1)
+        reservas_anteriores = page_obj.object_list
     
     context = {
         'reservas_ativas': reservas_ativas,
-        'reservas_anteriores': page_obj.object_list,
+        'reservas_anteriores': reservas_anteriores,
         'page_obj': page_obj,
-        'total_reservas': total_reservas,
+        'proximo_cursor': proximo_cursor,
+        'total_reservas': resumo['total'],
+        'resumo': resumo,
     }
     
     return render(request, 'reservas/minhas_reservas.html', context)
 
 
+@login_required(login_url="/login/")
+def api_minhas_reservas(request):
+    """
+    API GET com o histórico do usuário logado, por cursor (keyset sobre
+    inicio e id), para a rolagem infinita de 'Minhas Reservas'.
+    `?cursor=` vem de `proximo_cursor` da resposta anterior.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Método não permitido."}, status=405)
+
+    try:
+        limite = min(max(int(request.GET.get("limite", RESERVAS_POR_PAGINA)), 1), 50)
+    except ValueError:
+        return JsonResponse({"detail": "Parâmetro 'limite' deve ser um inteiro."}, status=400)
+
+    try:
+        reservas, proximo_cursor = paginar_por_cursor(
+            _historico_do_usuario(request.user.username, timezone.now()),
+            ORDENACAO_HISTORICO,
+            cursor=request.GET.get("cursor"),
+            tamanho=limite,
+        )
+    except CursorInvalido:
+        return JsonResponse({"detail": "Cursor inválido."}, status=400)
+
+    return JsonResponse({
+        "reservas": [_reserva_do_historico(r) for r in reservas],
+        "proximo_cursor": proximo_cursor,
+    })
+
+
 @login_required(login_url="/login/")
 def confirmacao_reserva(request):
     """Renderiza a tela de confirmação de reserva (apenas para estudantes)."""
@@ -438,7 +577,7 @@ def admin_reservas(request):
     Suporta filtros por sala (`sala` query param) e por data (`data` YYYY-MM-DD).
     """
     salas = Sala.objects.all().order_by('nome')
-    reservas = Reserva.objects.select_related('sala').all().order_by('-inicio')
+    reservas = Reserva.objects.select_related('sala', 'conta').all().order_by('-inicio', '-id')
 
     # Filtros via query params
     sala_id = request.GET.get('sala')
@@ -450,23 +589,34 @@ def admin_reservas(request):
             pass
     if data_str:
         try:
-            from datetime import datetime as _dt
-            data_filter = _dt.strptime(data_str, '%Y-%m-%d').date()
-            reservas = reservas.filter(inicio__date=data_filter)
+            data_filter = datetime.strptime(data_str, '%Y-%m-%d').date()
+            # Intervalo do dia em vez de inicio__date para aproveitar o índice em inicio
+            inicio_dia, fim_dia = limites_do_dia(data_filter)
+            reservas = reservas.filter(inicio__gte=inicio_dia, inicio__lt=fim_dia)
         except ValueError:
             pass
 
-    # Estatísticas
+    # Estatísticas (um único aggregate condicional)
     agora = timezone.now()
-    total = Reserva.objects.count()
-    ativos = Reserva.objects.filter(fim__gte=agora, cancelada=False).count()
-    concluidos = Reserva.objects.filter(fim__lt=agora, cancelada=False).count()
-    canceladas = Reserva.objects.filter(cancelada=True).count()
+    stats = Reserva.objects.aggregate(
+        total=Count('id'),
+        ativos=Count('id', filter=models.Q(fim__gte=agora, cancelada=False)),
+        concluidos=Count('id', filter=models.Q(fim__lt=agora, cancelada=False)),
+        canceladas=Count('id', filter=models.Q(cancelada=True)),
+    )
 
-    # Enrich reservas with user info
+    # Paginação no banco: apenas as 8 reservas da página são carregadas
+    paginator = Paginator(reservas, 8)  # 8 reservas por página
+    page_number = request.GET.get('page', 1)
+    try:
+        page_obj = paginator.get_page(page_number)
+    except (EmptyPage, PageNotAnInteger):
+        page_obj = paginator.get_page(1)
+
+    # Enrich reservas da página com user info (via join em `conta`)
     reservas_enriched = []
-    for r in reservas:
-        usuario_obj = User.objects.filter(username=r.usuario).first()
+    for r in page_obj.object_list:
+        usuario_obj = r.conta
         full_name = usuario_obj.get_full_name() if usuario_obj and (usuario_obj.first_name or usuario_obj.last_name) else r.usuario
         email = usuario_obj.email if usuario_obj else ''
         criada_em = getattr(r, 'created_at', None) or r.inicio
@@ -477,25 +627,17 @@ def admin_reservas(request):
             'criada_em': criada_em,
         })
 
-    # Paginação
-    paginator = Paginator(reservas_enriched, 8)  # 8 reservas por página
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.get_page(1)
-
     # Apenas superusuários podem cancelar reservas
     is_admin = request.user.is_superuser
     
     context = {
         'salas': salas,
-        'reservas': page_obj.object_list,
+        'reservas': reservas_enriched,
         'page_obj': page_obj,
-        'total': total,
-        'ativos': ativos,
-        'concluidos': concluidos,
-        'canceladas': canceladas,
+        'total': stats['total'],
+        'ativos': stats['ativos'],
+        'concluidos': stats['concluidos'],
+        'canceladas': stats['canceladas'],
         'filtro_sala': sala_id or '',
         'filtro_data': data_str or '',
         'now': agora,
@@ -526,20 +668,21 @@ def api_admin_cancel_reserva(request, reserva_id):
     if reserva.fim < agora:
         return JsonResponse({'error': 'Não é possível cancelar uma reserva já concluída.'}, status=400)
 
-    reserva.cancelada = True
-    reserva.save()
-    logger.info(f"Reserva cancelada (admin): {reserva_id} - Admin {request.user.username}")
-    try:
+    with transaction.atomic():
+        reserva.cancelada = True
+        reserva.save()
         enviar_cancelamento(reserva)
-    except Exception as exc:
-        logger.exception("Falha ao enviar email de cancelamento (admin) da reserva %s: %s", reserva.id, exc)
+    logger.info(f"Reserva cancelada (admin): {reserva_id} - Admin {request.user.username}")
     return JsonResponse({'success': True, 'message': 'Reserva cancelada com sucesso.'}, status=200)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etags.horarios_disponiveis)
 def api_horarios_disponiveis(request, sala_id):
     """
     API GET para buscar horários disponíveis de uma sala em uma data específica.
     Query params: ?data=YYYY-MM-DD
+    Com If-None-Match igual ao ETag (ver etags.py) responde 304 sem consultar o banco.
     """
     if request.method != "GET":
         return JsonResponse({"detail": "Método não permitido."}, status=405)
@@ -554,62 +697,148 @@ def api_horarios_disponiveis(request, sala_id):
         return JsonResponse({"detail": "Parâmetro 'data' é obrigatório (formato: YYYY-MM-DD)."}, status=400)
     
     try:
-        from datetime import datetime
         data_selecionada = datetime.strptime(data_str, '%Y-%m-%d').date()
     except ValueError:
         return JsonResponse({"detail": "Formato de data inválido. Use YYYY-MM-DD."}, status=400)
     
-    # Define os horários padrão (2 horas cada)
-    horarios_padrao = [
-        ("08:00", "10:00"),
-        ("10:00", "12:00"),
-        ("12:00", "14:00"),
-        ("14:00", "16:00"),
-        ("16:00", "18:00"),
-        ("18:00", "20:00"),
-        ("20:00", "22:00"),
-    ]
-    
-    # Busca reservas existentes para essa sala nessa data (não canceladas)
-    from datetime import datetime as dt, time as dt_time
-    from django.utils import timezone
-    
-    reservas_dia = Reserva.objects.filter(
-        sala=sala,
-        inicio__date=data_selecionada,
-        cancelada=False
-    )
-    
-    agora = timezone.now()
-    
-    horarios_disponiveis = []
-    for inicio_str, fim_str in horarios_padrao:
-        # Cria datetime timezone-aware para verificar conflitos
-        inicio_time = dt.strptime(inicio_str, '%H:%M').time()
-        fim_time = dt.strptime(fim_str, '%H:%M').time()
-        
-        inicio_dt = timezone.make_aware(dt.combine(data_selecionada, inicio_time))
-        fim_dt = timezone.make_aware(dt.combine(data_selecionada, fim_time))
-        
-        # Verifica se o horário já passou
-        horario_passado = inicio_dt < agora
-        
-        # Verifica se há conflito com alguma reserva existente
-        conflito = reservas_dia.filter(
-            inicio__lt=fim_dt,
-            fim__gt=inicio_dt
-        ).exists()
-        
-        horarios_disponiveis.append({
-            "inicio": inicio_str,
-            "fim": fim_str,
-            "range": f"{inicio_str} - {fim_str}",
-            "disponivel": not conflito and not horario_passado
-        })
+    # Uma única query carrega as reservas do dia; a grade é varrida em memória
+    horarios_disponiveis = horarios_da_sala(sala.id, data_selecionada, tipo=sala.tipo)
     
     return JsonResponse(horarios_disponiveis, safe=False, status=200)
 
 
+async def eventos_horarios(request, sala_id):
+    """
+    Stream GET (text/event-stream) com a disponibilidade de uma sala em um dia.
+    Query params: ?data=YYYY-MM-DD
+    Envia o estado completo (`event: horarios`) ao conectar e depois um
+    `event: delta` com as faixas alteradas a cada reserva criada ou cancelada
+    (ver eventos.py). Exige o servidor ASGI: sob WSGI responde 503 e o
+    navegador continua usando api_horarios_disponiveis.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Método não permitido."}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Eventos em tempo real exigem o servidor ASGI."}, status=503)
+
+    try:
+        data_selecionada = datetime.strptime(request.GET.get('data') or '', '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({"detail": "Parâmetro 'data' é obrigatório (formato: YYYY-MM-DD)."}, status=400)
+    tipo = await Sala.objects.filter(id=sala_id).values_list('tipo', flat=True).afirst()
+    if tipo is None:
+        return JsonResponse({"detail": "Sala não encontrada."}, status=404)
+
+    heartbeat = getattr(settings, 'EVENTOS_HEARTBEAT', 15)
+    duracao_max = getattr(settings, 'EVENTOS_DURACAO_MAX', 300)
+    canal = eventos.canal_horarios(sala_id, data_selecionada)
+
+    def evento(nome, dados):
+        return f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        fim_conexao = loop.time() + duracao_max
+        # Assina antes do estado inicial: nenhuma alteração fica entre os dois
+        async with eventos.obter_broker().assinar(canal) as fila:
+            horarios = await sync_to_async(horarios_da_sala)(sala_id, data_selecionada, tipo=tipo)
+            yield f"retry: {heartbeat * 1000}\n" + evento(
+                "horarios", {"sala_id": sala_id, "data": data_selecionada.isoformat(), "horarios": horarios}
+            )
+            # Fecha após `duracao_max`; o EventSource reconecta e recebe um estado novo
+            while (restante := fim_conexao - loop.time()) > 0:
+                try:
+                    mensagem = await asyncio.wait_for(fila.get(), timeout=min(heartbeat, restante))
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield evento("delta", mensagem)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx não deve acumular o stream
+    return response
+
+
+# Limite do período consultado na matriz de disponibilidade
+MATRIZ_MAX_DIAS = 31
+
+
+def api_matriz_disponibilidade(request):
+    """
+    API GET com a matriz sala x dia x horário para um período.
+    Query params: ?inicio=YYYY-MM-DD&fim=YYYY-MM-DD&tipo=&capacidade_min=&equipamentos=a,b
+    Usa uma query sobre as salas ativas e uma única query de intervalo sobre as reservas.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Método não permitido."}, status=405)
+
+    hoje = timezone.localdate()
+    try:
+        data_inicio = datetime.strptime(request.GET.get('inicio') or hoje.isoformat(), '%Y-%m-%d').date()
+        data_fim = datetime.strptime(request.GET.get('fim') or data_inicio.isoformat(), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({"detail": "Formato de data inválido. Use YYYY-MM-DD."}, status=400)
+
+    if data_fim < data_inicio:
+        return JsonResponse({"detail": "A data final deve ser igual ou posterior à inicial."}, status=400)
+    if (data_fim - data_inicio).days + 1 > MATRIZ_MAX_DIAS:
+        return JsonResponse({"detail": f"O período máximo é de {MATRIZ_MAX_DIAS} dias."}, status=400)
+
+    salas = Sala.objects.filter(ativo=True).order_by('nome')
+
+    tipo = (request.GET.get('tipo') or '').strip()
+    if tipo:
+        salas = salas.filter(tipo=tipo)
+
+    capacidade_min = request.GET.get('capacidade_min')
+    if capacidade_min:
+        try:
+            salas = salas.filter(capacidade__gte=int(capacidade_min))
+        except ValueError:
+            return JsonResponse({"detail": "capacidade_min deve ser um inteiro."}, status=400)
+
+    salas = list(salas.only('id', 'nome', 'tipo', 'capacidade', 'status', 'localizacao', 'equipamentos'))
+
+    # JSONField não suporta `contains` no SQLite; filtra equipamentos em memória
+    equipamentos = [e.strip().lower() for e in (request.GET.get('equipamentos') or '').split(',') if e.strip()]
+    if equipamentos:
+        salas = [
+            s for s in salas
+            if set(equipamentos) <= {e.lower() for e in (s.equipamentos or [])}
+        ]
+
+    matriz = matriz_disponibilidade(
+        [s.id for s in salas], data_inicio, data_fim, tipos={s.id: s.tipo for s in salas}
+    )
+
+    return JsonResponse({
+        "inicio": data_inicio.isoformat(),
+        "fim": data_fim.isoformat(),
+        # Grade geral; salas com grade própria trazem as faixas de cada dia em "horarios"
+        "horarios": [f"{f.rotulo_inicio} - {f.rotulo_fim}" for f in grades.obter().faixas(data_inicio)],
+        "salas": [
+            {
+                "id": s.id,
+                "nome": s.nome,
+                "tipo": s.tipo,
+                "capacidade": s.capacidade,
+                "status": s.status,
+                "localizacao": s.localizacao,
+                "horarios": {
+                    dia.isoformat(): [h["range"] for h in horarios]
+                    for dia, horarios in matriz[s.id].items()
+                },
+                "disponibilidade": {
+                    dia.isoformat(): [h["disponivel"] for h in horarios]
+                    for dia, horarios in matriz[s.id].items()
+                },
+            }
+            for s in salas
+        ],
+    }, status=200)
+
+
 @login_required(login_url="/login/")
 def api_criar_reserva(request):
     """
@@ -669,44 +898,61 @@ def api_criar_reserva(request):
         return JsonResponse({
             "detail": "Não é possível fazer reservas para datas ou horários que já passaram."
         }, status=400)
-    
-    # Verifica se o usuário já tem outra reserva neste horário (não cancelada)
-    reserva_usuario = Reserva.objects.filter(
-        usuario=request.user.username,
-        inicio__lt=fim_dt,
-        fim__gt=inicio_dt,
-        cancelada=False
-    ).first()
-    
-    if reserva_usuario:
-        return JsonResponse({
-            "detail": f"Você já tem uma reserva para este horário na sala {reserva_usuario.sala.nome}."
-        }, status=400)
-    
-    # Verifica se já não há conflito na sala (apenas reservas não canceladas)
-    conflito = Reserva.objects.filter(
-        sala=sala,
-        inicio__lt=fim_dt,
-        fim__gt=inicio_dt,
-        cancelada=False
-    ).exists()
-    
-    if conflito:
-        return JsonResponse({"detail": "Este horário já está reservado para esta sala."}, status=400)
-    
-    # Cria a reserva
-    reserva = Reserva.objects.create(
-        sala=sala,
-        usuario=request.user.username,
-        inicio=inicio_dt,
-        fim=fim_dt
-    )
+
+    # O intervalo precisa caber no funcionamento da sala (grade compilada, sem queries)
+    grades_compiladas = grades.obter()
+    if grades_compiladas.fechada(data_reserva, sala.id):
+        return JsonResponse({"detail": "A sala não funciona nesta data."}, status=400)
+    if not grades_compiladas.permite(data_reserva, hora_inicio, hora_fim, sala.id, sala.tipo):
+        return JsonResponse({"detail": "Horário fora da grade de funcionamento da sala."}, status=400)
+    
+    # Verificação e criação na mesma transação: o lock na linha da sala
+    # serializa reservas concorrentes (PostgreSQL/MySQL); no SQLite o
+    # transaction_mode IMMEDIATE já obtém o lock de escrita no BEGIN.
+    # A constraint do banco é a última barreira contra reservas duplicadas.
+    try:
+        with transaction.atomic():
+            Sala.objects.select_for_update().only('id').get(id=sala.id)
+
+            # Verifica se o usuário já tem outra reserva neste horário (não cancelada)
+            reserva_usuario = Reserva.objects.filter(
+                usuario=request.user.username,
+                inicio__lt=fim_dt,
+                fim__gt=inicio_dt,
+                cancelada=False
+            ).select_related('sala').first()
+
+            if reserva_usuario:
+                return JsonResponse({
+                    "detail": f"Você já tem uma reserva para este horário na sala {reserva_usuario.sala.nome}."
+                }, status=400)
+
+            # Verifica se já não há conflito na sala (apenas reservas não canceladas)
+            conflito = Reserva.objects.filter(
+                sala=sala,
+                inicio__lt=fim_dt,
+                fim__gt=inicio_dt,
+                cancelada=False
+            ).exists()
+
+            if conflito:
+                return JsonResponse({"detail": "Este horário já está reservado para esta sala."}, status=400)
+
+            # Cria a reserva
+            reserva = Reserva.objects.create(
+                sala=sala,
+                usuario=request.user.username,
+                conta=request.user,
+                inicio=inicio_dt,
+                fim=fim_dt
+            )
+            # E-mail na outbox na mesma transação: ou os dois ficam, ou nenhum
+            enviar_confirmacao(reserva)
+    except IntegrityError:
+        logger.warning("Conflito concorrente ao reservar sala %s em %s", sala.id, inicio_dt)
+        return JsonResponse({"detail": "Este horário acabou de ser reservado por outra pessoa."}, status=409)
     
     logger.info(f"Reserva criada: {reserva.id} - Sala {sala.nome} - Usuário {request.user.username}")
-    try:
-        enviar_confirmacao(reserva)
-    except Exception as exc:
-        logger.exception("Falha ao enviar email de confirmacao da reserva %s: %s", reserva.id, exc)
     
     return JsonResponse({
         "id": reserva.id,
@@ -744,14 +990,12 @@ def api_cancelar_reserva(request, reserva_id):
     if reserva.fim < agora:
         return JsonResponse({"error": "Não é possível cancelar uma reserva já concluída."}, status=400)
     
-    # Marca a reserva como cancelada
-    reserva.cancelada = True
-    reserva.save()
-    logger.info(f"Reserva cancelada: {reserva_id} - Usuário {request.user.username}")
-    try:
+    # Marca a reserva como cancelada e enfileira o e-mail na mesma transação
+    with transaction.atomic():
+        reserva.cancelada = True
+        reserva.save()
         enviar_cancelamento(reserva)
-    except Exception as exc:
-        logger.exception("Falha ao enviar email de cancelamento da reserva %s: %s", reserva.id, exc)
+    logger.info(f"Reserva cancelada: {reserva_id} - Usuário {request.user.username}")
     
     return JsonResponse({"success": True, "message": "Reserva cancelada com sucesso."}, status=200)
 
@@ -764,12 +1008,29 @@ def get_user_type(user):
     """Determina o tipo do usuário baseado em seus atributos."""
     if user.is_superuser or user.is_staff:
         return 'admin'
-    # Verifica se o username parece ser matrícula de professor (SIAPE)
-    if user.username.upper().startswith('SIAPE') or (hasattr(user, 'first_name') and 'Prof' in (user.first_name or '')):
+    # Verifica se o username parece ser matrícula de professor (SIAPE) ou se o
+    # nome traz "Prof"; ambos sem diferenciar maiúsculas, como user_type_expression
+    if user.username.upper().startswith('SIAPE') or 'prof' in (getattr(user, 'first_name', '') or '').lower():
         return 'professor'
     return 'estudante'
 
 
+def user_type_expression():
+    """Mesma regra de `get_user_type`, calculada no banco (Case/When)."""
+    return Case(
+        When(models.Q(is_superuser=True) | models.Q(is_staff=True), then=Value('admin')),
+        When(
+            models.Q(username__istartswith='SIAPE') | models.Q(first_name__icontains='Prof'),
+            then=Value('professor'),
+        ),
+        default=Value('estudante'),
+        output_field=models.CharField(),
+    )
+
+
+TIPO_USUARIO_DISPLAY = {'estudante': 'Estudante', 'professor': 'Professor', 'admin': 'Administrador'}
+
+
 @staff_member_required(login_url='/login/')
 def gerenciar_usuarios(request):
     """Renderiza a interface administrativa de gerenciamento de usuários."""
@@ -779,8 +1040,18 @@ def gerenciar_usuarios(request):
     status_filter = request.GET.get('status', '')
     search_query = request.GET.get('q', '')
     
-    # Busca todos os usuários (exceto o próprio admin logado para evitar auto-desativação acidental)
-    usuarios_qs = User.objects.all().order_by('first_name', 'last_name', 'username')
+    # Tipo e total de reservas calculados no banco para cada usuário
+    reservas_por_usuario = (
+        Reserva.objects.filter(conta=OuterRef('pk'))
+        .order_by()
+        .values('conta')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    usuarios_qs = User.objects.annotate(
+        tipo=user_type_expression(),
+        reservas_count=Coalesce(Subquery(reservas_por_usuario), 0),
+    ).order_by('first_name', 'last_name', 'username', 'id')
     
     # Aplica filtro de busca
     if search_query:
@@ -797,70 +1068,55 @@ def gerenciar_usuarios(request):
     elif status_filter == 'inativo':
         usuarios_qs = usuarios_qs.filter(is_active=False)
     
-    # Estatísticas
-    all_users = User.objects.all()
-    total_usuarios = all_users.count()
-    usuarios_ativos = all_users.filter(is_active=True).count()
+    # Aplica filtro de tipo
+    if tipo_filter:
+        usuarios_qs = usuarios_qs.filter(tipo=tipo_filter)
     
-    # Conta por tipo (exclui admins da contagem de estudantes/professores)
-    total_estudantes = 0
-    total_professores = 0
+    # Estatísticas (um único aggregate; admins não contam como estudantes/professores)
+    stats = User.objects.annotate(tipo=user_type_expression()).aggregate(
+        total_usuarios=Count('id'),
+        usuarios_ativos=Count('id', filter=models.Q(is_active=True)),
+        total_estudantes=Count('id', filter=models.Q(tipo='estudante')),
+        total_professores=Count('id', filter=models.Q(tipo='professor')),
+    )
     
-    for u in all_users.filter(is_staff=False, is_superuser=False):
-        if get_user_type(u) == 'professor':
-            total_professores += 1
-        else:
-            total_estudantes += 1
+    # Paginação no banco
+    paginator = Paginator(usuarios_qs, 8)  # 8 usuários por página
+    page_number = request.GET.get('page', 1)
+    try:
+        page_obj = paginator.get_page(page_number)
+    except (EmptyPage, PageNotAnInteger):
+        page_obj = paginator.get_page(1)
     
-    # Prepara dados dos usuários
+    # Prepara dados dos usuários da página
     usuarios_data = []
-    for u in usuarios_qs:
-        tipo = get_user_type(u)
-        
-        # Aplica filtro de tipo
-        if tipo_filter and tipo != tipo_filter:
-            continue
-        
-        # Conta reservas do usuário
-        reservas_count = Reserva.objects.filter(usuario=u.username).count()
-        
+    for u in page_obj.object_list:
         # Nome completo ou username
         nome = f"{u.first_name} {u.last_name}".strip() or u.username
         
-        # Matrícula (username) ou SIAPE
-        matricula = u.username
-        
         usuarios_data.append({
             'id': u.id,
             'nome': nome,
             'email': u.email,
-            'matricula': matricula,
-            'tipo': tipo,
-            'tipo_display': {'estudante': 'Estudante', 'professor': 'Professor', 'admin': 'Administrador'}.get(tipo, tipo.title()),
+            'matricula': u.username,  # Matrícula (username) ou SIAPE
+            'tipo': u.tipo,
+            'tipo_display': TIPO_USUARIO_DISPLAY.get(u.tipo, u.tipo.title()),
             'status': 'ativo' if u.is_active else 'inativo',
             'status_display': 'Ativo' if u.is_active else 'Inativo',
             'is_active': u.is_active,
-            'reservas_count': reservas_count,
+            'reservas_count': u.reservas_count,
         })
     
-    # Paginação
-    paginator = Paginator(usuarios_data, 8)  # 8 usuários por página
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.get_page(1)
-    
     # Apenas superusuários podem ativar/desativar usuários
     is_admin = request.user.is_superuser
     
     context = {
-        'usuarios': page_obj.object_list,
+        'usuarios': usuarios_data,
         'page_obj': page_obj,
-        'total_usuarios': total_usuarios,
-        'usuarios_ativos': usuarios_ativos,
-        'total_estudantes': total_estudantes,
-        'total_professores': total_professores,
+        'total_usuarios': stats['total_usuarios'],
+        'usuarios_ativos': stats['usuarios_ativos'],
+        'total_estudantes': stats['total_estudantes'],
+        'total_professores': stats['total_professores'],
         'filtro_tipo': tipo_filter,
         'filtro_status': status_filter,
         'search_query': search_query,
@@ -995,154 +1251,34 @@ def api_criar_usuario(request):
 @staff_member_required(login_url='/login/')
 def admin_dashboard(request):
     """Renderiza o dashboard administrativo com estatísticas e gráficos."""
-    agora = timezone.now()
-    
-    # === KPIs ===
-    # Total de reservas
-    total_reservas = Reserva.objects.count()
-    
-    # Reservas do mês atual vs mês anterior
-    inicio_mes_atual = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    inicio_mes_anterior = (inicio_mes_atual - timedelta(days=1)).replace(day=1)
-    
-    reservas_mes_atual = Reserva.objects.filter(inicio__gte=inicio_mes_atual).count()
-    reservas_mes_anterior = Reserva.objects.filter(
-        inicio__gte=inicio_mes_anterior,
-        inicio__lt=inicio_mes_atual
-    ).count()
-    
-    # Calcular variação percentual
-    if reservas_mes_anterior > 0:
-        variacao_reservas = round(((reservas_mes_atual - reservas_mes_anterior) / reservas_mes_anterior) * 100)
-    else:
-        variacao_reservas = 100 if reservas_mes_atual > 0 else 0
-    
-    # Salas
-    total_salas = Sala.objects.filter(ativo=True).count()
-    salas_disponiveis = Sala.objects.filter(ativo=True, status='Disponivel').count()
-    salas_manutencao = Sala.objects.filter(ativo=True, status='Em Manutencao').count()
-    salas_manutencao_list = list(
-        Sala.objects.filter(ativo=True, status='Em Manutencao')
-        .order_by('nome')
-        .values_list('nome', flat=True)
-    )
-    
-    # Usuários
-    total_usuarios = User.objects.filter(is_active=True).count()
-    total_estudantes = User.objects.filter(is_active=True, is_staff=False, is_superuser=False).count()
-    total_professores = User.objects.filter(is_active=True, is_staff=True, is_superuser=False).count()
-    
-    # Taxa de ocupação (reservas ativas / capacidade total)
-    # Simplificação: porcentagem de horários ocupados nas últimas 4 semanas
-    inicio_periodo = agora - timedelta(days=28)
-    reservas_periodo = Reserva.objects.filter(
-        inicio__gte=inicio_periodo,
-        cancelada=False
-    ).count()
-    # Assumindo 10 horários por dia por sala, 5 dias por semana, 4 semanas
-    capacidade_teorica = total_salas * 10 * 5 * 4 if total_salas > 0 else 1
-    taxa_ocupacao = min(round((reservas_periodo / capacidade_teorica) * 100), 100)
-    
-    # === Dados para gráficos ===
-    # Reservas por mês (últimos 6 meses)
-    seis_meses_atras = agora - timedelta(days=180)
-    reservas_por_mes = (
-        Reserva.objects.filter(inicio__gte=seis_meses_atras)
-        .annotate(mes=TruncMonth('inicio'))
-        .values('mes')
-        .annotate(total=Count('id'))
-        .order_by('mes')
-    )
-    
-    meses_br = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-    dados_mensais = []
-    for item in reservas_por_mes:
-        if item['mes']:
-            dados_mensais.append({
-                'month': meses_br[item['mes'].month - 1],
-                'total': item['total']
-            })
-    
-    # Se não houver dados, mostrar lista vazia (dados reais)
-    if not dados_mensais:
-        dados_mensais = []
-    
-    # Taxa de uso por sala (top 5 salas mais usadas)
-    uso_por_sala = (
-        Reserva.objects.filter(cancelada=False)
-        .values('sala__nome')
-        .annotate(total=Count('id'))
-        .order_by('-total')[:5]
-    )
-    
-    dados_salas = []
-    max_reservas = max([s['total'] for s in uso_por_sala]) if uso_por_sala else 1
-    for item in uso_por_sala:
-        # Converter para porcentagem relativa
-        uso_pct = round((item['total'] / max_reservas) * 100) if max_reservas > 0 else 0
-        dados_salas.append({
-            'name': item['sala__nome'],
-            'usage': uso_pct
-        })
-    
-    # Dados reais - não usar fallback mockado
-    
-    # === Alertas ===
-    # Reservas sem comparecimento (reservas passadas não canceladas - simplificado)
-    reservas_hoje = Reserva.objects.filter(
-        inicio__date=agora.date(),
-        fim__lt=agora,
-        cancelada=False
-    ).count()
-    
-    # === Próximas Reservas ===
-    proximas_reservas = (
-        Reserva.objects.filter(
-            inicio__gte=agora,
-            cancelada=False
-        )
-        .select_related('sala')
-        .order_by('inicio')[:5]
-    )
-    
-    proximas_lista = []
-    for r in proximas_reservas:
-        usuario_obj = User.objects.filter(username=r.usuario).first()
-        nome = usuario_obj.get_full_name() if usuario_obj and usuario_obj.first_name else r.usuario
-        proximas_lista.append({
-            'sala': r.sala.nome,
-            'horario': r.inicio.strftime('%H:%M'),
-            'usuario': nome,
-        })
-    
-    # Dados reais - lista vazia se não houver reservas
+    metricas = obter_metricas()
     
     # Verificar se é admin
     is_admin = request.user.is_superuser
     
     context = {
         # KPIs
-        'total_reservas': total_reservas,
-        'variacao_reservas': variacao_reservas,
-        'total_salas': total_salas,
-        'salas_disponiveis': salas_disponiveis,
-        'salas_manutencao': salas_manutencao,
-        'total_usuarios': total_usuarios,
-        'total_estudantes': total_estudantes,
-        'total_professores': total_professores,
-        'taxa_ocupacao': taxa_ocupacao,
+        'total_reservas': metricas['total_reservas'],
+        'variacao_reservas': metricas['variacao_reservas'],
+        'total_salas': metricas['total_salas'],
+        'salas_disponiveis': metricas['salas_disponiveis'],
+        'salas_manutencao': metricas['salas_manutencao'],
+        'total_usuarios': metricas['total_usuarios'],
+        'total_estudantes': metricas['total_estudantes'],
+        'total_professores': metricas['total_professores'],
+        'taxa_ocupacao': metricas['taxa_ocupacao'],
         
         # Gráficos (JSON para JavaScript)
-        'dados_mensais_json': json.dumps(dados_mensais),
-        'dados_salas_json': json.dumps(dados_salas),
-        'salas_manutencao_json': json.dumps(salas_manutencao_list),
+        'dados_mensais_json': json.dumps(metricas['dados_mensais']),
+        'dados_salas_json': json.dumps(metricas['dados_salas']),
+        'salas_manutencao_json': json.dumps(metricas['salas_manutencao_list']),
         
         # Alertas
-        'salas_manutencao_count': salas_manutencao,
-        'reservas_sem_comparecimento': reservas_hoje,
+        'salas_manutencao_count': metricas['salas_manutencao'],
+        'reservas_sem_comparecimento': metricas['reservas_sem_comparecimento'],
         
         # Próximas reservas
-        'proximas_reservas': proximas_lista,
+        'proximas_reservas': metricas['proximas_reservas'],
         
         # Permissões
         'is_admin': is_admin,
@@ -1152,17 +1288,27 @@ def admin_dashboard(request):
 
 
 @staff_member_required(login_url='/login/')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etags.dashboard)
 def api_dashboard_data(request):
     """API para retornar dados atualizados do dashboard (para refresh)."""
     # Esta API pode ser usada para atualização dinâmica via AJAX
-    agora = timezone.now()
-    
-    total_reservas = Reserva.objects.count()
-    total_salas = Sala.objects.filter(ativo=True).count()
-    total_usuarios = User.objects.filter(is_active=True).count()
+    metricas = obter_metricas()
     
     return JsonResponse({
-        'total_reservas': total_reservas,
-        'total_salas': total_salas,
-        'total_usuarios': total_usuarios,
+        'total_reservas': metricas['total_reservas'],
+        'total_salas': metricas['total_salas'],
+        'total_usuarios': metricas['total_usuarios'],
+    })
+
+
+@staff_member_required(login_url='/login/')
+def api_metricas_requisicoes(request):
+    """
+    Percentis de tempo, consultas e tamanho por rota (janela deslizante),
+    coletados por InstrumentacaoMiddleware neste processo.
+    """
+    return JsonResponse({
+        'janela': instrumentacao.janela.tamanho,
+        'rotas': instrumentacao.resumo(),
     })
@@ -23,6 +23,7 @@ class Sala(models.Model):
         help_text="Indica se a sala está ativa no sistema. Salas inativas não aparecem para usuários.",
     )
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["nome"]
@@ -0,0 +1,84 @@
+"""
+Paginação por cursor (keyset).
+
+Em vez de OFFSET, cada página continua a partir dos valores de ordenação do
+último item da anterior (`WHERE (nome, id) > (:nome, :id)`), então o custo de
+uma página não cresce com a posição nem com o total de linhas, e inserções
+no meio da listagem não duplicam nem pulam itens.
+
+O cursor é opaco para o cliente: JSON dos valores em base64 url-safe.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorInvalido(ValueError):
+    """Cursor adulterado ou gerado para outra ordenação."""
+
+
+class _CodificadorCursor(DjangoJSONEncoder):
+    # O DjangoJSONEncoder corta datetimes em milissegundos; o cursor precisa
+    # do valor exato para a comparação não pular linhas
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(valores):
+    dados = json.dumps(list(valores), cls=_CodificadorCursor, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, quantidade):
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(dados)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CursorInvalido("Cursor invalido.") from exc
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise CursorInvalido("Cursor invalido.")
+    return valores
+
+
+def _depois_de(ordenacao, valores):
+    """Comparação lexicográfica: (a > va) OR (a = va AND b > vb) ..."""
+    condicao = Q()
+    iguais = {}
+    for campo, valor in zip(ordenacao, valores):
+        nome = campo.lstrip("-")
+        operador = "lt" if campo.startswith("-") else "gt"
+        condicao |= Q(**iguais, **{f"{nome}__{operador}": valor})
+        iguais[nome] = valor
+    return condicao
+
+
+def paginar_por_cursor(queryset, ordenacao, cursor=None, tamanho=20):
+    """
+    Retorna `(itens, proximo_cursor)`; `proximo_cursor` é None na última página.
+
+    `ordenacao` são campos do próprio modelo (prefixo "-" para decrescente) e
+    deve terminar num campo único (ex.: "id") para o desempate ser estável.
+    Levanta CursorInvalido se o cursor não puder ser lido.
+    """
+    queryset = queryset.order_by(*ordenacao)
+    if cursor:
+        try:
+            queryset = queryset.filter(_depois_de(ordenacao, decodificar_cursor(cursor, len(ordenacao))))
+        except (ValidationError, TypeError, ValueError) as exc:
+            # Valores que não convertem para o tipo do campo (ex.: data inválida)
+            raise CursorInvalido("Cursor invalido.") from exc
+
+    # Um item a mais indica se existe próxima página sem precisar de COUNT
+    itens = list(queryset[: tamanho + 1])
+    if len(itens) <= tamanho:
+        return itens, None
+    itens = itens[:tamanho]
+    ultimo = itens[-1]
+    return itens, codificar_cursor(getattr(ultimo, campo.lstrip("-")) for campo in ordenacao)
@@ -100,6 +100,13 @@ function renderCalendar() {
     }
 }
 
+// YYYY-MM-DD no fuso do navegador (toISOString usaria UTC e trocaria o dia à noite)
+function formatDateParam(date) {
+    const mes = String(date.getMonth() + 1).padStart(2, '0');
+    const dia = String(date.getDate()).padStart(2, '0');
+    return `${date.getFullYear()}-${mes}-${dia}`;
+}
+
 function isSameDate(a, b) {
     return a.getDate() === b.getDate() && 
            a.getMonth() === b.getMonth() && 
@@ -107,7 +114,19 @@ function isSameDate(a, b) {
 }
 
 // ========== LOAD SLOTS ==========
-async function loadAvailableSlots() {
+// Horários de hoje que vieram na própria página (detalhar_sala), se houver
+function initialSlots(dateParam) {
+    const script = document.getElementById("slotsIniciais");
+    if (!script || window.SLOTS_DATA !== dateParam) return null;
+    try {
+        const slots = JSON.parse(script.textContent);
+        return Array.isArray(slots) ? slots : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+async function loadAvailableSlots({ useInitial = false } = {}) {
     const slotsList = document.getElementById("slotsList");
     const slotDateLabel = document.getElementById("slotDateLabel");
     
@@ -126,12 +145,22 @@ async function loadAvailableSlots() {
         slotDateLabel.textContent = `Horários disponíveis para ${dateStr}:`;
     }
     
+    const dateParam = formatDateParam(state.selectedDate);
+    
+    // Primeira carga: usa a disponibilidade renderizada no servidor, sem nova requisição
+    const embedded = useInitial ? initialSlots(dateParam) : null;
+    if (embedded) {
+        state.availableSlots = embedded;
+        renderSlots(embedded);
+        subscribeSlotEvents(dateParam);
+        return;
+    }
+    
     // Show loading
     slotsList.innerHTML = '<div class="text-center text-muted py-4"><i data-lucide="loader"></i><p class="mb-0 mt-2">Carregando horários...</p></div>';
     if (window.lucide) window.lucide.createIcons();
     
     try {
-        const dateParam = state.selectedDate.toISOString().split('T')[0];
         const url = `/api/salas/${window.SALA_ID}/horarios/?data=${dateParam}`;
         console.log('Fetching slots from:', url);
         
@@ -154,6 +183,7 @@ async function loadAvailableSlots() {
         
         state.availableSlots = slots;
         renderSlots(slots);
+        subscribeSlotEvents(dateParam);
         
     } catch (error) {
         console.error('Erro ao carregar horários:', error);
@@ -193,6 +223,9 @@ function renderSlots(slots) {
         
         if (slot.disponivel) {
             slotDiv.addEventListener('click', () => selectSlot(slot));
+            if (state.selectedSlot && state.selectedSlot.inicio === slot.inicio) {
+                slotDiv.classList.add('slot-selected');
+            }
         }
         
         slotsList.appendChild(slotDiv);
@@ -201,6 +234,50 @@ function renderSlots(slots) {
     if (window.lucide) window.lucide.createIcons();
 }
 
+// ========== LIVE UPDATES (SSE) ==========
+// Recebe do servidor o novo estado das faixas quando alguém reserva ou cancela,
+// em vez de descobrir o conflito só ao confirmar a reserva.
+let slotEvents = null;
+
+function subscribeSlotEvents(dateParam) {
+    if (slotEvents) {
+        slotEvents.close();
+        slotEvents = null;
+    }
+    if (!('EventSource' in window)) return;
+
+    const source = new EventSource(`/api/salas/${window.SALA_ID}/horarios/eventos/?data=${dateParam}`);
+    source.addEventListener('horarios', (e) => applySlotUpdate(JSON.parse(e.data).horarios, true));
+    source.addEventListener('delta', (e) => applySlotUpdate(JSON.parse(e.data).horarios, false));
+    source.onerror = () => {
+        // Servidor sem ASGI (503) ou sala removida: fica com os horários já carregados
+        if (source.readyState === EventSource.CLOSED) source.close();
+    };
+    slotEvents = source;
+}
+
+function applySlotUpdate(horarios, completo) {
+    if (completo) {
+        state.availableSlots = horarios;
+    } else {
+        const porInicio = new Map(horarios.map(h => [h.inicio, h]));
+        state.availableSlots = state.availableSlots.map(slot => porInicio.get(slot.inicio) || slot);
+    }
+
+    const selected = state.selectedSlot;
+    if (selected) {
+        const atual = state.availableSlots.find(slot => slot.inicio === selected.inicio && slot.fim === selected.fim);
+        if (!atual || !atual.disponivel) {
+            state.selectedSlot = null;
+            const summary = document.getElementById('bookingSummary');
+            if (summary) summary.style.display = 'none';
+            showSnackbar('O horário selecionado acabou de ser reservado por outra pessoa.', 'warning');
+        }
+    }
+
+    renderSlots(state.availableSlots);
+}
+
 // ========== SELECT SLOT ==========
 function selectSlot(slot) {
     // Verifica se o usuário está autenticado
@@ -261,7 +338,7 @@ async function confirmBooking() {
     if (window.lucide) window.lucide.createIcons();
     
     try {
-        const dateParam = state.selectedDate.toISOString().split('T')[0];
+        const dateParam = formatDateParam(state.selectedDate);
         const [inicio, fim] = state.selectedSlot.range.split(' - ');
         
         const response = await fetch('/api/reservas/criar/', {
@@ -365,5 +442,5 @@ document.addEventListener("DOMContentLoaded", () => {
     // Initialize
     if (window.lucide) window.lucide.createIcons();
     renderCalendar();
-    loadAvailableSlots();
+    loadAvailableSlots({ useInitial: true });
 });
@@ -1,63 +1,114 @@
 document.addEventListener("DOMContentLoaded", () => {
-    const PAGE_SIZE = 6;
+    // A paginação é feita no servidor (?page=N ou, com ?continuo=1, por cursor);
+    // aqui só filtramos os cartões já carregados.
     const searchInput = document.getElementById("searchRoom");
     const filterButtons = Array.from(document.querySelectorAll(".filter-btn"));
-    const cards = Array.from(document.querySelectorAll(".room-card"));
-    const wrappers = cards.map((card) => card.closest(".room-wrapper") || card);
+    const grid = document.getElementById("roomsGrid");
     const noResults = document.getElementById("noResults");
-    const paginationRow = document.getElementById("paginationRow");
-    const prevPageBtn = document.getElementById("prevPage");
-    const nextPageBtn = document.getElementById("nextPage");
-    const pageIndicator = document.getElementById("pageIndicator");
-
-    let filteredWrappers = [...wrappers];
-    let currentPage = 1;
+    const sentinel = document.getElementById("roomsSentinel");
 
     function applyFilters() {
         const term = (searchInput?.value || "").toLowerCase();
         const activeFilter = document.querySelector(".filter-btn.active")?.dataset.filter || "all";
         let visibleCount = 0;
-        const matched = [];
 
-        cards.forEach((card, idx) => {
-            const wrapper = wrappers[idx];
+        grid.querySelectorAll(".room-card").forEach((card) => {
+            const wrapper = card.closest(".room-wrapper") || card;
             const status = card.dataset.status || "";
             const searchBlob = (card.dataset.search || "").toLowerCase();
             const matchesSearch = !term || searchBlob.includes(term);
             const matchesStatus = activeFilter === "all" || (activeFilter === "available" && status === "Disponivel");
             const shouldShow = matchesSearch && matchesStatus;
 
-            wrapper.classList.add("d-none");
-            if (shouldShow) {
-                matched.push(wrapper);
-                visibleCount += 1;
-            }
+            wrapper.classList.toggle("d-none", !shouldShow);
+            if (shouldShow) visibleCount += 1;
         });
 
-        filteredWrappers = matched;
-        const totalPages = Math.max(1, Math.ceil(filteredWrappers.length / PAGE_SIZE));
-        if (currentPage > totalPages) currentPage = totalPages;
-        applyPagination();
-        updatePaginationUI(totalPages);
-
         if (noResults) noResults.classList.toggle("d-none", visibleCount > 0);
     }
 
-    function applyPagination() {
-        filteredWrappers.forEach((wrapper, idx) => {
-            const pageIndex = Math.floor(idx / PAGE_SIZE) + 1;
-            const onPage = pageIndex === currentPage;
-            wrapper.classList.toggle("d-none", !onPage);
-        });
+    function escapeHtml(value) {
+        return String(value ?? "").replace(/[&<>"']/g, (ch) => ({
+            "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;",
+        })[ch]);
     }
 
-    function updatePaginationUI(totalPages) {
-        if (!paginationRow || !pageIndicator || !prevPageBtn || !nextPageBtn) return;
-        const hasPagination = totalPages > 1;
-        paginationRow.classList.toggle("d-none", !hasPagination);
-        pageIndicator.textContent = `${currentPage}/${totalPages}`;
-        prevPageBtn.disabled = currentPage <= 1;
-        nextPageBtn.disabled = currentPage >= totalPages;
+    function buildCard(sala) {
+        const equipamentos = sala.equipamentos || [];
+        const chips = equipamentos.length
+            ? equipamentos.map((equip) => `<span class="equip-chip">${escapeHtml(equip)}</span>`).join("")
+            : '<span class="equip-chip muted">Sem equipamentos cadastrados</span>';
+        const footer = sala.status === "Disponivel"
+            ? `<a class="cta" href="${escapeHtml(sala.detalhe)}">Ver Disponibilidade</a>`
+            : '<span class="cta disabled maintenance">Em Manutencao</span>';
+        const search = [sala.nome, sala.tipo, sala.capacidade, ...equipamentos].join(" ");
+        const statusSlug = String(sala.status || "").toLowerCase().replace(/\s+/g, "-");
+
+        const wrapper = document.createElement("div");
+        wrapper.className = "col-12 col-md-6 col-lg-4 room-wrapper";
+        wrapper.innerHTML = `
+            <article class="room-card h-100" data-status="${escapeHtml(sala.status)}" data-search="${escapeHtml(search)}">
+                <header class="room-card__header">
+                    <div class="room-icon"><i data-lucide="panel-right-open"></i></div>
+                    <div class="room-title">
+                        <div class="room-name">${escapeHtml(sala.nome)}</div>
+                        <div class="room-location">Tipo: ${escapeHtml(sala.tipo)}</div>
+                    </div>
+                    <span class="status-pill status-${escapeHtml(statusSlug)}">${escapeHtml(sala.status)}</span>
+                </header>
+                <div class="room-card__body">
+                    <div class="room-meta">
+                        <i data-lucide="users"></i>
+                        <span>Capacidade: ${escapeHtml(sala.capacidade)} pessoas</span>
+                    </div>
+                    <div class="room-meta">
+                        <i data-lucide="settings"></i>
+                        <div class="equip-list">${chips}</div>
+                    </div>
+                </div>
+                <footer class="room-card__footer">${footer}</footer>
+            </article>`;
+        return wrapper;
+    }
+
+    function setupInfiniteScroll() {
+        if (!sentinel || !("IntersectionObserver" in window)) return;
+        let loading = false;
+
+        const observer = new IntersectionObserver(async (entries) => {
+            if (loading || !entries.some((entry) => entry.isIntersecting)) return;
+            loading = true;
+            try {
+                const params = new URLSearchParams({ cursor: sentinel.dataset.cursor });
+                const response = await fetch(`${sentinel.dataset.url}?${params}`, {
+                    headers: { Accept: "application/json" },
+                });
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const data = await response.json();
+
+                data.salas.forEach((sala) => grid.appendChild(buildCard(sala)));
+                if (window.lucide) window.lucide.createIcons();
+                applyFilters();
+
+                if (data.proximo_cursor) {
+                    sentinel.dataset.cursor = data.proximo_cursor;
+                    // Reobservar dispara de novo se o sentinela continuar visível
+                    observer.unobserve(sentinel);
+                    observer.observe(sentinel);
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            } catch (error) {
+                console.error("Erro ao carregar mais salas:", error);
+                observer.disconnect();
+                sentinel.textContent = "Nao foi possivel carregar mais salas.";
+            } finally {
+                loading = false;
+            }
+        }, { rootMargin: "200px" });
+
+        observer.observe(sentinel);
     }
 
     filterButtons.forEach((button) => {
@@ -70,27 +121,10 @@ document.addEventListener("DOMContentLoaded", () => {
 
     searchInput?.addEventListener("input", applyFilters);
 
-    prevPageBtn?.addEventListener("click", () => {
-        if (currentPage > 1) {
-            currentPage -= 1;
-            applyPagination();
-            const totalPages = Math.max(1, Math.ceil(filteredWrappers.length / PAGE_SIZE));
-            updatePaginationUI(totalPages);
-        }
-    });
-
-    nextPageBtn?.addEventListener("click", () => {
-        const totalPages = Math.max(1, Math.ceil(filteredWrappers.length / PAGE_SIZE));
-        if (currentPage < totalPages) {
-            currentPage += 1;
-            applyPagination();
-            updatePaginationUI(totalPages);
-        }
-    });
-
     if (window.lucide) {
         window.lucide.createIcons();
     }
 
     applyFilters();
+    setupInfiniteScroll();
 });
@@ -2,10 +2,13 @@
 Testes de paginação com Paginator do Django
 """
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from salas.models import Sala
+from salas.paginacao import codificar_cursor
 
 
 class PaginationTests(TestCase):
@@ -109,3 +112,95 @@ class PaginationTests(TestCase):
         # A paginação deve considerar apenas salas ativas
         page_obj = response.context["page_obj"]
         self.assertEqual(page_obj.paginator.count, 20)  # Não conta a inativa
+
+    def test_listar_salas_busca_apenas_a_pagina(self):
+        """Testa que a página é fatiada no banco, sem carregar todas as salas"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("listar_salas") + "?page=2")
+        self.assertEqual(response.status_code, 200)
+
+        consultas_salas = [q["sql"] for q in ctx.captured_queries if '"salas_sala"' in q["sql"]]
+        # Um COUNT para o Paginator e um SELECT limitado à página
+        self.assertEqual(len(consultas_salas), 2)
+        select = next(sql for sql in consultas_salas if "COUNT" not in sql)
+        self.assertIn("LIMIT 8", select)
+        self.assertIn("OFFSET 8", select)
+        self.assertNotIn('"descricao"', select)
+        self.assertEqual([s["nome"] for s in response.context["salas"]][0], "Sala 09")
+
+
+class CursorPaginationTests(TestCase):
+    """Testes da paginação por cursor (rolagem infinita) de salas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 21):
+            Sala.objects.create(nome=f"Sala {i:02d}", capacidade=20 + i, tipo="Coletiva")
+        Sala.objects.create(nome="Sala Inativa", capacidade=10, tipo="Coletiva", ativo=False)
+
+    def percorrer(self, limite):
+        nomes, cursor, paginas = [], None, 0
+        while True:
+            params = {"limite": limite}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(reverse("api_listar_salas"), params)
+            self.assertEqual(response.status_code, 200)
+            dados = response.json()
+            nomes += [s["nome"] for s in dados["salas"]]
+            paginas += 1
+            cursor = dados["proximo_cursor"]
+            if not cursor:
+                return nomes, paginas
+
+    def test_percorre_todas_as_salas_ativas_em_ordem(self):
+        """Testa que o cursor visita cada sala ativa uma vez, na ordem do nome"""
+        nomes, paginas = self.percorrer(8)
+        self.assertEqual(nomes, [f"Sala {i:02d}" for i in range(1, 21)])
+        self.assertEqual(paginas, 3)
+
+    def test_insercao_durante_a_rolagem_nao_duplica(self):
+        """Testa que uma sala criada antes do cursor não desloca as páginas seguintes"""
+        primeira = self.client.get(reverse("api_listar_salas"), {"limite": 8}).json()
+        Sala.objects.create(nome="Sala 00", capacidade=10, tipo="Coletiva")
+
+        segunda = self.client.get(
+            reverse("api_listar_salas"), {"limite": 8, "cursor": primeira["proximo_cursor"]}
+        ).json()
+        self.assertEqual(segunda["salas"][0]["nome"], "Sala 09")
+        self.assertEqual(segunda["salas"][0]["detalhe"], reverse("detalhar_sala", args=[segunda["salas"][0]["id"]]))
+
+    def test_custo_da_pagina_nao_depende_da_posicao(self):
+        """Testa que páginas por cursor usam uma consulta, sem COUNT nem OFFSET"""
+        primeira = self.client.get(reverse("api_listar_salas"), {"limite": 5}).json()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("api_listar_salas"), {"limite": 5, "cursor": primeira["proximo_cursor"]})
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT", sql)
+        self.assertIn("LIMIT 6", sql)
+
+    def test_cursor_invalido(self):
+        """Testa que cursores adulterados e limites inválidos retornam 400"""
+        for params in ({"cursor": "nao-e-um-cursor"}, {"cursor": "W10"}, {"limite": "abc"}):
+            response = self.client.get(reverse("api_listar_salas"), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("errors", response.json())
+
+    def test_cursor_com_valores_de_tipo_errado(self):
+        """Testa que um cursor legível com valores que não servem para os campos retorna 400"""
+        for valores in (["x", "abc"], ["x", {"id": 1}], ["x", None]):
+            response = self.client.get(reverse("api_listar_salas"), {"cursor": codificar_cursor(valores)})
+            self.assertEqual(response.status_code, 400, valores)
+            self.assertEqual(response.json(), {"errors": ["Cursor invalido."]})
+
+    def test_listagem_continua_renderiza_primeira_pagina_com_cursor(self):
+        """Testa o modo rolagem infinita da listagem (?continuo=1)"""
+        response = self.client.get(reverse("listar_salas"), {"continuo": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["salas"]), 8)
+        self.assertIsNone(response.context["page_obj"])
+        self.assertContains(response, 'id="roomsSentinel"')
+        self.assertContains(response, response.context["proximo_cursor"])
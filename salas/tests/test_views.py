@@ -1,10 +1,15 @@
 """
 Testes unitários para as views de Sala
 """
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
+from reservas import grades
+from reservas.models import Reserva
 from salas.models import Sala
 
 
@@ -126,6 +131,29 @@ class SalaViewTests(TestCase):
         self.assertIn("slots", response.context)
         self.assertTrue(len(response.context["slots"]) > 0)
 
+    def test_detalhar_sala_disponibilidade_real_de_hoje(self):
+        """Testa que os slots trazem a ocupação real de hoje, igual à API de horários"""
+        sala = Sala.objects.create(nome="Sala Ocupada", capacidade=20, tipo="Coletiva")
+        hoje = timezone.localdate()
+        inicio = timezone.make_aware(datetime.combine(hoje, time(20, 0)))
+        Reserva.objects.create(sala=sala, usuario="20231001", inicio=inicio, fim=inicio + timedelta(hours=2))
+
+        grades.obter()
+        # Sessão/usuário não entram: sala + intervalos do dia
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("detalhar_sala", args=[sala.id]))
+
+        slots = response.context["slots"]
+        self.assertFalse(next(s for s in slots if s["range"] == "20:00 - 22:00")["disponivel"])
+        api = self.client.get(reverse("api_horarios_disponiveis", args=[sala.id]), {"data": hoje.isoformat()})
+        self.assertEqual(
+            [(s["range"], s["disponivel"]) for s in slots],
+            [(s["range"], s["disponivel"]) for s in api.json()],
+        )
+        # Dados embutidos para o JS não repetir a consulta
+        self.assertContains(response, 'id="slotsIniciais"')
+        self.assertContains(response, "Ocupado")
+
     def test_detalhar_sala_inexistente_redireciona(self):
         """Testa que sala inexistente redireciona para listagem"""
         response = self.client.get(reverse("detalhar_sala", args=[9999]))
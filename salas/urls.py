@@ -6,6 +6,7 @@ urlpatterns = [
     # Area do aluno
     path("salas/", views.listar_salas, name="listar_salas"),
     path("salas/<int:sala_id>/", views.detalhar_sala, name="detalhar_sala"),
+    path("api/salas/lista/", views.api_listar_salas, name="api_listar_salas"),
 
     # Area admin
     path("admin/salas/", views.gerenciar_salas, name="gerenciar_salas"),
@@ -9,7 +9,11 @@ from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
 
+from reservas import grades
+from reservas.disponibilidade import calcular_horarios, horarios_da_sala
+
 from .models import Sala
+from .paginacao import CursorInvalido, paginar_por_cursor
 
 
 def _is_admin(user):
@@ -20,36 +24,57 @@ def admin_required(view_func):
     return login_required(user_passes_test(_is_admin, login_url="/login/")(view_func))
 
 
+# Campos usados pelo cartão da listagem de salas
+CAMPOS_CARTAO = ("id", "nome", "tipo", "capacidade", "status", "equipamentos")
+ORDENACAO_SALAS = ("nome", "id")
+SALAS_POR_PAGINA = 8
+
+
+def _cartao_sala(sala):
+    return {
+        "id": sala.id,
+        "nome": sala.nome,
+        "tipo": sala.tipo,
+        "capacidade": sala.capacidade,
+        "status": sala.status or "Disponivel",
+        "status_class": "",
+        "equipamentos": sala.equipamentos or [],
+    }
+
+
+def _salas_da_listagem():
+    return Sala.objects.filter(ativo=True).only(*CAMPOS_CARTAO).order_by(*ORDENACAO_SALAS)
+
+
 @require_GET
 def listar_salas(request):
     # Lista de salas visivel para alunos. Usa dados reais, mas apresenta estado estatico de usuario.
-    salas_qs = Sala.objects.filter(ativo=True)
-    salas = []
-    for sala in salas_qs:
-        equipamentos = getattr(sala, "equipamentos", []) or []
-        status_label = getattr(sala, "status", "Disponivel") or "Disponivel"
-        salas.append(
-            {
-                "id": sala.id,
-                "nome": sala.nome,
-                "tipo": sala.tipo,
-                "capacidade": sala.capacidade,
-                "status": status_label,
-                "status_class": "",
-                "equipamentos": equipamentos,
-            }
+    # O Paginator fatia o queryset no banco: cada pagina busca so as 8 salas exibidas.
+    # Com ?continuo=1 a primeira pagina vem por cursor e o restante e carregado
+    # sob demanda (rolagem infinita) por api_listar_salas.
+    continuo = request.GET.get("continuo") == "1"
+    proximo_cursor = None
+
+    if continuo:
+        salas_pagina, proximo_cursor = paginar_por_cursor(
+            _salas_da_listagem(), ORDENACAO_SALAS, tamanho=SALAS_POR_PAGINA
         )
+        page_obj = None
+        salas = [_cartao_sala(sala) for sala in salas_pagina]
+    else:
+        paginator = Paginator(_salas_da_listagem(), SALAS_POR_PAGINA)
+        page_number = request.GET.get('page', 1)
+        try:
+            page_obj = paginator.get_page(page_number)
+        except (EmptyPage, PageNotAnInteger):
+            page_obj = paginator.get_page(1)
+        salas = [_cartao_sala(sala) for sala in page_obj.object_list]
 
     if not salas:
-        salas = [ {k: v for k, v in sala.items() if k != "descricao"} for sala in _fallback_salas() ]
-
-    # Paginação
-    paginator = Paginator(salas, 8)  # 8 salas por página
-    page_number = request.GET.get('page', 1)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.get_page(1)
+        fallback = [ {k: v for k, v in sala.items() if k != "descricao"} for sala in _fallback_salas() ]
+        page_obj = Paginator(fallback, SALAS_POR_PAGINA).get_page(1)
+        salas = page_obj.object_list
+        proximo_cursor = None
 
     student_name = (
         getattr(request.user, "get_full_name", lambda: "")() or getattr(request.user, "username", "") or "Aluno convidado"
@@ -59,18 +84,49 @@ def listar_salas(request):
         request,
         "salas/listar_salas.html",
         {
-            "salas": page_obj.object_list,
+            "salas": salas,
             "page_obj": page_obj,
+            "proximo_cursor": proximo_cursor,
             "student_name": student_name,
             "is_authenticated": request.user.is_authenticated,
         },
     )
 
 
+@require_GET
+def api_listar_salas(request):
+    """Salas ativas por cursor, para a rolagem infinita da listagem.
+
+    `?cursor=` vem de `proximo_cursor` da resposta anterior (ausente na
+    primeira pagina) e `?limite=` vai de 1 a 50.
+    """
+    try:
+        limite = min(max(int(request.GET.get("limite", SALAS_POR_PAGINA)), 1), 50)
+    except ValueError:
+        return JsonResponse({"errors": ["Parametro 'limite' deve ser um inteiro."]}, status=400)
+
+    try:
+        salas, proximo_cursor = paginar_por_cursor(
+            _salas_da_listagem(), ORDENACAO_SALAS, cursor=request.GET.get("cursor"), tamanho=limite
+        )
+    except CursorInvalido:
+        return JsonResponse({"errors": ["Cursor invalido."]}, status=400)
+
+    return JsonResponse(
+        {
+            "salas": [
+                {**_cartao_sala(sala), "detalhe": reverse("detalhar_sala", args=[sala.id])} for sala in salas
+            ],
+            "proximo_cursor": proximo_cursor,
+        }
+    )
+
+
 @require_GET
 def detalhar_sala(request, sala_id: int):
-    """Tela de detalhe/agenda da sala."""
+    """Tela de detalhe/agenda da sala, já com a disponibilidade de hoje."""
     fallback = _fallback_salas()
+    hoje = timezone.localdate()
     try:
         sala_obj = Sala.objects.get(id=sala_id, ativo=True)
         sala = {
@@ -82,20 +138,15 @@ def detalhar_sala(request, sala_id: int):
             "descricao": getattr(sala_obj, "descricao", "") or "Sala de estudo.",
             "equipamentos": getattr(sala_obj, "equipamentos", []) or [],
         }
+        # Mesmo formato de api_horarios_disponiveis, com uma query de intervalo:
+        # a página chega pronta, sem a primeira chamada à API
+        slots = horarios_da_sala(sala_obj.id, hoje, tipo=sala_obj.tipo)
     except Sala.DoesNotExist:
         sala = next((s for s in fallback if s["id"] == sala_id), None)
         if not sala:
             return redirect("listar_salas")
-
-    slots = [
-        {"range": "08:00 - 10:00", "status": "disponivel"},
-        {"range": "10:00 - 12:00", "status": "ocupado"},
-        {"range": "12:00 - 14:00", "status": "disponivel"},
-        {"range": "14:00 - 16:00", "status": "disponivel"},
-        {"range": "16:00 - 18:00", "status": "ocupado"},
-        {"range": "18:00 - 20:00", "status": "disponivel"},
-        {"range": "20:00 - 22:00", "status": "disponivel"},
-    ]
+        # Salas de demonstração não têm reservas
+        slots = calcular_horarios(hoje, [], grade=grades.obter().faixas(hoje, tipo=sala["tipo"]))
 
     student_name = (
         getattr(request.user, "get_full_name", lambda: "")() or getattr(request.user, "username", "") or "Aluno convidado"
@@ -106,7 +157,8 @@ def detalhar_sala(request, sala_id: int):
         "salas/detalhar_sala.html",
         {
             "sala": sala, 
-            "slots": slots, 
+            "slots": slots,
+            "data_slots": hoje,
             "student_name": student_name,
             "is_authenticated": request.user.is_authenticated,
         },
@@ -334,7 +386,7 @@ def api_update_delete_sala(request, sala_id):
 
         # Soft delete: mantém histórico de reservas e libera nome para nova sala
         sala.ativo = False
-        sala.save(update_fields=["ativo"])
+        sala.save(update_fields=["ativo", "atualizado_em"])
         return JsonResponse({"message": "Sala desativada com sucesso.", "id": sala_id})
 
     if reservas_ativas_qs.exists():
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos índices de Reserva (Reserva.Meta.indexes).
+
+Cria um banco de testes descartável (nunca toca o banco real) no backend
+configurado (SQLite ou PostgreSQL, ver DJANGO_DB_ENGINE), remove os índices,
+popula a tabela com N reservas e mede o plano de execução (EXPLAIN) e o
+tempo das consultas críticas antes e depois de recriar os índices.
+
+A medição "antes" também é feita sem as constraints de reserva (a unique
+parcial e, no PostgreSQL, a exclusion constraint da migration 0007), cujos
+índices o planejador usaria no lugar dos índices medidos. Elas continuam
+ativas durante a carga, descartando reservas que colidem.
+
+Executar com: python scripts/benchmark_indices.py --linhas 1000000
+Ou: docker compose exec web python scripts/benchmark_indices.py --linhas 1000000
+PostgreSQL: DJANGO_DB_ENGINE=postgresql python scripts/benchmark_indices.py
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+import time as _time
+from datetime import datetime, time, timedelta
+
+import django
+
+# Configurar Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ifteca_project.settings')
+django.setup()
+
+from django.db import connection, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from reservas.disponibilidade import limites_do_dia
+from reservas.models import Reserva
+from salas.models import Sala
+
+# Funções da migration que cria/remove a exclusion constraint (só PostgreSQL)
+_sem_sobreposicao = importlib.import_module('reservas.migrations.0007_reserva_sem_sobreposicao')
+
+
+def remover_constraints(editor):
+    for constraint in Reserva._meta.constraints:
+        editor.remove_constraint(Reserva, constraint)
+    _sem_sobreposicao.remover_exclusion_constraint(None, editor)
+
+
+def recriar_constraints(editor):
+    for constraint in Reserva._meta.constraints:
+        editor.add_constraint(Reserva, constraint)
+    _sem_sobreposicao.criar_exclusion_constraint(None, editor)
+
+
+def popular(linhas, num_salas, num_usuarios, seed):
+    """Insere `linhas` reservas distribuídas em salas/usuários/dias aleatórios."""
+    rnd = random.Random(seed)
+    Sala.objects.bulk_create(
+        Sala(nome=f"Bench {i:04d}", capacidade=20, tipo="Coletiva") for i in range(num_salas)
+    )
+    sala_ids = list(Sala.objects.filter(nome__startswith="Bench ").values_list('id', flat=True))
+    hoje = timezone.localdate()
+    lote = []
+    for n in range(linhas):
+        dia = hoje + timedelta(days=rnd.randint(-730, 60))
+        hora = rnd.choice((8, 10, 12, 14, 16, 18, 20))
+        inicio = timezone.make_aware(datetime.combine(dia, time(hora)))
+        lote.append(Reserva(
+            sala_id=rnd.choice(sala_ids),
+            usuario=f"{20200000 + rnd.randrange(num_usuarios)}",
+            inicio=inicio,
+            fim=inicio + timedelta(hours=2),
+            cancelada=rnd.random() < 0.1,
+        ))
+        if len(lote) == 10000:
+            # Colisões na mesma sala/horário (reserva_unica_sala_inicio_ativa) são descartadas
+            Reserva.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+            print(f"  {n + 1} reservas inseridas", end="\r")
+    Reserva.objects.bulk_create(lote, ignore_conflicts=True)
+    print(f"  {Reserva.objects.count()} reservas inseridas")
+
+
+def consultas():
+    """Consultas dos hot paths (mesmos predicados das views)."""
+    sala = Sala.objects.filter(nome__startswith="Bench ").first()
+    usuario = Reserva.objects.values_list('usuario', flat=True).first()
+    agora = timezone.now()
+    inicio = agora + timedelta(days=1)
+    fim = inicio + timedelta(hours=2)
+    inicio_dia, fim_dia = limites_do_dia(inicio.date())
+    inicio_mes = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "conflito_sala": Reserva.objects.filter(
+            sala=sala, inicio__lt=fim, fim__gt=inicio, cancelada=False,
+        ).order_by()[:1],
+        "conflito_usuario": Reserva.objects.filter(
+            usuario=usuario, inicio__lt=fim, fim__gt=inicio, cancelada=False,
+        ).order_by('inicio')[:1],
+        "minhas_ativas": Reserva.objects.filter(
+            usuario=usuario, fim__gte=agora, cancelada=False,
+        ).order_by('inicio'),
+        "minhas_historico": Reserva.objects.filter(usuario=usuario).filter(
+            models.Q(fim__lt=agora) | models.Q(cancelada=True)
+        ).order_by('-inicio')[:8],
+        "minhas_total": Reserva.objects.filter(usuario=usuario).order_by().values('id'),
+        "dashboard_mes": Reserva.objects.filter(inicio__gte=inicio_mes).order_by().values('id'),
+        "dashboard_mensal": Reserva.objects.filter(inicio__gte=agora - timedelta(days=180))
+        .annotate(mes=TruncMonth('inicio')).values('mes').annotate(total=Count('id')).order_by('mes'),
+        "disponibilidade_dia": Reserva.objects.filter(
+            sala=sala, cancelada=False, inicio__lt=fim_dia, fim__gt=inicio_dia,
+        ).order_by('inicio').values_list('inicio', 'fim'),
+    }
+
+
+def analisar():
+    """Atualiza as estatísticas do planejador."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE reservas_reserva' if connection.vendor == 'postgresql' else 'ANALYZE')
+
+
+def medir(repeticoes):
+    resultado = {}
+    for nome, qs in consultas().items():
+        plano = qs.explain()
+        inicio = _time.perf_counter()
+        for _ in range(repeticoes):
+            list(qs.all())
+        ms = (_time.perf_counter() - inicio) * 1000 / repeticoes
+        resultado[nome] = (plano, ms)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--salas', type=int, default=200)
+    parser.add_argument('--usuarios', type=int, default=20_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DE ÍNDICES - RESERVAS")
+    print("=" * 60)
+
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        indices = Reserva._meta.indexes
+        print(f"\nRemovendo {len(indices)} índices ({connection.vendor})...")
+        with connection.schema_editor() as editor:
+            for indice in indices:
+                editor.remove_index(Reserva, indice)
+
+        print(f"Populando {args.linhas} reservas...")
+        popular(args.linhas, args.salas, args.usuarios, args.seed)
+
+        print("Removendo constraints de reserva para a medição sem índices...")
+        with connection.schema_editor() as editor:
+            remover_constraints(editor)
+        analisar()
+
+        antes = medir(args.repeticoes)
+
+        print("Recriando índices e constraints...")
+        inicio = _time.perf_counter()
+        with connection.schema_editor() as editor:
+            for indice in indices:
+                editor.add_index(Reserva, indice)
+            recriar_constraints(editor)
+        print(f"  criados em {_time.perf_counter() - inicio:.1f}s")
+        analisar()
+
+        depois = medir(args.repeticoes)
+
+        for nome in antes:
+            plano_antes, ms_antes = antes[nome]
+            plano_depois, ms_depois = depois[nome]
+            print("\n" + "-" * 60)
+            print(f"{nome}: {ms_antes:.2f} ms -> {ms_depois:.2f} ms")
+            print("  ANTES:\n    " + plano_antes.replace("\n", "\n    "))
+            print("  DEPOIS:\n    " + plano_depois.replace("\n", "\n    "))
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
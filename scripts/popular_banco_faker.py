@@ -191,6 +191,7 @@ else:
         reserva = Reserva.objects.create(
             sala=sala,
             usuario=usuario.username,
+            conta=usuario,
             inicio=inicio,
             fim=fim,
             cancelada=cancelada